@@ -6,27 +6,141 @@
 import os
 import re
 import time
+import codecs
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Any
-import git
+from typing import Dict, List, Optional, Any, Iterable
 from loguru import logger
 
 from config import (
     SCAN_DIR, 
+    PROJECT_DISCOVERY_DEPTH,
+    PROJECT_DISCOVERY_WORKERS,
+    PROJECT_ROOT_MARKERS,
+    DISCOVERY_PRUNE_DIRS,
     TECH_STACK_MARKERS, 
+    DEPENDENCY_TECH_MARKERS,
     PROJECT_TYPE_MARKERS,
     GIT_ACTIVE_THRESHOLD_DAYS,
     GIT_MAINTENANCE_THRESHOLD_DAYS,
+    PROJECT_MAX_SECONDS,
+    PROJECT_MAX_FILES,
+    GIT_TIMEOUT_SECONDS,
     PRIORITY_THRESHOLDS
 )
+from fingerprint import TreeSnapshot, scan_tree, scan_project_tree
+from manifests import MANIFEST_PARSERS, parse_manifest
+from languages import primary_language
+from git_activity import get_git_activity
+from git_index import get_working_tree_status
+from shebang import detect_script_tech
+from identity import get_project_identity
+from git_pool import GitTimeout
+from project_info import ProjectInfo
+from metrics import PROJECTS_ANALYZED, GIT_DURATION
+
+# 每个项目最多解析的清单文件数
+MAX_MANIFESTS_PER_PROJECT = 20
+
+# 预编译的检测规则，导入时构建一次（定时运行时各次运行共用）
+_ROOT_MARKERS = frozenset(PROJECT_ROOT_MARKERS)
+# (技术栈, 扩展名标记, 小写的文件名/目录名标记)
+_TECH_MARKERS = [
+    (tech,
+     frozenset(marker for marker in markers if marker.startswith('.')),
+     frozenset(marker.lower() for marker in markers if not marker.startswith('.')))
+    for tech, markers in TECH_STACK_MARKERS.items()
+]
+_DEPENDENCY_MARKERS = [(tech, frozenset(packages)) for tech, packages in DEPENDENCY_TECH_MARKERS.items()]
+_TYPE_MARKERS = [
+    (project_type, tuple(marker.lower() for marker in markers))
+    for project_type, markers in PROJECT_TYPE_MARKERS.items()
+]
+
+
+def _discover_roots(directory: Path, depth: int, max_depth: int) -> List[Path]:
+    """在目录下递归查找带有项目标记的根目录
+
+    Args:
+        directory: 当前目录
+        depth: 当前目录相对扫描目录的层数（直接子目录为 1）
+        max_depth: 最大层数
+
+    Returns:
+        找到的项目根目录列表（包含嵌套在项目内部的子项目）
+    """
+    try:
+        with os.scandir(directory) as it:
+            entries = list(it)
+    except OSError as e:
+        logger.debug(f"无法读取目录: {directory} - {str(e)}")
+        return []
+    
+    names = {entry.name for entry in entries}
+    roots = [directory] if not _ROOT_MARKERS.isdisjoint(names) else []
+    
+    if depth >= max_depth:
+        return roots
+    
+    # 继续向下查找（包括项目内部，以识别 monorepo 中的子项目）
+    for entry in entries:
+        if entry.name.startswith('.') or entry.name in DISCOVERY_PRUNE_DIRS:
+            continue
+        try:
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+        except OSError:
+            continue
+        roots.extend(_discover_roots(Path(entry.path), depth + 1, max_depth))
+    
+    return roots
+
+
+class AnalysisBudget:
+    """单个项目的分析预算（时间、文件数、git 超时），并记录触发的限制"""
+    
+    def __init__(self, max_seconds: float = PROJECT_MAX_SECONDS,
+                 max_files: int = PROJECT_MAX_FILES,
+                 git_timeout: float = GIT_TIMEOUT_SECONDS):
+        """初始化分析预算
+
+        Args:
+            max_seconds: 分析时间上限（秒），0 表示不限制
+            max_files: 最多扫描的文件数，0 表示不限制
+            git_timeout: 单次 git 子进程的超时时间（秒），0 表示不限制
+        """
+        self.deadline = time.monotonic() + max_seconds if max_seconds else None
+        self.max_files = max_files or None
+        self.git_timeout = git_timeout or None
+        self.limits_hit: List[str] = []
+    
+    def git_call_timeout(self) -> Optional[float]:
+        """本次 git 调用可用的超时时间，不超过剩余的分析时间"""
+        if self.deadline is None:
+            return self.git_timeout
+        remaining = max(0.1, self.deadline - time.monotonic())
+        return min(self.git_timeout, remaining) if self.git_timeout else remaining
+    
+    def hit(self, limit: str) -> None:
+        """记录触发的限制
+
+        Args:
+            limit: 限制类型（"files"、"time" 或 "git_timeout"）
+        """
+        if limit not in self.limits_hit:
+            self.limits_hit.append(limit)
 
 
-def get_projects(scan_dir: Path) -> List[Path]:
+def get_projects(scan_dir: Path, max_depth: int = PROJECT_DISCOVERY_DEPTH) -> List[Path]:
     """获取指定目录下的所有项目文件夹
 
+    在 ``max_depth`` 层以内按项目标记（``.git``、各类清单文件）识别项目根目录，
+    各顶层目录并行遍历。没有找到任何项目根目录的顶层目录本身仍视为一个项目。
+
     Args:
         scan_dir: 要扫描的目录路径
+        max_depth: 向下查找项目根目录的最大层数
 
     Returns:
         项目文件夹路径列表
@@ -37,76 +151,173 @@ def get_projects(scan_dir: Path) -> List[Path]:
         logger.error(f"扫描目录不存在或不是一个有效的目录: {scan_dir}")
         return []
     
-    # 获取所有子目录（排除隐藏文件夹和非目录）
-    projects = [
+    # 获取所有顶层子目录（排除隐藏文件夹和非目录）
+    top_dirs = sorted(
         item for item in scan_dir.iterdir() 
         if item.is_dir() and not item.name.startswith('.')
-    ]
+    )
+    
+    projects = []
+    with ThreadPoolExecutor(max_workers=PROJECT_DISCOVERY_WORKERS) as executor:
+        for top_dir, roots in zip(top_dirs, executor.map(
+                lambda d: _discover_roots(d, 1, max(1, max_depth)), top_dirs)):
+            projects.extend(roots if roots else [top_dir])
     
     logger.info(f"找到 {len(projects)} 个潜在项目")
     return projects
 
 
-def detect_tech_stack(project_path: Path) -> List[str]:
+def get_nested_projects(projects: Iterable[Path]) -> Dict[Path, List[str]]:
+    """计算每个项目内部直接嵌套的子项目
+
+    嵌套的子项目会被单独分析，因此在分析父项目时需要跳过它们。
+
+    Args:
+        projects: 项目路径列表
+
+    Returns:
+        项目路径到嵌套子项目相对路径列表的映射
+    """
+    project_set = set(projects)
+    nested: Dict[Path, List[str]] = {}
+    
+    for project in project_set:
+        # 只记录在最近的祖先项目中，更深的嵌套由中间项目负责跳过
+        for parent in project.parents:
+            if parent in project_set:
+                nested.setdefault(parent, []).append(project.relative_to(parent).as_posix())
+                break
+    
+    return nested
+
+
+def find_nested_projects(project_path: Path, depth: int = 1,
+                         max_depth: int = PROJECT_DISCOVERY_DEPTH) -> List[str]:
+    """查找单个项目内部直接嵌套的子项目，不扫描整个扫描目录
+
+    发现规则与 get_projects 一致，用于只分析指定项目时得到与全量扫描相同的结果。
+
+    Args:
+        project_path: 项目路径
+        depth: 项目相对扫描目录的层数（直接子目录为 1）
+        max_depth: 从扫描目录向下查找项目根目录的最大层数
+
+    Returns:
+        嵌套子项目的相对路径列表
+    """
+    roots = [root for root in _discover_roots(project_path, depth, max(1, max_depth)) if root != project_path]
+    return get_nested_projects([project_path, *roots]).get(project_path, [])
+
+
+def get_project_manifests(project_path: Path,
+                          snapshot: Optional[TreeSnapshot] = None) -> Dict[str, Dict[str, Any]]:
+    """解析项目中存在的清单文件（package.json、pyproject.toml 等）
+
+    只解析目录扫描中实际存在的清单，跳过依赖和构建目录；解析结果按文件
+    大小和修改时间缓存，未变化的清单不会重复读取。
+
+    Args:
+        project_path: 项目路径
+        snapshot: 项目目录扫描结果，None 时现场扫描
+
+    Returns:
+        清单相对路径到解析结果的映射，按目录层级排序（根目录的清单在前）
+    """
+    if snapshot is None:
+        snapshot = scan_tree(project_path)
+    
+    candidates = []
+    for rel_path, entry in snapshot.iter_files():
+        if entry[0] not in MANIFEST_PARSERS:
+            continue
+        parts = rel_path.split(os.sep)
+        if any(part in DISCOVERY_PRUNE_DIRS for part in parts[:-1]):
+            continue
+        candidates.append((len(parts), rel_path, entry))
+    
+    manifests = {}
+    for _, rel_path, entry in sorted(candidates)[:MAX_MANIFESTS_PER_PROJECT]:
+        parsed = parse_manifest(project_path / rel_path, entry[1], entry[2])
+        if parsed is not None:
+            manifests[rel_path] = parsed
+    return manifests
+
+
+def detect_tech_stack(project_path: Path, snapshot: Optional[TreeSnapshot] = None,
+                      manifests: Optional[Dict[str, Dict[str, Any]]] = None) -> List[str]:
     """检测项目使用的技术栈
 
+    扩展名标记匹配文件扩展名，其他标记匹配完整的文件名或目录名，
+    无扩展名的脚本按 shebang 识别，框架类技术栈根据清单文件中声明的依赖判断。
+
     Args:
         project_path: 项目路径
+        snapshot: 项目目录扫描结果，None 时现场扫描
+        manifests: 已解析的清单文件，None 时按需解析
 
     Returns:
         检测到的技术栈列表
     """
     tech_stacks = []
     
-    # 获取所有文件（包括子目录）的扩展名和文件名
-    all_files = []
-    for root, _, files in os.walk(project_path):
-        for file in files:
-            all_files.append(os.path.join(root, file))
+    if snapshot is None:
+        snapshot = scan_tree(project_path)
+    if manifests is None:
+        manifests = get_project_manifests(project_path, snapshot)
     
-    # 检查项目目录中的所有文件
-    file_content = "\n".join(all_files).lower()
+    # 获取所有扩展名、文件名和目录名
+    file_names = [entry[0] for _, entry in snapshot.iter_files()]
+    extensions = {os.path.splitext(name)[1] for name in file_names}
+    names = {name.lower() for name in file_names}
+    names.update(os.path.basename(rel_dir).lower() for rel_dir in snapshot.iter_dirs())
     
-    # 检查每个技术栈的标记
-    for tech, markers in TECH_STACK_MARKERS.items():
-        for marker in markers:
-            if marker.startswith('.'):  # 检查文件扩展名
-                if any(f.endswith(marker) for f in all_files):
-                    tech_stacks.append(tech)
-                    break
-            else:  # 检查文件名或内容
-                if marker.lower() in file_content:
-                    tech_stacks.append(tech)
-                    break
+    # 检查每个技术栈的标记（扩展名或文件名/目录名）
+    for tech, marker_extensions, marker_names in _TECH_MARKERS:
+        if not marker_extensions.isdisjoint(extensions) or not marker_names.isdisjoint(names):
+            tech_stacks.append(tech)
+    
+    # 无扩展名的可执行脚本（按 shebang）和 Dockerfile
+    tech_stacks.extend(detect_script_tech(project_path, snapshot))
+    
+    # 检查清单文件中声明的依赖
+    dependencies = set()
+    for manifest in manifests.values():
+        dependencies.update(manifest["dependencies"])
+    for tech, packages in _DEPENDENCY_MARKERS:
+        if not packages.isdisjoint(dependencies):
+            tech_stacks.append(tech)
     
     # 去重
     tech_stacks = list(set(tech_stacks))
     return tech_stacks
 
 
-def detect_project_type(project_path: Path, tech_stack: List[str]) -> str:
+def detect_project_type(project_path: Path, tech_stack: List[str],
+                        snapshot: Optional[TreeSnapshot] = None) -> str:
     """根据项目特征和技术栈推断项目类型
 
     Args:
         project_path: 项目路径
         tech_stack: 检测到的技术栈
+        snapshot: 项目目录扫描结果，None 时现场扫描
 
     Returns:
         项目类型
     """
-    # 获取所有文件名进行类型检测
-    all_files = []
-    for root, dirs, files in os.walk(project_path):
-        all_files.extend(files)
-        all_files.extend(dirs)
+    if snapshot is None:
+        snapshot = scan_tree(project_path)
+    
+    # 获取所有文件名和目录名进行类型检测
+    all_files = [entry[0] for _, entry in snapshot.iter_files()]
+    all_files.extend(os.path.basename(rel_dir) for rel_dir in snapshot.iter_dirs())
     
     file_content = "\n".join(all_files).lower()
     tech_content = "\n".join(tech_stack).lower()
     
     # 检查每种项目类型的标记
-    for project_type, markers in PROJECT_TYPE_MARKERS.items():
+    for project_type, markers in _TYPE_MARKERS:
         for marker in markers:
-            if marker.lower() in file_content or marker.lower() in tech_content:
+            if marker in file_content or marker in tech_content:
                 return project_type
     
     # 根据技术栈做兜底推断
@@ -125,62 +336,138 @@ def detect_project_type(project_path: Path, tech_stack: List[str]) -> str:
     return "其他"
 
 
-def detect_project_status(project_path: Path) -> str:
+def get_git_activity_metrics(project_path: Path,
+                             budget: Optional[AnalysisBudget] = None) -> Optional[Dict[str, Any]]:
+    """获取仓库活跃度统计，git 子进程受超时保护
+
+    Args:
+        project_path: 项目路径
+        budget: 分析预算，None 时使用默认的 git 超时
+
+    Returns:
+        活跃度统计（见 git_activity.get_git_activity），不是 Git 仓库时返回 None
+    """
+    if budget and "git_timeout" in budget.limits_hit:
+        # 本项目已有 git 调用超时，不再重试
+        return None
+    timeout = budget.git_call_timeout() if budget else (GIT_TIMEOUT_SECONDS or None)
+    with GIT_DURATION.time(operation="activity"):
+        activity = get_git_activity(project_path, timeout)
+    if activity and activity["timed_out"] and budget:
+        budget.hit("git_timeout")
+    return activity
+
+
+def get_identity(project_path: Path, budget: Optional[AnalysisBudget] = None) -> Optional[str]:
+    """获取项目的稳定标识（见 identity.get_project_identity），git 子进程受超时保护
+
+    Args:
+        project_path: 项目路径
+        budget: 分析预算，None 时使用默认的 git 超时
+
+    Returns:
+        项目标识，git 超时或目录无法访问时返回 None
+    """
+    if budget and "git_timeout" in budget.limits_hit:
+        return None
+    timeout = budget.git_call_timeout() if budget else (GIT_TIMEOUT_SECONDS or None)
+    try:
+        with GIT_DURATION.time(operation="identity"):
+            return get_project_identity(project_path, timeout)
+    except GitTimeout:
+        if budget:
+            budget.hit("git_timeout")
+        return None
+
+
+def get_worktree_status(project_path: Path, snapshot: TreeSnapshot,
+                        budget: Optional[AnalysisBudget] = None) -> Optional[Dict[str, Any]]:
+    """检测工作区中未提交的更改，git 子进程受超时保护
+
+    Args:
+        project_path: 项目路径
+        snapshot: 项目目录扫描结果
+        budget: 分析预算，None 时使用默认的 git 超时
+
+    Returns:
+        工作区状态（见 git_index.get_working_tree_status），无法检测时返回 None
+    """
+    if budget and "git_timeout" in budget.limits_hit:
+        return None
+    timeout = budget.git_call_timeout() if budget else (GIT_TIMEOUT_SECONDS or None)
+    with GIT_DURATION.time(operation="worktree"):
+        status = get_working_tree_status(project_path, snapshot, timeout)
+    if status and status["timed_out"] and budget:
+        budget.hit("git_timeout")
+    return status
+
+
+def get_last_commit_time(project_path: Path, budget: Optional[AnalysisBudget] = None,
+                         activity: Optional[Dict[str, Any]] = None) -> Optional[datetime.datetime]:
+    """获取最近一次提交的时间（HEAD 未变化时直接使用活跃度缓存）
+
+    Args:
+        project_path: 项目路径
+        budget: 分析预算，None 时使用默认的 git 超时
+        activity: 已获取的活跃度统计（不是 Git 仓库时为空字典），None 时现场获取
+
+    Returns:
+        带时区的提交时间；不是 Git 仓库、没有提交或超时时返回 None
+    """
+    if activity is None:
+        activity = get_git_activity_metrics(project_path, budget)
+    if not activity or not activity["last_commit"]:
+        return None
+    return datetime.datetime.fromisoformat(activity["last_commit"])
+
+
+def detect_project_status(project_path: Path, snapshot: Optional[TreeSnapshot] = None,
+                          budget: Optional[AnalysisBudget] = None,
+                          activity: Optional[Dict[str, Any]] = None) -> str:
     """检测项目状态（活跃、维护中、暂停）
 
     Args:
         project_path: 项目路径
+        snapshot: 项目目录扫描结果，None 时现场扫描
+        budget: 分析预算
+        activity: 已获取的活跃度统计，None 时现场获取
 
     Returns:
         项目状态
     """
-    try:
-        # 尝试将项目作为Git仓库打开
-        repo = git.Repo(project_path)
-        
-        # 获取最近一次提交的时间
-        commits = list(repo.iter_commits(max_count=5))
-        if not commits:
-            # 没有提交记录，使用文件修改时间
-            return detect_status_by_file_time(project_path)
-        
-        last_commit_time = commits[0].committed_datetime
-        now = datetime.datetime.now(last_commit_time.tzinfo)
-        days_since_last_commit = (now - last_commit_time).days
-        
-        if days_since_last_commit <= GIT_ACTIVE_THRESHOLD_DAYS:
-            return "活跃"
-        elif days_since_last_commit <= GIT_MAINTENANCE_THRESHOLD_DAYS:
-            return "维护中"
-        else:
-            return "暂停"
-            
-    except (git.InvalidGitRepositoryError, git.NoSuchPathError):
-        # 不是Git仓库，使用文件修改时间
-        return detect_status_by_file_time(project_path)
+    # 获取最近一次提交的时间
+    last_commit_time = get_last_commit_time(project_path, budget, activity)
+    if last_commit_time is None:
+        # 不是Git仓库或没有提交记录，使用文件修改时间
+        return detect_status_by_file_time(project_path, snapshot)
+    
+    now = datetime.datetime.now(last_commit_time.tzinfo)
+    days_since_last_commit = (now - last_commit_time).days
+    
+    if days_since_last_commit <= GIT_ACTIVE_THRESHOLD_DAYS:
+        return "活跃"
+    elif days_since_last_commit <= GIT_MAINTENANCE_THRESHOLD_DAYS:
+        return "维护中"
+    else:
+        return "暂停"
 
 
-def detect_status_by_file_time(project_path: Path) -> str:
+def detect_status_by_file_time(project_path: Path, snapshot: Optional[TreeSnapshot] = None) -> str:
     """根据文件修改时间检测项目状态
 
     Args:
         project_path: 项目路径
+        snapshot: 项目目录扫描结果，None 时现场扫描
 
     Returns:
         项目状态
     """
-    newest_time = 0
-    now = time.time()
+    if snapshot is None:
+        snapshot = scan_tree(project_path)
     
-    # 遍历所有文件，找出最新修改时间
-    for root, _, files in os.walk(project_path):
-        for file in files:
-            file_path = os.path.join(root, file)
-            try:
-                mtime = os.path.getmtime(file_path)
-                newest_time = max(newest_time, mtime)
-            except:
-                continue
+    # 扫描结果中已汇总了最新修改时间
+    newest_time = snapshot.newest_mtime
+    now = time.time()
     
     if newest_time == 0:
         return "暂停"
@@ -195,12 +482,14 @@ def detect_status_by_file_time(project_path: Path) -> str:
         return "暂停"
 
 
-def detect_project_priority(project_path: Path, status: str) -> str:
+def detect_project_priority(project_path: Path, status: str,
+                            snapshot: Optional[TreeSnapshot] = None) -> str:
     """基于项目状态和最后修改时间确定项目优先级
 
     Args:
         project_path: 项目路径
         status: 项目状态
+        snapshot: 项目目录扫描结果，None 时现场扫描
 
     Returns:
         项目优先级（高、中、低）
@@ -209,16 +498,11 @@ def detect_project_priority(project_path: Path, status: str) -> str:
         # 活跃项目优先级较高
         return "高"
     
+    if snapshot is None:
+        snapshot = scan_tree(project_path)
+    
     # 找出最近修改时间
-    newest_time = 0
-    for root, _, files in os.walk(project_path):
-        for file in files:
-            file_path = os.path.join(root, file)
-            try:
-                mtime = os.path.getmtime(file_path)
-                newest_time = max(newest_time, mtime)
-            except:
-                continue
+    newest_time = snapshot.newest_mtime
     
     if newest_time == 0:
         return "低"
@@ -235,99 +519,224 @@ def detect_project_priority(project_path: Path, status: str) -> str:
         return "低"
 
 
-def extract_description(project_path: Path) -> str:
+# README 文件名（小写）按优先级排列，及其对应的格式
+README_FORMATS = [
+    ("readme.md", "md"), ("readme.markdown", "md"), ("readme.rst", "rst"),
+    ("readme.adoc", "adoc"), ("readme.asciidoc", "adoc"), ("readme.org", "org"),
+    ("readme.txt", "txt"), ("readme", "txt"),
+]
+
+# README 读取配置：按块读取，最多读取前 README_MAX_BYTES 字节
+README_READ_CHUNK = 4096
+README_MAX_BYTES = 64 * 1024
+
+# 提供描述字段的清单文件（仅项目根目录），按优先级排列
+DESCRIPTION_MANIFESTS = ["pyproject.toml", "package.json", "Cargo.toml"]
+
+# 描述最大长度
+MAX_DESCRIPTION_LENGTH = 500
+
+# 标题下划线（Markdown setext 标题、reStructuredText 标题）
+_UNDERLINE_RE = re.compile(r'^([=\-`:\'"~^_*+#<>])\1{2,}$')
+
+
+def _iter_readme_lines(readme_path: Path) -> Iterable[str]:
+    """按块读取 README 并逐行产出，最多读取 README_MAX_BYTES 字节"""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    with open(readme_path, "rb") as f:
+        buffer = ""
+        remaining = README_MAX_BYTES
+        while remaining > 0:
+            chunk = f.read(min(README_READ_CHUNK, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            buffer += decoder.decode(chunk)
+            *lines, buffer = buffer.split("\n")
+            yield from lines
+        buffer += decoder.decode(b"", final=True)
+        if buffer:
+            yield buffer
+
+
+def _is_markup_line(line: str, fmt: str) -> bool:
+    """判断一行是否为标题、徽章、指令等非正文内容"""
+    if _UNDERLINE_RE.match(line):
+        return True
+    if fmt == "md":
+        return line.startswith(("#", "![", "[![", "<", "|", "[//]: "))
+    if fmt == "rst":
+        return line.startswith(("..", ":", "|"))
+    if fmt == "adoc":
+        return line.startswith(("=", ":", "//", "image:", "[", "ifdef::", "ifndef::", "endif::", "include::"))
+    if fmt == "org":
+        return line.startswith(("* ", "#", ":")) or re.match(r'^\*+ ', line) is not None
+    return False
+
+
+def _is_block_delimiter(line: str, fmt: str) -> bool:
+    """判断一行是否为代码块等区块的起止标记"""
+    if fmt == "md":
+        return line.startswith(("```", "~~~"))
+    if fmt == "adoc":
+        return line in ("----", "....", "++++", "____")
+    if fmt == "org":
+        return line.lower().startswith(("#+begin_", "#+end_"))
+    return False
+
+
+def _first_paragraph(lines: Iterable[str], fmt: str) -> List[str]:
+    """从逐行输入中提取第一个正文段落，取到后立即停止读取"""
+    paragraph: List[str] = []
+    in_block = False
+    
+    for raw_line in lines:
+        line = raw_line.strip()
+        
+        if _is_block_delimiter(line, fmt):
+            if paragraph:
+                return paragraph
+            in_block = not in_block
+            continue
+        if in_block:
+            continue
+        
+        if not line:
+            if paragraph:
+                return paragraph
+            continue
+        
+        if _is_markup_line(line, fmt):
+            if paragraph and _UNDERLINE_RE.match(line):
+                # 下划线标题：前面的文本是标题而不是正文
+                paragraph = []
+                continue
+            if paragraph:
+                return paragraph
+            continue
+        
+        paragraph.append(line)
+    
+    return paragraph
+
+
+def _clean_markup(text: str, fmt: str) -> str:
+    """清理段落中的内联标记"""
+    if fmt == "rst":
+        text = re.sub(r'`([^`<]+?)\s*<[^>]+>`_{1,2}', r'\1', text)  # 链接
+        text = re.sub(r'``([^`]+)``', r'\1', text)  # 行内代码
+    elif fmt == "adoc":
+        text = re.sub(r'(?:link:)?\S+?\[([^\]]+)\]', r'\1', text)  # 链接
+    elif fmt == "org":
+        text = re.sub(r'\[\[[^\]]+\]\[([^\]]+)\]\]', r'\1', text)  # 带文字的链接
+        text = re.sub(r'\[\[([^\]]+)\]\]', r'\1', text)  # 链接
+        text = re.sub(r'[=~]([^=~]+)[=~]', r'\1', text)  # 行内代码
+    
+    text = re.sub(r'\[([^\]]+)\]\([^)]+\)', r'\1', text)  # 链接
+    text = re.sub(r'[*_]{1,2}([^*_]+)[*_]{1,2}', r'\1', text)  # 粗体/斜体
+    text = re.sub(r'`([^`]+)`', r'\1', text)  # 行内代码
+    return text
+
+
+def _truncate_description(description: str) -> str:
+    """限制描述长度"""
+    if len(description) > MAX_DESCRIPTION_LENGTH:
+        description = description[:MAX_DESCRIPTION_LENGTH - 3] + '...'
+    return description
+
+
+def find_readme(project_path: Path, snapshot: Optional[TreeSnapshot] = None) -> Optional[Path]:
+    """从项目根目录的文件列表中找出 README 文件
+
+    Args:
+        project_path: 项目路径
+        snapshot: 项目目录扫描结果，None 时读取根目录列表
+
+    Returns:
+        README 路径，不存在时返回 None
+    """
+    if snapshot is not None:
+        root_record = snapshot.records.get("")
+        names = [entry[0] for entry in root_record["f"]] if root_record else []
+    else:
+        try:
+            names = [entry.name for entry in os.scandir(project_path) if entry.is_file()]
+        except OSError:
+            return None
+    
+    by_lower = {}
+    for name in sorted(names):
+        by_lower.setdefault(name.lower(), name)
+    
+    for readme_name, _ in README_FORMATS:
+        if readme_name in by_lower:
+            return project_path / by_lower[readme_name]
+    return None
+
+
+def extract_description(project_path: Path, snapshot: Optional[TreeSnapshot] = None,
+                        manifests: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
     """从项目中提取描述信息
 
-    优先从 README 文件中提取，如果没有则生成一个基本描述
+    优先从 README（Markdown、reStructuredText、AsciiDoc、Org 或纯文本）中提取第一个
+    正文段落，只读取文件开头直到取得段落为止；其次使用 pyproject.toml、package.json
+    等清单中的描述字段；都没有时生成一个基本描述。
 
     Args:
         project_path: 项目路径
+        snapshot: 项目目录扫描结果，None 时读取根目录列表
+        manifests: 已解析的清单文件，None 时按需解析根目录的清单
 
     Returns:
         项目描述
     """
     # 尝试从 README 文件中提取
-    readme_files = [
-        "README.md", "README.txt", "README", "readme.md", 
-        "Readme.md", "readme.txt", "README.markdown"
-    ]
-    
-    for readme in readme_files:
-        readme_path = project_path / readme
-        if readme_path.exists():
-            try:
-                with open(readme_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    
-                    # 尝试提取标题下的第一段作为描述
-                    lines = content.split('\n')
-                    description_lines = []
-                    
-                    # 跳过标题行
-                    start_idx = 0
-                    for i, line in enumerate(lines):
-                        if line.startswith('#') or line.startswith('==='):
-                            start_idx = i + 1
-                            break
-                    
-                    # 提取第一个非空段落
-                    current_paragraph = []
-                    for line in lines[start_idx:]:
-                        if line.strip() == '':
-                            if current_paragraph:
-                                description_lines = current_paragraph
-                                break
-                        else:
-                            current_paragraph.append(line)
-                    
-                    if description_lines:
-                        description = ' '.join(description_lines)
-                        # 清理 Markdown 标记
-                        description = re.sub(r'\[([^\]]+)\]\([^)]+\)', r'\1', description)  # 链接
-                        description = re.sub(r'[*_]{1,2}([^*_]+)[*_]{1,2}', r'\1', description)  # 粗体/斜体
-                        description = re.sub(r'`([^`]+)`', r'\1', description)  # 行内代码
-                        
-                        # 限制长度
-                        if len(description) > 500:
-                            description = description[:497] + '...'
-                        
-                        return description
-            except:
-                continue
+    readme_path = find_readme(project_path, snapshot)
+    if readme_path is not None:
+        fmt = dict(README_FORMATS).get(readme_path.name.lower(), "txt")
+        try:
+            paragraph = _first_paragraph(_iter_readme_lines(readme_path), fmt)
+            if paragraph:
+                return _truncate_description(_clean_markup(' '.join(paragraph), fmt))
+        except OSError as e:
+            logger.debug(f"读取 README 失败: {readme_path} - {str(e)}")
+    
+    # 尝试使用清单文件中的描述字段
+    for manifest_name in DESCRIPTION_MANIFESTS:
+        if manifests is not None:
+            parsed = manifests.get(manifest_name)
+        else:
+            parsed = parse_manifest(project_path / manifest_name) if (project_path / manifest_name).is_file() else None
+        if parsed and parsed.get("description"):
+            return _truncate_description(parsed["description"].strip())
     
     # 如果没有找到有效的 README，返回基本描述
     return f"位于 {project_path} 的项目"
 
 
-def get_last_modified_date(project_path: Path) -> str:
+def get_last_modified_date(project_path: Path, snapshot: Optional[TreeSnapshot] = None,
+                           budget: Optional[AnalysisBudget] = None,
+                           activity: Optional[Dict[str, Any]] = None) -> str:
     """获取项目最后修改日期
 
     Args:
         project_path: 项目路径
+        snapshot: 项目目录扫描结果，None 时现场扫描
+        budget: 分析预算
+        activity: 已获取的活跃度统计，None 时现场获取
 
     Returns:
         格式化的日期字符串
     """
-    try:
-        # 尝试从 Git 获取
-        repo = git.Repo(project_path)
-        commits = list(repo.iter_commits(max_count=1))
-        if commits:
-            last_commit_time = commits[0].committed_datetime
-            return last_commit_time.strftime("%Y-%m-%d")
-    except:
-        pass
+    # 尝试从 Git 获取
+    last_commit_time = get_last_commit_time(project_path, budget, activity)
+    if last_commit_time is not None:
+        return last_commit_time.strftime("%Y-%m-%d")
     
     # 回退到文件系统时间
-    newest_time = 0
-    for root, _, files in os.walk(project_path):
-        for file in files:
-            file_path = os.path.join(root, file)
-            try:
-                mtime = os.path.getmtime(file_path)
-                newest_time = max(newest_time, mtime)
-            except:
-                continue
+    if snapshot is None:
+        snapshot = scan_tree(project_path)
+    newest_time = snapshot.newest_mtime
     
     if newest_time > 0:
         return datetime.datetime.fromtimestamp(newest_time).strftime("%Y-%m-%d")
@@ -335,61 +744,107 @@ def get_last_modified_date(project_path: Path) -> str:
         return datetime.datetime.now().strftime("%Y-%m-%d")
 
 
-def analyze_project(project_path: Path) -> Dict[str, Any]:
+def analyze_project(project_path: Path, exclude: Iterable[str] = ()) -> ProjectInfo:
     """分析单个项目并返回分析结果
 
     Args:
         project_path: 项目路径
+        exclude: 需要跳过的相对目录路径（例如单独分析的嵌套子项目）
 
     Returns:
-        包含项目信息的字典
+        项目信息记录（兼容字典访问）
     """
     logger.info(f"分析项目: {project_path.name}")
+    budget = AnalysisBudget()
     
     try:
+        # 扫描目录树（仅一次，未变化的目录复用上次的指纹记录）
+        snapshot = scan_project_tree(project_path, exclude, budget.max_files, budget.deadline)
+        if snapshot.truncated:
+            budget.hit(snapshot.truncated)
+        
+        # 按需解析清单文件
+        manifests = get_project_manifests(project_path, snapshot)
+        
         # 检测技术栈
-        tech_stack = detect_tech_stack(project_path)
+        tech_stack = detect_tech_stack(project_path, snapshot, manifests)
         
         # 检测项目类型
-        project_type = detect_project_type(project_path, tech_stack)
+        project_type = detect_project_type(project_path, tech_stack, snapshot)
+        
+        # 统计 Git 活跃度（每个项目只获取一次，项目状态和最后修改日期共用其中的提交时间）
+        activity = get_git_activity_metrics(project_path, budget) or {}
         
         # 检测项目状态
-        status = detect_project_status(project_path)
+        status = detect_project_status(project_path, snapshot, budget, activity)
         
         # 确定项目优先级
-        priority = detect_project_priority(project_path, status)
+        priority = detect_project_priority(project_path, status, snapshot)
         
         # 提取项目描述
-        description = extract_description(project_path)
+        description = extract_description(project_path, snapshot, manifests)
+        
+        # 按字节数统计语言构成
+        languages = snapshot.language_breakdown()
         
         # 获取最后修改日期
-        last_modified = get_last_modified_date(project_path)
+        last_modified = get_last_modified_date(project_path, snapshot, budget, activity)
+        
+        # 检测未提交的更改（比对 .git/index 与目录扫描结果）
+        worktree = get_worktree_status(project_path, snapshot, budget) or {}
+        
+        # 获取稳定的项目标识（重命名或移动后用于匹配已有页面）
+        identity = get_identity(project_path, budget)
         
         # 组装项目信息
-        project_info = {
-            "name": project_path.name,
-            "path": str(project_path),
-            "tech_stack": tech_stack,
-            "project_type": project_type,
-            "status": status,
-            "priority": priority,
-            "description": description,
-            "last_modified": last_modified,
-        }
+        project_info = ProjectInfo(
+            project_path.name,
+            str(project_path),
+            identity=identity,
+            tech_stack=tech_stack,
+            project_type=project_type,
+            status=status,
+            priority=priority,
+            description=description,
+            last_modified=last_modified,
+            size_mb=round(snapshot.total_bytes / (1024 * 1024), 2),
+            file_count=snapshot.file_count,
+            code_lines=snapshot.code_lines,
+            languages=languages,
+            primary_language=primary_language(languages),
+            commits_30d=activity.get("commits_30d"),
+            commits_90d=activity.get("commits_90d"),
+            contributors_90d=activity.get("contributors_90d"),
+            branch=activity.get("branch"),
+            ahead=activity.get("ahead"),
+            behind=activity.get("behind"),
+            dirty=worktree.get("dirty"),
+            modified_files=worktree.get("modified"),
+            untracked_files=worktree.get("untracked"),
+            staged_files=worktree.get("staged"),
+            truncated=bool(budget.limits_hit),
+            limits_hit=list(budget.limits_hit),
+        )
+        
+        if budget.limits_hit:
+            # 单独记录触发预算限制的项目（main.py 中的 budget 日志）
+            logger.bind(budget=True).warning(
+                f"项目触发分析预算限制，结果为部分结果: {project_path} - {', '.join(budget.limits_hit)}"
+            )
         
+        PROJECTS_ANALYZED.inc(result="truncated" if budget.limits_hit else "ok")
         logger.info(f"完成项目分析: {project_path.name}")
         return project_info
         
     except Exception as e:
         logger.error(f"分析项目时出错: {project_path.name} - {str(e)}")
+        PROJECTS_ANALYZED.inc(result="error")
         # 返回基本信息
-        return {
-            "name": project_path.name,
-            "path": str(project_path),
-            "tech_stack": [],
-            "project_type": "未知",
-            "status": "未知",
-            "priority": "低",
-            "description": f"无法分析此项目: {str(e)}",
-            "last_modified": datetime.datetime.now().strftime("%Y-%m-%d"),
-        }
+        return ProjectInfo(
+            project_path.name,
+            str(project_path),
+            description=f"无法分析此项目: {str(e)}",
+            last_modified=datetime.datetime.now().strftime("%Y-%m-%d"),
+            truncated=bool(budget.limits_hit),
+            limits_hit=list(budget.limits_hit),
+        )
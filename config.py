@@ -5,6 +5,7 @@
 
 import os
 from pathlib import Path
+from typing import Dict, List, Any
 
 # Notion API 配置
 NOTION_API_KEY = os.environ.get("NOTION_API_KEY", "your-secret-api-key") 
@@ -13,19 +14,113 @@ NOTION_DATABASE_ID = os.environ.get("NOTION_DATABASE_ID", "your-database-id")
 # 扫描配置
 SCAN_DIR = Path("/Users/anwu/Documents/code")
 
+# 多扫描目录配置：每个目标把一个扫描目录同步到各自的 Notion 数据库
+# 未指定 api_key 时使用 NOTION_API_KEY，例如:
+# SCAN_TARGETS = [
+#     {"scan_dir": Path("/data/team-a"), "database_id": "aaaa..."},
+#     {"scan_dir": Path("/mnt/disk2/code"), "database_id": "bbbb...", "api_key": "secret_..."},
+# ]
+SCAN_TARGETS = [
+    {"scan_dir": SCAN_DIR, "database_id": NOTION_DATABASE_ID},
+]
+
+# 并发配置（同一次运行中所有扫描目标共享）
+ANALYSIS_WORKERS = 4  # 项目分析线程数
+NOTION_SYNC_WORKERS = 3  # Notion 写入线程数
+
+# Notion API 请求配置
+NOTION_RATE_LIMIT = 3.0  # 每个 API 密钥每秒请求数（Notion 平均限流为 3 次/秒）
+NOTION_MAX_RETRIES = 3  # 遇到 429 限流时的最大重试次数
+NOTION_REQUEST_TIMEOUT = 30  # 单个请求超时（秒）
+NOTION_BREAKER_FAILURES = 5  # 连续失败（连接错误、超时或 5xx）达到该次数时打开熔断器
+NOTION_BREAKER_COOLDOWN = 30  # 熔断器打开后到发送探测请求的秒数，期间的请求立即失败
+
+# 归档配置：数据库中有、本次扫描没有找到的项目（已删除或移动）会被归档
+NOTION_ARCHIVE_MISSING = False  # 是否归档找不到的项目（只归档有项目标识或本地记录的页面，不归档手动添加的行）
+NOTION_ARCHIVE_MAX_RATIO = 0.2  # 待归档页面超过已有页面的该比例时不归档（防止扫描目录未挂载时归档全部项目）
+NOTION_ARCHIVE_ALWAYS_ALLOWED = 3  # 待归档页面不超过该数量时不受比例限制
+
+# 定时运行模式：线程池、git 进程、HTTP 连接和内存中的缓存在各次运行之间复用，满足以下条件之一时回收重建
+RUNTIME_MAX_RSS_MB = 1024  # 运行结束后进程常驻内存超过该值（MB）时回收，0 表示不检查
+RUNTIME_RECYCLE_RUNS = 50  # 每运行该次数回收一次，0 表示不定期回收
+
+# 控制服务配置（定时运行模式下通过 --serve 启用）：POST /sync 触发同步，GET /status 查看状态
+CONTROL_HOST = os.environ.get("NOTION_UPDATER_HOST", "127.0.0.1")  # 监听地址（默认只允许本机访问）
+CONTROL_PORT = int(os.environ.get("NOTION_UPDATER_PORT", "8765"))  # 监听端口
+CONTROL_TOKEN = os.environ.get("NOTION_UPDATER_TOKEN", "")  # 设置后 POST 请求需要携带 Authorization: Bearer <token>
+
+# 运行指标：每次同步后写入 Prometheus 文本格式文件（例如 node_exporter 的 textfile collector 目录），为空时不写入
+METRICS_TEXTFILE = os.environ.get("NOTION_UPDATER_METRICS_FILE", "")
+
 # 日志配置
 LOG_DIR = Path(__file__).parent / "logs"
 LOG_FILE = LOG_DIR / "app.log"
+BUDGET_LOG_FILE = LOG_DIR / "budget.log"  # 记录触发分析预算限制的项目
+
+# 本地状态目录（目录指纹等跨运行缓存）
+STATE_DIR = Path(__file__).parent / ".state"
+STATE_MAX_AGE_DAYS = 90  # 超过该天数未使用的状态（已删除或移动的项目和文件）在运行结束时删除，0 表示不删除
+
+# 扫描项目时跳过的目录名（版本控制元数据）
+SCAN_IGNORE_DIRS = {".git", ".hg", ".svn"}
+
+# 语言构成统计：语言到文件扩展名的映射（按字节数计算各语言占比）
+LANGUAGE_EXTENSIONS = {
+    "Python": [".py", ".pyi", ".pyx"],
+    "JavaScript": [".js", ".jsx", ".mjs", ".cjs"],
+    "TypeScript": [".ts", ".tsx"],
+    "Vue": [".vue"],
+    "Java": [".java"],
+    "Kotlin": [".kt", ".kts"],
+    "Go": [".go"],
+    "Rust": [".rs"],
+    "C": [".c", ".h"],
+    "C++": [".cpp", ".cc", ".cxx", ".hpp", ".hh"],
+    "C#": [".cs"],
+    "PHP": [".php"],
+    "Ruby": [".rb"],
+    "Swift": [".swift"],
+    "Dart": [".dart"],
+    "R": [".r", ".rmd"],
+    "Shell": [".sh", ".bash", ".zsh"],
+    "HTML": [".html", ".htm"],
+    "CSS": [".css", ".scss", ".sass", ".less"],
+    "SQL": [".sql"],
+    "Jupyter Notebook": [".ipynb"],
+}
+
+# 统计代码行数的文件扩展名
+CODE_EXTENSIONS = {
+    ".py", ".js", ".jsx", ".ts", ".tsx", ".vue", ".html", ".css", ".scss",
+    ".java", ".kt", ".c", ".cpp", ".h", ".hpp", ".cs", ".go", ".rs", ".rb",
+    ".php", ".swift", ".dart", ".r", ".sh", ".bash", ".zsh", ".sql",
+}
+CODE_MAX_FILE_BYTES = 20 * 1024 * 1024  # 超过此大小的文件（通常是生成文件）不统计行数
+
+# 项目发现配置
+PROJECT_DISCOVERY_DEPTH = 3  # 从扫描目录向下查找项目根目录的最大层数（1 表示只看直接子目录）
+PROJECT_DISCOVERY_WORKERS = 8  # 并行遍历顶层目录的线程数
 
-# 确保日志目录存在
-LOG_DIR.mkdir(exist_ok=True)
+# 识别项目根目录的标记文件/目录
+PROJECT_ROOT_MARKERS = [
+    ".git", "package.json", "pyproject.toml", "setup.py", "go.mod", "Cargo.toml",
+    "pom.xml", "build.gradle", "build.gradle.kts", "composer.json", "Gemfile",
+    "Package.swift", "pubspec.yaml", "CMakeLists.txt",
+]
+
+# 查找项目时不再向下深入的目录（依赖、构建产物等）
+DISCOVERY_PRUNE_DIRS = {
+    "node_modules", "vendor", "venv", ".venv", "env", "__pycache__",
+    "dist", "build", "target", "out", "site-packages",
+}
 
 # 技术栈检测配置
+# 以 "." 开头的标记匹配文件扩展名，其余标记匹配文件名或目录名（不区分大小写）
 TECH_STACK_MARKERS = {
     "Python": [".py", "requirements.txt", "setup.py", "Pipfile", "poetry.lock", "pyproject.toml"],
     "JavaScript": [".js", "package.json", ".jsx", ".ts", ".tsx"],
-    "React": ["react", ".jsx", ".tsx"],
-    "Vue": ["vue", ".vue"],
+    "React": [".jsx", ".tsx"],
+    "Vue": [".vue"],
     "Node.js": ["package.json", "node_modules"],
     "Go": [".go", "go.mod", "go.sum"],
     "Rust": [".rs", "Cargo.toml"],
@@ -42,6 +137,48 @@ TECH_STACK_MARKERS = {
     "C#": [".cs", ".csproj", ".sln"],
     "HTML/CSS": [".html", ".htm", ".css"],
     "Jupyter": [".ipynb"],
+    "Docker": ["docker-compose.yml", "docker-compose.yaml", "compose.yaml"],
+}
+
+# 无扩展名的可执行脚本按 shebang 中的解释器识别技术栈（解释器名称去掉版本号后匹配）
+SHEBANG_TECH_MARKERS = {
+    "python": ["Python"],
+    "pypy": ["Python"],
+    "bash": ["Shell"],
+    "sh": ["Shell"],
+    "zsh": ["Shell"],
+    "dash": ["Shell"],
+    "ksh": ["Shell"],
+    "node": ["JavaScript", "Node.js"],
+    "nodejs": ["JavaScript", "Node.js"],
+    "deno": ["TypeScript"],
+    "ts-node": ["TypeScript", "Node.js"],
+    "ruby": ["Ruby"],
+    "php": ["PHP"],
+    "perl": ["Perl"],
+    "rscript": ["R"],
+}
+
+# 文件名（小写）以这些前缀开头或以这些后缀结尾时视为 Dockerfile（如 Dockerfile.dev、app.dockerfile）
+DOCKERFILE_PREFIXES = ("dockerfile", "containerfile")
+DOCKERFILE_SUFFIXES = (".dockerfile", ".containerfile")
+
+SHEBANG_READ_BYTES = 256  # 每个脚本最多读取的字节数
+SHEBANG_MAX_FILES = 64  # 每个项目最多检查的无扩展名文件数
+
+# 依赖名称到技术栈的映射（来自 package.json、pyproject.toml 等清单文件中的真实依赖）
+DEPENDENCY_TECH_MARKERS = {
+    "React": ["react", "react-dom", "next"],
+    "React Native": ["react-native"],
+    "Vue": ["vue", "nuxt"],
+    "Angular": ["@angular/core"],
+    "Express": ["express"],
+    "TypeScript": ["typescript"],
+    "Flask": ["flask"],
+    "Django": ["django"],
+    "FastAPI": ["fastapi"],
+    "TensorFlow": ["tensorflow", "tensorflow-cpu", "tensorflow-gpu"],
+    "PyTorch": ["torch"],
 }
 
 # 项目类型检测配置
@@ -62,6 +199,21 @@ PROJECT_TYPE_MARKERS = {
 GIT_ACTIVE_THRESHOLD_DAYS = 30  # 30天内有提交视为活跃项目
 GIT_MAINTENANCE_THRESHOLD_DAYS = 180  # 180天内有提交视为维护中项目
 # 超过180天没有提交视为暂停项目
+GIT_ACTIVITY_WINDOW_DAYS = 90  # 提交数和贡献者的统计窗口（天）
+GIT_ACTIVITY_RECENT_DAYS = 30  # 近期提交数的统计窗口（天）
+
+# 单个项目的分析预算，超出时返回部分结果并标记为截断（0 表示不限制）
+PROJECT_MAX_SECONDS = 120  # 单个项目的分析时间上限（秒）
+PROJECT_MAX_FILES = 200000  # 单个项目最多扫描的文件数
+GIT_TIMEOUT_SECONDS = 15  # 单次 git 子进程的超时时间（秒）
+
+# 工作区状态检测：索引中的 stat 信息无法判断时需要比对内容哈希，超过以下限制时回退到 git status
+DIRTY_HASH_MAX_FILES = 200  # 最多比对内容的文件数
+DIRTY_HASH_MAX_BYTES = 64 * 1024 * 1024  # 最多比对内容的总字节数
+
+# 常驻 git 进程池（git cat-file --batch）
+GIT_POOL_MAX_WORKERS = 16  # 最多保留的空闲进程数（每个仓库一个）
+GIT_POOL_IDLE_SECONDS = 60  # 空闲超过该时间的进程会被关闭
 
 # 默认优先级策略（基于最后修改时间）
 PRIORITY_THRESHOLDS = {
@@ -69,3 +221,19 @@ PRIORITY_THRESHOLDS = {
     "中": 90,   # 90天内修改过为中优先级
     "低": float('inf')  # 其他为低优先级
 }
+
+
+def get_scan_targets() -> List[Dict[str, Any]]:
+    """返回规范化的扫描目标列表
+
+    Returns:
+        扫描目标列表，每项包含 scan_dir (Path)、database_id 和 api_key
+    """
+    return [
+        {
+            "scan_dir": Path(target["scan_dir"]),
+            "database_id": target["database_id"],
+            "api_key": target.get("api_key") or NOTION_API_KEY,
+        }
+        for target in SCAN_TARGETS
+    ]
@@ -0,0 +1,244 @@
+"""
+控制服务模块，在定时运行模式下提供触发同步和查询状态的 HTTP 接口
+
+- ``POST /sync``：排队一次全量同步；请求体为 ``{"projects": [...]}`` 时只同步这些项目
+- ``POST /sync/{project}``：排队同步单个项目（扫描目录下的相对路径，例如 post-receive 钩子中的仓库名）
+- ``GET /status``：队列深度、正在执行和上一次运行的阶段耗时、Notion 限流器状态
+- ``GET /metrics``：Prometheus 文本格式的运行指标
+
+同步任务由单个工作线程依次执行，定时任务也通过同一队列执行，不会与触发的同步重叠。
+排队中的指定项目合并为一次同步；已有全量同步排队时，指定项目的请求并入全量同步。
+"""
+
+import hmac
+import json
+import time
+import datetime
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import unquote, urlsplit
+from loguru import logger
+
+from notion_client import get_limiter_status
+from metrics import CONTENT_TYPE, render
+
+
+class SyncQueue:
+    """同步任务队列，由单个后台工作线程依次执行"""
+
+    def __init__(self, run_full: Callable[[], Optional[Dict[str, Any]]],
+                 run_projects: Callable[[List[Path]], Optional[Dict[str, Any]]]):
+        """初始化队列并启动工作线程
+
+        Args:
+            run_full: 执行全量同步的函数，返回运行摘要（阶段耗时和同步结果）
+            run_projects: 只同步指定项目的函数，返回运行摘要
+        """
+        self.run_full = run_full
+        self.run_projects = run_projects
+        self.running: Optional[Dict[str, Any]] = None
+        self.last_run: Optional[Dict[str, Any]] = None
+        self._full = False
+        self._projects: Dict[Path, None] = {}
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._worker, name="sync-queue", daemon=True)
+        self._thread.start()
+
+    def submit(self, projects: Optional[List[Path]] = None) -> int:
+        """排队一次同步
+
+        Args:
+            projects: 只同步这些项目，None 表示全量同步
+
+        Returns:
+            排队后的队列深度
+        """
+        with self._cond:
+            if projects is None:
+                self._full = True
+            else:
+                self._projects.update(dict.fromkeys(projects))
+            self._cond.notify()
+            return self._depth()
+
+    def depth(self) -> int:
+        """返回排队中的任务数（全量同步计为 1，指定项目按项目计）"""
+        with self._cond:
+            return self._depth()
+
+    def _depth(self) -> int:
+        """计算队列深度（调用方需持有锁）"""
+        return (1 if self._full else 0) + len(self._projects)
+
+    def status(self) -> Dict[str, Any]:
+        """返回队列状态"""
+        with self._cond:
+            return {"queue_depth": self._depth(), "running": self.running, "last_run": self.last_run}
+
+    def _worker(self) -> None:
+        """依次执行排队的同步"""
+        while True:
+            with self._cond:
+                while not self._full and not self._projects:
+                    self._cond.wait()
+                # 全量同步包含所有指定项目
+                projects = None if self._full else list(self._projects)
+                self._full = False
+                self._projects = {}
+                self.running = {
+                    "kind": "full" if projects is None else "projects",
+                    "projects": [str(path) for path in projects or []],
+                    "started": datetime.datetime.now().isoformat(timespec="seconds"),
+                }
+            self._execute(projects)
+
+    def _execute(self, projects: Optional[List[Path]]) -> None:
+        """执行一次同步并记录结果"""
+        run = dict(self.running)
+        start = time.monotonic()
+        try:
+            summary = self.run_full() if projects is None else self.run_projects(projects)
+            run.update(summary or {})
+        except Exception as e:
+            logger.error(f"同步任务执行出错: {str(e)}")
+            run["error"] = str(e)
+        run["duration"] = round(time.monotonic() - start, 3)
+        with self._cond:
+            self.running = None
+            self.last_run = run
+
+
+class ControlServer:
+    """在后台线程中运行的控制服务"""
+
+    def __init__(self, sync_queue: SyncQueue, resolve_project: Callable[[str], Optional[Path]],
+                 host: str, port: int, token: str = ""):
+        """初始化控制服务（调用 start 后开始监听）
+
+        Args:
+            sync_queue: 同步任务队列
+            resolve_project: 把请求中的项目名称解析为项目路径的函数，找不到时返回 None
+            host: 监听地址
+            port: 监听端口（0 表示随机端口）
+            token: POST 请求需要携带的令牌，为空时不校验
+        """
+        self.sync_queue = sync_queue
+        self.resolve_project = resolve_project
+        self.token = token
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="control-server", daemon=True)
+
+    @property
+    def address(self) -> str:
+        """实际监听的地址"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> None:
+        """开始在后台线程中处理请求"""
+        self._thread.start()
+        logger.info(f"控制服务已启动: {self.address}")
+
+    def close(self) -> None:
+        """停止控制服务"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def status(self) -> Dict[str, Any]:
+        """返回 GET /status 的响应内容"""
+        return dict(self.sync_queue.status(), notion=get_limiter_status())
+
+    def _handler_class(self):
+        """创建绑定到当前服务的请求处理类"""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """控制服务的请求处理类"""
+
+            def log_message(self, format: str, *args: Any) -> None:
+                """把访问日志写入 loguru"""
+                logger.debug(f"控制服务请求: {self.address_string()} - {format % args}")
+
+            def _reply(self, code: int, data: Dict[str, Any]) -> None:
+                """返回 JSON 响应"""
+                body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self) -> None:
+                """处理状态和指标查询"""
+                path = urlsplit(self.path).path.rstrip("/")
+                if path == "/status":
+                    self._reply(200, server.status())
+                elif path == "/metrics":
+                    body = render().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", CONTENT_TYPE)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                else:
+                    self._reply(404, {"error": "not found"})
+
+            def do_POST(self) -> None:
+                """处理同步请求"""
+                path = urlsplit(self.path).path.rstrip("/")
+                if path != "/sync" and not path.startswith("/sync/"):
+                    self._reply(404, {"error": "not found"})
+                    return
+                if server.token:
+                    expected = f"Bearer {server.token}".encode("utf-8")
+                    if not hmac.compare_digest(self.headers.get("Authorization", "").encode("utf-8"), expected):
+                        self._reply(401, {"error": "unauthorized"})
+                        return
+
+                try:
+                    names = self._requested_projects(path)
+                except ValueError as e:
+                    self._reply(400, {"error": str(e)})
+                    return
+
+                projects = None
+                if names is not None:
+                    projects = []
+                    for name in names:
+                        project_path = server.resolve_project(name)
+                        if project_path is None:
+                            self._reply(404, {"error": f"project not found: {name}"})
+                            return
+                        projects.append(project_path)
+
+                depth = server.sync_queue.submit(projects)
+                logger.info(f"收到同步请求: {'全部项目' if projects is None else ', '.join(names)}")
+                self._reply(202, {"queued": "full" if projects is None else [str(p) for p in projects],
+                                  "queue_depth": depth})
+
+            def _requested_projects(self, path: str) -> Optional[List[str]]:
+                """解析请求的项目名称，None 表示全量同步
+
+                Raises:
+                    ValueError: 请求体格式错误
+                """
+                if path.startswith("/sync/"):
+                    return [unquote(path[len("/sync/"):])]
+                length = int(self.headers.get("Content-Length") or 0)
+                if not length:
+                    return None
+                try:
+                    data = json.loads(self.rfile.read(length))
+                except json.JSONDecodeError:
+                    raise ValueError("invalid JSON body")
+                projects = data.get("projects") if isinstance(data, dict) else None
+                if projects is None:
+                    return None
+                if not isinstance(projects, list) or not projects or not all(isinstance(p, str) for p in projects):
+                    raise ValueError("projects must be a non-empty list of strings")
+                return projects
+
+        return Handler
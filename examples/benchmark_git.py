@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Notion 项目更新器 - Git 查询性能对比
+
+这个示例对比了每次查询都启动 git 进程的 GitPython 调用（分析器原来的实现）
+与常驻 git cat-file 进程池（git_pool）在相同查询下的耗时。
+
+用法：
+    python examples/benchmark_git.py [仓库路径 ...] [--rounds N]
+
+不指定仓库时使用配置的扫描目录下的所有 Git 仓库。
+"""
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import git
+from rich.console import Console
+from rich.table import Table
+
+# 确保可以导入主模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import SCAN_DIR
+from analyzer import get_projects
+from git_activity import find_git_dir, read_head
+from git_pool import GitWorkerPool
+
+
+def gitpython_queries(repo_path: Path, head: str, base: str) -> int:
+    """使用 GitPython 执行一组查询（每个查询一个 git 进程）
+
+    与分析器原来的调用相同：状态检测和最后修改日期各读取一次最近提交，
+    再加上新提交、祖先判断和领先/落后统计。
+
+    Returns:
+        读到的提交数
+    """
+    repo = git.Repo(repo_path)
+    try:
+        commits = list(repo.iter_commits(max_count=5))
+        commits += list(repo.iter_commits(max_count=5))
+        commits += list(repo.iter_commits(f"{base}..{head}"))
+        repo.git.merge_base("--is-ancestor", base, head)
+        repo.git.rev_list("--left-right", "--count", f"{head}...{base}")
+        return len(commits)
+    finally:
+        repo.close()
+
+
+def pool_queries(pool: GitWorkerPool, repo_path: Path, head: str, base: str) -> int:
+    """使用常驻进程池执行同样的查询
+
+    Returns:
+        读到的提交数
+    """
+    pool.read_commit(repo_path, head)
+    pool.read_commit(repo_path, head)
+    walk = pool.walk(repo_path, [head], [base])
+    _ = base in walk.boundary
+    pool.count(repo_path, head, base)
+    pool.count(repo_path, base, head)
+    return len(walk.commits) + 2
+
+
+def main():
+    """运行性能对比"""
+    parser = argparse.ArgumentParser(description="对比 GitPython 与常驻 git 进程池的查询耗时")
+    parser.add_argument("repos", nargs="*", type=Path, help="Git 仓库路径")
+    parser.add_argument("--rounds", type=int, default=3, help="每种方式重复的轮数")
+    args = parser.parse_args()
+
+    console = Console()
+    repos = []
+    for repo_path in args.repos or get_projects(SCAN_DIR):
+        git_dir = find_git_dir(repo_path)
+        head = read_head(git_dir)[0] if git_dir else None
+        if head is None:
+            continue
+        # 以 10 个提交之前的位置模拟上次缓存的 HEAD
+        try:
+            base = git.Repo(repo_path).git.rev_parse(f"{head}~10")
+        except git.GitCommandError:
+            base = head
+        repos.append((repo_path, head, base))
+
+    if not repos:
+        console.print("[bold red]没有找到可用的 Git 仓库[/bold red]")
+        return
+
+    console.print(f"对 {len(repos)} 个仓库各执行 {args.rounds} 轮查询...")
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for repo_path, head, base in repos:
+            gitpython_queries(repo_path, head, base)
+    gitpython_seconds = time.perf_counter() - start
+
+    pool = GitWorkerPool()
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for repo_path, head, base in repos:
+            pool_queries(pool, repo_path, head, base)
+    pool_seconds = time.perf_counter() - start
+    spawned = pool.spawned
+    pool.close()
+
+    table = Table(title="Git 查询耗时对比")
+    table.add_column("方式", style="cyan")
+    table.add_column("总耗时（秒）", style="magenta")
+    table.add_column("每仓库每轮（毫秒）", style="magenta")
+    table.add_column("启动的 git 进程数", style="magenta")
+    per_repo = len(repos) * args.rounds
+    table.add_row("GitPython（每次查询一个进程）", f"{gitpython_seconds:.3f}",
+                  f"{gitpython_seconds / per_repo * 1000:.1f}", str(per_repo * 5))
+    table.add_row("常驻 cat-file 进程池", f"{pool_seconds:.3f}",
+                  f"{pool_seconds / per_repo * 1000:.1f}", str(spawned))
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
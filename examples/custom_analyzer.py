@@ -33,41 +33,14 @@ def custom_project_analyzer(project_path):
     # 先使用标准分析器获取基本信息
     project_info = analyze_project(project_path)
     
-    # 添加自定义信息
-    
-    # 1. 计算项目大小（MB）
-    total_size = 0
-    for root, dirs, files in os.walk(project_path):
-        for file in files:
-            file_path = os.path.join(root, file)
-            try:
-                total_size += os.path.getsize(file_path)
-            except:
-                pass
-    
-    project_info['size_mb'] = round(total_size / (1024 * 1024), 2)
-    
-    # 2. 计算文件数量
-    file_count = sum(len(files) for _, _, files in os.walk(project_path))
-    project_info['file_count'] = file_count
+    # 项目大小（size_mb）、文件数量（file_count）和代码行数（code_lines）
+    # 已由标准分析器在同一次目录遍历中统计，这里直接使用
+    file_count = project_info.get('file_count', 0)
+    line_count = project_info.get('code_lines', 0)
     
-    # 3. 计算代码行数（简易版，仅计算部分文件类型）
-    code_extensions = ['.py', '.js', '.jsx', '.ts', '.tsx', '.html', '.css', '.java', '.c', '.cpp', '.go', '.rs']
-    line_count = 0
-    
-    for root, _, files in os.walk(project_path):
-        for file in files:
-            if any(file.endswith(ext) for ext in code_extensions):
-                file_path = os.path.join(root, file)
-                try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        line_count += len(f.readlines())
-                except:
-                    pass
-    
-    project_info['code_lines'] = line_count
+    # 添加自定义信息
     
-    # 4. 定制项目复杂度评分 (0-100)
+    # 定制项目复杂度评分 (0-100)
     # 简单算法: 基于文件数、代码行数和技术栈数量
     complexity = min(100, (
         (file_count / 100) * 20 +  # 文件数贡献
@@ -106,20 +79,20 @@ def main():
         print(f"  状态: {info['status']}")
         
         # 打印自定义分析结果
-        print(f"  项目大小: {info['size_mb']} MB")
-        print(f"  文件数量: {info['file_count']}")
-        print(f"  代码行数: {info['code_lines']}")
+        print(f"  项目大小: {info.get('size_mb', 0)} MB")
+        print(f"  文件数量: {info.get('file_count', 0)}")
+        print(f"  代码行数: {info.get('code_lines', 0)}")
         print(f"  复杂度评分: {info['complexity']}/100")
         print()
     
     # 询问是否同步到 Notion
     print("注意: 要将自定义字段同步到 Notion，你需要在 Notion 数据库中添加对应的字段")
-    print("      比如 '项目大小'、'文件数量'、'代码行数'、'复杂度评分' 等")
+    print("      比如 '复杂度评分'（'项目大小'、'文件数量'、'代码行数' 已由标准同步处理）")
     
     answer = input("是否将这些项目同步到 Notion? (y/n): ")
     if answer.lower() == 'y':
         print("正在同步到 Notion...")
-        # 注意：如要同步自定义字段，你需要修改 notion_client.py 中的 _build_properties 方法
+        # 注意：如要同步复杂度评分等自定义字段，你需要修改 notion_client.py 中的 _build_properties 方法
         result = sync_projects(project_info_list)
         print(f"同步完成! 创建: {result['created']}, 更新: {result['updated']}, 失败: {result['failed']}")
     else:
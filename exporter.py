@@ -0,0 +1,122 @@
+"""
+导出模块，把分析结果逐条写入 JSON Lines 或 CSV 文件
+
+结果先写入同目录下的临时文件，每条写入后立即刷新缓冲区；全部写完后 fsync 并原子重命名为目标文件，
+中途失败时目标文件保持不变。
+"""
+
+import os
+import csv
+import json
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+from loguru import logger
+
+from project_info import FIELDS, ProjectInfo
+
+# 支持的导出格式（按文件扩展名识别）
+EXPORT_FORMATS = {".jsonl": "jsonl", ".csv": "csv"}
+
+
+def _csv_value(key: str, value: Any) -> Any:
+    """把字段值转换为 CSV 单元格内容"""
+    if value is None:
+        return ""
+    if key in ("tech_stack", "limits_hit"):
+        return ", ".join(value)
+    if key == "languages":
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+class ProjectExporter:
+    """流式导出分析结果
+
+    用法::
+
+        with ProjectExporter(Path("projects.jsonl")) as exporter:
+            for info in results:
+                exporter.write(info)
+    """
+
+    def __init__(self, path: Path):
+        """初始化导出器
+
+        Args:
+            path: 导出文件路径，格式由扩展名决定（.jsonl 或 .csv）
+
+        Raises:
+            ValueError: 不支持的扩展名
+        """
+        self.path = Path(path)
+        self.format = EXPORT_FORMATS.get(self.path.suffix.lower())
+        if self.format is None:
+            raise ValueError(f"不支持的导出格式: {self.path.suffix}（支持 {', '.join(EXPORT_FORMATS)}）")
+        self.count = 0
+        self._file = None
+        self._tmp_path: Optional[str] = None
+        self._writer = None
+
+    def open(self) -> None:
+        """在目标目录下创建临时文件"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(prefix=f".{self.path.name}.", suffix=".tmp", dir=self.path.parent)
+        self._file = os.fdopen(fd, "w", encoding="utf-8", newline="")
+        if self.format == "csv":
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(FIELDS)
+
+    def write(self, info: Union[ProjectInfo, Dict[str, Any]]) -> None:
+        """写入一个项目的分析结果
+
+        Args:
+            info: 项目信息
+        """
+        if self.format == "jsonl":
+            data = info.to_dict() if isinstance(info, ProjectInfo) else info
+            self._file.write(json.dumps(data, ensure_ascii=False) + "\n")
+        else:
+            self._writer.writerow([_csv_value(key, info.get(key)) for key in FIELDS])
+        self._file.flush()
+        self.count += 1
+
+    def commit(self) -> None:
+        """fsync 临时文件并原子替换目标文件"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+        self._tmp_path = None
+        # 同步目录项，保证重命名本身落盘（部分平台不支持打开目录）
+        try:
+            dir_fd = os.open(self.path.parent, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(dir_fd)
+        except OSError:
+            pass
+        finally:
+            os.close(dir_fd)
+
+    def abort(self) -> None:
+        """关闭并删除临时文件"""
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+        if self._tmp_path is not None:
+            try:
+                os.unlink(self._tmp_path)
+            except OSError as e:
+                logger.warning(f"删除临时导出文件失败: {self._tmp_path} - {str(e)}")
+            self._tmp_path = None
+
+    def __enter__(self) -> "ProjectExporter":
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
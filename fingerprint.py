@@ -0,0 +1,430 @@
+"""
+目录指纹模块，为项目目录树维护持久化的 Merkle 指纹，跨运行复用未变化目录的扫描结果
+"""
+
+import os
+import json
+import stat
+import time
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Iterable, Iterator, Sequence, Set, Tuple
+from loguru import logger
+
+from config import STATE_DIR, SCAN_IGNORE_DIRS, CODE_EXTENSIONS, CODE_MAX_FILE_BYTES
+from languages import language_id, new_id_array, new_size_array, language_breakdown
+from metrics import CACHE_REQUESTS, FILES_VISITED, WALK_DURATION
+
+# 指纹树存放目录（每个项目一个 JSON 文件）
+TREE_STATE_DIR = STATE_DIR / "trees"
+
+# 指纹文件格式版本，记录结构变化时递增以丢弃旧数据
+TREE_FORMAT_VERSION = 2
+
+# 统计行数时每次读取的字节数
+LINE_COUNT_CHUNK = 1024 * 1024
+
+# 目录记录中各字段的键名（保持 JSON 紧凑）
+#   m: 目录自身 mtime（纳秒）
+#   n: 子项数量
+#   h: 汇总哈希（自身文件 + 子目录哈希）
+#   f: 自身文件列表 [[名称, 大小, mtime 纳秒, 代码行数], ...]（非代码文件行数为 0）
+#   d: 子目录名称列表
+#   a: 子树汇总 [文件数, 字节数, 最新 mtime 纳秒, 代码行数]
+
+
+class TreeSnapshot:
+    """一次目录扫描的结果，包含每个目录的指纹记录"""
+
+    def __init__(self, root: Path, records: Dict[str, Dict[str, Any]],
+                 dirs_read: int = 0, dirs_reused: int = 0,
+                 truncated: Optional[str] = None,
+                 language_ids: Optional[Sequence[int]] = None,
+                 language_sizes: Optional[Sequence[int]] = None,
+                 fresh_dirs: Optional[Set[str]] = None):
+        """初始化扫描结果
+
+        Args:
+            root: 项目根目录
+            records: 相对目录路径（根目录为空字符串）到目录记录的映射
+            dirs_read: 本次实际读取列表的目录数
+            dirs_reused: 复用上次列表的目录数
+            truncated: 扫描因预算提前结束时的原因（"files" 或 "time"），完整扫描为 None
+            language_ids: 遍历时记录的每个文件的语言 ID
+            language_sizes: 与 language_ids 对应的文件字节数
+            fresh_dirs: 本次扫描过的目录（其中的文件记录都是本次 stat 的结果）
+        """
+        self.root = root
+        self.records = records
+        self.dirs_read = dirs_read
+        self.dirs_reused = dirs_reused
+        self.truncated = truncated
+        self.language_ids = language_ids if language_ids is not None else new_id_array()
+        self.language_sizes = language_sizes if language_sizes is not None else new_size_array()
+        self.fresh_dirs = fresh_dirs if fresh_dirs is not None else set(records)
+
+    @property
+    def root_hash(self) -> str:
+        """整个项目树的汇总哈希"""
+        record = self.records.get("")
+        return record["h"] if record else ""
+
+    @property
+    def file_count(self) -> int:
+        """项目中的文件总数"""
+        record = self.records.get("")
+        return record["a"][0] if record else 0
+
+    @property
+    def total_bytes(self) -> int:
+        """项目中文件的总字节数"""
+        record = self.records.get("")
+        return record["a"][1] if record else 0
+
+    @property
+    def code_lines(self) -> int:
+        """项目中代码文件的总行数"""
+        record = self.records.get("")
+        return record["a"][3] if record else 0
+
+    @property
+    def newest_mtime(self) -> float:
+        """项目中最新的文件修改时间（秒），没有文件时为 0"""
+        record = self.records.get("")
+        return record["a"][2] / 1e9 if record else 0
+
+    def language_breakdown(self) -> Dict[str, float]:
+        """各语言按字节数的占比，从高到低排列"""
+        return language_breakdown(self.language_ids, self.language_sizes)
+
+    def iter_files(self) -> Iterator[Tuple[str, List[Any]]]:
+        """遍历项目中的所有文件
+
+        Yields:
+            (相对文件路径, 文件记录) 元组
+        """
+        for rel_dir, record in self.records.items():
+            for entry in record["f"]:
+                yield (os.path.join(rel_dir, entry[0]) if rel_dir else entry[0]), entry
+
+    def iter_dirs(self) -> Iterator[str]:
+        """遍历项目中的所有子目录（不含根目录）
+
+        Yields:
+            相对目录路径
+        """
+        for rel_dir in self.records:
+            if rel_dir:
+                yield rel_dir
+
+
+def count_lines(path: str) -> int:
+    """按块读取二进制内容统计行数，不做文本解码
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        行数（最后一行没有换行符时也计入），读取失败时为 0
+    """
+    lines = 0
+    last = b"\n"
+    try:
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(LINE_COUNT_CHUNK)
+                if not chunk:
+                    break
+                lines += chunk.count(b"\n")
+                last = chunk[-1:]
+    except OSError:
+        return 0
+    return lines + (0 if last == b"\n" else 1)
+
+
+def _is_code_file(name: str, size: int) -> bool:
+    """是否需要统计行数的代码文件"""
+    return size <= CODE_MAX_FILE_BYTES and os.path.splitext(name)[1].lower() in CODE_EXTENSIONS
+
+
+def _config_key(exclude: Iterable[str]) -> str:
+    """计算影响目录列表的扫描配置指纹，配置变化时旧记录失效"""
+    parts = [str(TREE_FORMAT_VERSION)]
+    parts.extend(sorted(SCAN_IGNORE_DIRS))
+    parts.append("|")
+    parts.extend(sorted(CODE_EXTENSIONS))
+    parts.append("|")
+    parts.extend(sorted(exclude))
+    return hashlib.sha1("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def scan_tree(root: Path, previous: Optional[Dict[str, Dict[str, Any]]] = None,
+              exclude: Iterable[str] = (), max_files: Optional[int] = None,
+              deadline: Optional[float] = None) -> TreeSnapshot:
+    """扫描项目目录树并计算每个目录的 Merkle 指纹
+
+    自身 mtime 与上次记录一致的目录直接复用上次的文件和子目录列表，不再读取目录。
+    目录的 mtime 只反映其直接子项的增删改名，原地修改文件不会改变它，因此列表中的
+    每个文件和子目录仍会 stat 一次，文件大小和时间戳总是本次的结果。
+
+    代码文件的行数在同一次遍历中统计，大小和 mtime 未变化的文件沿用上次的行数。
+
+    超过文件数或时间预算时停止扫描，返回已扫描部分并标记为截断。
+
+    Args:
+        root: 项目根目录
+        previous: 上次扫描得到的目录记录，None 表示全量扫描
+        exclude: 需要跳过的相对目录路径（例如嵌套的子项目）
+        max_files: 最多扫描的文件数，None 表示不限制
+        deadline: 扫描截止时间（time.monotonic() 时间戳），None 表示不限制
+
+    Returns:
+        扫描结果
+    """
+    previous = previous or {}
+    excluded = set(exclude)
+    records: Dict[str, Dict[str, Any]] = {}
+    counters = {"read": 0, "reused": 0, "files": 0}
+    truncated: List[Optional[str]] = [None]
+    # 每个文件的语言 ID 和字节数，遍历结束后一次性按 ID 汇总
+    language_ids = new_id_array()
+    language_sizes = new_size_array()
+    fresh_dirs: Set[str] = set()
+
+    def is_skipped(rel_path: str, name: str) -> bool:
+        return name in SCAN_IGNORE_DIRS or rel_path in excluded
+
+    def over_budget() -> bool:
+        if truncated[0] is None:
+            if max_files is not None and counters["files"] >= max_files:
+                truncated[0] = "files"
+            elif deadline is not None and time.monotonic() >= deadline:
+                truncated[0] = "time"
+        return truncated[0] is not None
+
+    def file_record(name: str, path: str, st: os.stat_result, old: Optional[List[Any]]) -> List[Any]:
+        lines = 0
+        if _is_code_file(name, st.st_size):
+            if old is not None and old[1] == st.st_size and old[2] == st.st_mtime_ns:
+                lines = old[3]
+            else:
+                lines = count_lines(path)
+        return [name, st.st_size, st.st_mtime_ns, lines]
+
+    def visit(rel_dir: str, abs_dir: str, mtime_ns: int) -> Dict[str, Any]:
+        prev = previous.get(rel_dir)
+        subdirs: List[Tuple[str, int]] = []
+        fresh_dirs.add(rel_dir)
+
+        if prev is not None and prev["m"] == mtime_ns:
+            # 目录列表未变化，复用列表但重新 stat 每个文件（原地修改不会改变目录 mtime）
+            counters["reused"] += 1
+            files = []
+            for old in prev["f"]:
+                path = os.path.join(abs_dir, old[0])
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append(file_record(old[0], path, st, old))
+            counters["files"] += len(files)
+            for name in prev["d"]:
+                child_rel = os.path.join(rel_dir, name) if rel_dir else name
+                if is_skipped(child_rel, name):
+                    continue
+                try:
+                    st = os.stat(os.path.join(abs_dir, name), follow_symlinks=False)
+                except OSError:
+                    continue
+                if stat.S_ISDIR(st.st_mode):
+                    subdirs.append((name, st.st_mtime_ns))
+        else:
+            counters["read"] += 1
+            files = []
+            prev_files = {entry[0]: entry for entry in prev["f"]} if prev is not None else {}
+            try:
+                with os.scandir(abs_dir) as it:
+                    for entry in it:
+                        # 单个目录可能包含海量文件，逐项检查预算
+                        if over_budget():
+                            break
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                child_rel = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                                if not is_skipped(child_rel, entry.name):
+                                    subdirs.append((entry.name, entry.stat(follow_symlinks=False).st_mtime_ns))
+                            elif entry.is_file():
+                                files.append(file_record(entry.name, entry.path, entry.stat(),
+                                                         prev_files.get(entry.name)))
+                                counters["files"] += 1
+                        except OSError:
+                            continue
+            except OSError as e:
+                logger.debug(f"无法读取目录: {abs_dir} - {str(e)}")
+            files.sort(key=lambda item: item[0])
+
+        subdirs.sort()
+        digest = hashlib.sha1()
+        file_count = len(files)
+        total_bytes = 0
+        newest = 0
+        code_lines = 0
+        for entry in files:
+            digest.update(f"{entry[0]}\0{entry[1]}\0{entry[2]}\n".encode("utf-8", "surrogateescape"))
+            total_bytes += entry[1]
+            code_lines += entry[3]
+            lang_id = language_id(entry[0])
+            if lang_id:
+                language_ids.append(lang_id)
+                language_sizes.append(entry[1])
+            if entry[2] > newest:
+                newest = entry[2]
+
+        for name, child_mtime in subdirs:
+            if over_budget():
+                break
+            child_rel = os.path.join(rel_dir, name) if rel_dir else name
+            child = visit(child_rel, os.path.join(abs_dir, name), child_mtime)
+            digest.update(f"{name}/\0{child['h']}\n".encode("utf-8", "surrogateescape"))
+            file_count += child["a"][0]
+            total_bytes += child["a"][1]
+            newest = max(newest, child["a"][2])
+            code_lines += child["a"][3]
+
+        record = {
+            "m": mtime_ns,
+            "n": len(files) + len(subdirs),
+            "h": digest.hexdigest(),
+            "f": files,
+            "d": [name for name, _ in subdirs],
+            "a": [file_count, total_bytes, newest, code_lines],
+        }
+        records[rel_dir] = record
+        return record
+
+    try:
+        root_mtime = os.stat(root).st_mtime_ns
+    except OSError as e:
+        logger.error(f"无法访问项目目录: {root} - {str(e)}")
+        return TreeSnapshot(root, {})
+
+    visit("", str(root), root_mtime)
+    return TreeSnapshot(root, records, counters["read"], counters["reused"], truncated[0],
+                        language_ids, language_sizes, fresh_dirs)
+
+
+def _tree_state_path(project_path: Path) -> Path:
+    """项目指纹文件路径"""
+    key = hashlib.sha1(str(Path(project_path).resolve()).encode("utf-8")).hexdigest()
+    return TREE_STATE_DIR / f"{key[:24]}.json"
+
+
+def prune_tree_state(max_age_days: int) -> int:
+    """删除超过指定天数未更新的指纹文件（对应的项目已删除或移动）
+
+    Args:
+        max_age_days: 最长未更新天数，0 表示不删除
+
+    Returns:
+        删除的文件数
+    """
+    if max_age_days <= 0:
+        return 0
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    try:
+        entries = list(os.scandir(TREE_STATE_DIR))
+    except OSError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.name.endswith(".json") and entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+                removed += 1
+        except OSError:
+            continue
+    if removed:
+        logger.debug(f"删除 {removed} 个长期未更新的指纹文件")
+    return removed
+
+
+def load_tree(project_path: Path, exclude: Iterable[str] = ()) -> Optional[Dict[str, Dict[str, Any]]]:
+    """加载项目上次保存的指纹记录
+
+    Args:
+        project_path: 项目路径
+        exclude: 本次扫描需要跳过的相对目录路径
+
+    Returns:
+        目录记录映射，不存在或配置已变化时返回 None
+    """
+    state_path = _tree_state_path(project_path)
+    try:
+        with open(state_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"指纹文件损坏，将重新扫描: {state_path} - {str(e)}")
+        return None
+
+    if data.get("key") != _config_key(exclude) or data.get("path") != str(project_path):
+        return None
+    return data.get("records")
+
+
+def save_tree(project_path: Path, snapshot: TreeSnapshot, exclude: Iterable[str] = ()) -> None:
+    """保存项目的指纹记录，供下次扫描复用
+
+    Args:
+        project_path: 项目路径
+        snapshot: 扫描结果
+        exclude: 本次扫描跳过的相对目录路径
+    """
+    state_path = _tree_state_path(project_path)
+    tmp_path = state_path.with_suffix(".tmp")
+    try:
+        state_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "key": _config_key(exclude),
+                "path": str(project_path),
+                "records": snapshot.records,
+            }, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, state_path)
+    except OSError as e:
+        logger.warning(f"保存指纹文件失败: {state_path} - {str(e)}")
+
+
+def scan_project_tree(project_path: Path, exclude: Iterable[str] = (),
+                      max_files: Optional[int] = None,
+                      deadline: Optional[float] = None) -> TreeSnapshot:
+    """增量扫描项目目录树：加载上次的指纹，扫描后保存新的指纹
+
+    被预算截断的扫描结果不完整，不会保存。
+
+    Args:
+        project_path: 项目路径
+        exclude: 需要跳过的相对目录路径
+        max_files: 最多扫描的文件数
+        deadline: 扫描截止时间（time.monotonic() 时间戳）
+
+    Returns:
+        扫描结果
+    """
+    exclude = tuple(exclude)
+    with WALK_DURATION.time():
+        previous = load_tree(project_path, exclude)
+        snapshot = scan_tree(project_path, previous, exclude, max_files, deadline)
+    FILES_VISITED.inc(snapshot.file_count)
+    CACHE_REQUESTS.inc(snapshot.dirs_reused, cache="tree", result="hit")
+    CACHE_REQUESTS.inc(snapshot.dirs_read, cache="tree", result="miss")
+
+    if previous is not None and previous.get("", {}).get("h") == snapshot.root_hash:
+        logger.debug(f"项目目录树未变化: {project_path.name}")
+    logger.debug(f"目录扫描完成: {project_path.name} "
+                 f"(读取 {snapshot.dirs_read} 个目录, 复用 {snapshot.dirs_reused} 个目录)")
+
+    if snapshot.records and snapshot.truncated is None:
+        save_tree(project_path, snapshot, exclude)
+    return snapshot
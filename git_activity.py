@@ -0,0 +1,352 @@
+"""
+Git 活跃度统计模块，对每个仓库只做一次流式的 git log 解析，结果按 HEAD 提交缓存
+
+HEAD 和分支、上游引用直接从 .git 目录读取，不启动 git 进程；HEAD 未变化的仓库
+直接使用缓存，HEAD 前进时只通过常驻的 git 进程（git_pool）读取上次缓存的 HEAD 之后的新提交。
+"""
+
+import re
+import time
+import threading
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple
+from loguru import logger
+
+from config import STATE_DIR, GIT_ACTIVITY_WINDOW_DAYS, GIT_ACTIVITY_RECENT_DAYS
+from state import StateFile
+from git_pool import GitTimeout, get_git_pool
+from metrics import CACHE_REQUESTS
+
+# 活跃度缓存文件
+ACTIVITY_CACHE_FILE = STATE_DIR / "git_activity.json"
+
+# 缓存格式版本，统计逻辑变化时递增以丢弃旧数据
+ACTIVITY_CACHE_VERSION = 2
+
+# git log 每行输出：提交哈希、提交时间戳、作者邮箱（按 .mailmap 合并）、提交时间（ISO 8601），以 NUL 分隔
+LOG_FORMAT = "%H%x00%ct%x00%aE%x00%cI"
+
+# 仓库路径 -> 缓存项
+_cache = StateFile(ACTIVITY_CACHE_FILE, ACTIVITY_CACHE_VERSION)
+
+
+def find_git_dir(project_path: Path) -> Optional[Path]:
+    """返回项目自身的 git 目录（支持 worktree 和子模块的 .git 文件）
+
+    Args:
+        project_path: 项目路径
+
+    Returns:
+        git 目录路径，项目根目录不是 Git 仓库时返回 None
+    """
+    dot_git = project_path / ".git"
+    if dot_git.is_dir():
+        return dot_git
+    if dot_git.is_file():
+        try:
+            content = dot_git.read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+        if content.startswith("gitdir:"):
+            git_dir = Path(content[len("gitdir:"):].strip())
+            if not git_dir.is_absolute():
+                git_dir = project_path / git_dir
+            return git_dir if git_dir.is_dir() else None
+    return None
+
+
+def _common_dir(git_dir: Path) -> Path:
+    """返回存放共享引用和配置的目录（worktree 的 commondir）"""
+    try:
+        common = (git_dir / "commondir").read_text(encoding="utf-8").strip()
+    except OSError:
+        return git_dir
+    common_path = Path(common)
+    return common_path if common_path.is_absolute() else (git_dir / common_path).resolve()
+
+
+def resolve_ref(git_dir: Path, ref: str) -> Optional[str]:
+    """解析引用对应的提交哈希，依次查找松散引用和 packed-refs
+
+    Args:
+        git_dir: git 目录
+        ref: 完整引用名，例如 refs/heads/main
+
+    Returns:
+        提交哈希，引用不存在时返回 None
+    """
+    common_dir = _common_dir(git_dir)
+    for base in dict.fromkeys((git_dir, common_dir)):
+        try:
+            value = (base / ref).read_text(encoding="utf-8").strip()
+        except OSError:
+            continue
+        if value.startswith("ref: "):
+            return resolve_ref(git_dir, value[5:])
+        return value or None
+
+    try:
+        with open(common_dir / "packed-refs", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith(("#", "^")):
+                    continue
+                parts = line.split()
+                if len(parts) == 2 and parts[1] == ref:
+                    return parts[0]
+    except OSError:
+        pass
+    return None
+
+
+def read_head(git_dir: Path) -> Tuple[Optional[str], Optional[str]]:
+    """读取 HEAD 指向的提交和当前分支
+
+    Args:
+        git_dir: git 目录
+
+    Returns:
+        (提交哈希, 分支名)；分离 HEAD 时分支名为 None，空仓库时提交哈希为 None
+    """
+    try:
+        head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+    except OSError:
+        return None, None
+    if not head.startswith("ref: "):
+        return head or None, None
+    ref = head[5:]
+    branch = ref[len("refs/heads/"):] if ref.startswith("refs/heads/") else ref
+    return resolve_ref(git_dir, ref), branch
+
+
+def uses_mailmap(project_path: Path, git_dir: Path) -> bool:
+    """仓库是否使用 mailmap（.mailmap 文件或 mailmap.file / mailmap.blob 配置）
+
+    Args:
+        project_path: 项目路径
+        git_dir: git 目录
+
+    Returns:
+        是否使用 mailmap
+    """
+    if (project_path / ".mailmap").is_file():
+        return True
+    for config_path in (_common_dir(git_dir) / "config", Path.home() / ".gitconfig"):
+        try:
+            text = config_path.read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            continue
+        if re.search(r"^\s*\[\s*mailmap\s*\]", text, re.MULTILINE | re.IGNORECASE):
+            return True
+    return False
+
+
+def read_upstream(git_dir: Path, branch: str) -> Optional[str]:
+    """从仓库配置中读取分支的上游引用
+
+    Args:
+        git_dir: git 目录
+        branch: 本地分支名
+
+    Returns:
+        上游的完整引用名（例如 refs/remotes/origin/main），未设置时返回 None
+    """
+    try:
+        text = (_common_dir(git_dir) / "config").read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return None
+
+    remote = merge = None
+    in_section = False
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        header = re.match(r'^\[\s*branch\s+"(.*)"\s*\]$', line)
+        if header or line.startswith("["):
+            in_section = bool(header) and header.group(1) == branch
+            continue
+        if in_section and "=" in line:
+            key, value = (part.strip() for part in line.split("=", 1))
+            if key.lower() == "remote":
+                remote = value
+            elif key.lower() == "merge":
+                merge = value
+
+    if not remote or not merge:
+        return None
+    if remote == ".":
+        return merge
+    return f"refs/remotes/{remote}/{merge[len('refs/heads/'):] if merge.startswith('refs/heads/') else merge}"
+
+
+def _stream_log(project_path: Path, head: str, since: float, timeout: Optional[float]) -> Tuple[List[List[Any]], Optional[str]]:
+    """流式解析 git log，遇到窗口之外的提交即停止读取
+
+    git log 默认按提交时间倒序输出，第一行即最近一次提交。
+
+    Args:
+        project_path: 项目路径
+        head: 起始提交
+        since: 统计窗口的起始时间戳
+        timeout: 超时时间（秒）
+
+    Returns:
+        (窗口内的 [提交时间戳, 作者邮箱] 列表, 最近一次提交的 ISO 时间)
+
+    Raises:
+        GitTimeout: 超过超时时间
+    """
+    process = subprocess.Popen(["git", "log", f"--format={LOG_FORMAT}", head], cwd=project_path, stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL, text=True, errors="replace")
+    timer = None
+    killed = threading.Event()
+    if timeout:
+        def _kill():
+            killed.set()
+            process.kill()
+        timer = threading.Timer(timeout, _kill)
+        timer.start()
+
+    commits: List[List[Any]] = []
+    last_commit = None
+    try:
+        for line in process.stdout:
+            parts = line.rstrip("\n").split("\x00")
+            if len(parts) != 4:
+                continue
+            _, timestamp, email, iso_time = parts
+            if last_commit is None:
+                last_commit = iso_time
+            timestamp = int(timestamp)
+            if timestamp < since:
+                break
+            commits.append([timestamp, email.lower()])
+    finally:
+        if timer:
+            timer.cancel()
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        process.wait()
+
+    if killed.is_set():
+        raise GitTimeout("log")
+    return commits, last_commit
+
+
+def _new_commits(project_path: Path, head: str, base: str, since: float,
+                 timeout: Optional[float]) -> Optional[Tuple[List[List[Any]], str]]:
+    """通过常驻 git 进程读取 base 之后的新提交
+
+    Args:
+        project_path: 项目路径
+        head: 当前 HEAD
+        base: 上次缓存的 HEAD
+        since: 统计窗口的起始时间戳
+        timeout: 超时时间（秒）
+
+    Returns:
+        (窗口内新提交的 [提交时间戳, 作者邮箱] 列表, HEAD 的 ISO 提交时间)；
+        base 不是 HEAD 的祖先（历史被改写）或早于统计窗口时返回 None，需要完整解析
+
+    Raises:
+        GitTimeout: 超过超时时间
+    """
+    pool = get_git_pool()
+    walk = pool.walk(project_path, [head], [base], since, timeout)
+    if base not in walk.boundary:
+        return None
+    commits = [[commit.commit_time, commit.author_email] for _, commit in walk.commits]
+    if walk.commits and walk.commits[0][0] == head:
+        return commits, walk.commits[0][1].commit_iso
+    head_commit = pool.read_commit(project_path, head, timeout)
+    return commits, head_commit.commit_iso if head_commit else None
+
+
+def get_git_activity(project_path: Path, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """获取仓库的活跃度统计
+
+    HEAD 和上游引用都未变化时不启动任何 git 进程。
+
+    Args:
+        project_path: 项目路径
+        timeout: 单次 git 调用的超时时间（秒），None 表示不限制
+
+    Returns:
+        包含 branch、last_commit、commits_30d、commits_90d、contributors_90d、ahead、behind
+        和 timed_out 的字典；项目根目录不是 Git 仓库时返回 None
+    """
+    git_dir = find_git_dir(project_path)
+    if git_dir is None:
+        return None
+
+    head, branch = read_head(git_dir)
+    upstream_ref = read_upstream(git_dir, branch) if branch else None
+    upstream = resolve_ref(git_dir, upstream_ref) if upstream_ref else None
+
+    now = time.time()
+    since = now - GIT_ACTIVITY_WINDOW_DAYS * 86400
+    key = str(project_path)
+    cached = _cache.get(key)
+    entry = dict(cached) if cached else {"head": None, "upstream": None, "ahead": None, "behind": None}
+    hit = cached is not None and cached["head"] == head
+    CACHE_REQUESTS.inc(cache="git_activity", result="hit" if hit else "miss")
+    timed_out = False
+
+    try:
+        if cached is None or cached["head"] != head:
+            if head is None:
+                commits, last_commit = [], None
+            else:
+                incremental = None
+                # 常驻进程读取的是提交对象中的原始邮箱，使用 mailmap 的仓库需要 git log 合并作者
+                if cached and cached["head"] and not uses_mailmap(project_path, git_dir):
+                    incremental = _new_commits(project_path, head, cached["head"], since, timeout)
+                if incremental is not None:
+                    commits, last_commit = incremental
+                    commits += cached["commits"]
+                else:
+                    commits, last_commit = _stream_log(project_path, head, since, timeout)
+            # HEAD 变化后需要重新统计领先/落后
+            entry.update(head=head, commits=commits, last_commit=last_commit,
+                         upstream=None, ahead=None, behind=None)
+
+        if upstream is None:
+            entry.update(upstream=None, ahead=None, behind=None)
+        elif head and entry["upstream"] != upstream:
+            pool = get_git_pool()
+            entry.update(upstream=upstream,
+                         ahead=pool.count(project_path, head, upstream, timeout),
+                         behind=pool.count(project_path, upstream, head, timeout))
+    except GitTimeout as e:
+        logger.warning(f"git 调用超时: {project_path.name} - {str(e)}")
+        timed_out = True
+    except OSError as e:
+        logger.debug(f"无法运行 git: {project_path.name} - {str(e)}")
+        return None
+
+    if entry["head"] != head:
+        # 解析提交记录超时，不使用过期的缓存结果
+        return {"branch": branch, "last_commit": None, "commits_30d": None, "commits_90d": None,
+                "contributors_90d": None, "ahead": None, "behind": None, "timed_out": True}
+
+    # 丢弃已经滑出统计窗口的提交
+    entry["commits"] = [commit for commit in entry["commits"] if commit[0] >= since]
+    entry["branch"] = branch
+    _cache.set(key, entry)
+
+    recent_since = now - GIT_ACTIVITY_RECENT_DAYS * 86400
+    return {
+        "branch": branch,
+        "last_commit": entry.get("last_commit"),
+        "commits_30d": sum(1 for timestamp, _ in entry["commits"] if timestamp >= recent_since),
+        "commits_90d": len(entry["commits"]),
+        "contributors_90d": len({email for _, email in entry["commits"]}),
+        "ahead": entry.get("ahead"),
+        "behind": entry.get("behind"),
+        "timed_out": timed_out,
+    }
+
+
+def save_activity_cache() -> None:
+    """把活跃度缓存写回磁盘（没有变化时不写）"""
+    _cache.save()
@@ -0,0 +1,555 @@
+"""
+工作区状态模块，通过读取 .git/index 并与目录扫描结果比对，统计已修改、未跟踪和已暂存的文件数
+
+只有结果无法确定时（例如时间戳竞争、冲突、稀疏或拆分索引、需要内容过滤的文件）才回退到 ``git status``。
+"""
+
+import os
+import re
+import struct
+import hashlib
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+from loguru import logger
+
+from config import DIRTY_HASH_MAX_FILES, DIRTY_HASH_MAX_BYTES
+from fingerprint import TreeSnapshot
+from git_activity import find_git_dir, read_head, _common_dir
+from git_pool import GitTimeout, get_git_pool
+
+# 索引条目标志位
+FLAG_ASSUME_VALID = 0x8000
+FLAG_EXTENDED = 0x4000
+FLAG_STAGE_MASK = 0x3000
+EXT_FLAG_SKIP_WORKTREE = 0x4000
+EXT_FLAG_INTENT_TO_ADD = 0x2000
+
+# 无法仅凭索引判断工作区状态的扩展（拆分索引、稀疏索引）
+UNSUPPORTED_EXTENSIONS = {b"link", b"sdir"}
+
+
+class AmbiguousStatus(Exception):
+    """无法仅凭索引和目录扫描结果确定工作区状态"""
+
+
+class IndexEntry:
+    """索引中的一个文件条目"""
+
+    __slots__ = ("path", "mtime_ns", "nsec_known", "size", "mode", "sha", "flags", "ext_flags")
+
+    def __init__(self, path: str, mtime_ns: int, nsec_known: bool, size: int,
+                 mode: int, sha: str, flags: int, ext_flags: int):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.nsec_known = nsec_known
+        self.size = size
+        self.mode = mode
+        self.sha = sha
+        self.flags = flags
+        self.ext_flags = ext_flags
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """读取索引 v4 中的偏移编码整数"""
+    byte = data[pos]
+    pos += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[pos]
+        pos += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, pos
+
+
+def _parse_cache_tree(data: bytes) -> Dict[str, str]:
+    """解析 TREE 扩展，返回各目录有效的树对象哈希（根目录为空字符串）"""
+    trees: Dict[str, str] = {}
+    pos = 0
+
+    def parse_node(prefix: str) -> None:
+        nonlocal pos
+        nul = data.index(b"\0", pos)
+        name = data[pos:nul].decode("utf-8", "surrogateescape")
+        newline = data.index(b"\n", nul)
+        entry_count, subtree_count = (int(value) for value in data[nul + 1:newline].split())
+        pos = newline + 1
+        path = f"{prefix}/{name}" if prefix and name else (prefix or name)
+        if entry_count >= 0:
+            trees[path] = data[pos:pos + 20].hex()
+            pos += 20
+        for _ in range(subtree_count):
+            parse_node(path)
+
+    if data:
+        parse_node("")
+    return trees
+
+
+def parse_index(index_path: Path) -> Tuple[List[IndexEntry], Dict[str, str], float]:
+    """解析 git 索引文件（版本 2-4）
+
+    Args:
+        index_path: 索引文件路径
+
+    Returns:
+        (索引条目列表, TREE 扩展中有效的目录树哈希, 索引文件的修改时间戳)
+
+    Raises:
+        AmbiguousStatus: 索引格式不受支持
+        OSError: 无法读取索引
+    """
+    with open(index_path, "rb") as f:
+        index_mtime = os.fstat(f.fileno()).st_mtime
+        data = f.read()
+
+    signature, version, count = struct.unpack(">4sLL", data[:12])
+    if signature != b"DIRC" or version not in (2, 3, 4):
+        raise AmbiguousStatus(f"不支持的索引格式: {signature!r} v{version}")
+
+    entries: List[IndexEntry] = []
+    pos = 12
+    previous_path = b""
+    for _ in range(count):
+        (_, _, mtime_s, mtime_ns, _, _, mode, _, _, size) = struct.unpack(">10L", data[pos:pos + 40])
+        sha = data[pos + 40:pos + 60].hex()
+        flags, = struct.unpack(">H", data[pos + 60:pos + 62])
+        cursor = pos + 62
+        ext_flags = 0
+        if version >= 3 and flags & FLAG_EXTENDED:
+            ext_flags, = struct.unpack(">H", data[cursor:cursor + 2])
+            cursor += 2
+
+        if version == 4:
+            strip, cursor = _read_varint(data, cursor)
+            nul = data.index(b"\0", cursor)
+            path = previous_path[:len(previous_path) - strip] + data[cursor:nul]
+            pos = nul + 1
+        else:
+            nul = data.index(b"\0", cursor)
+            path = data[cursor:nul]
+            # 条目长度补齐到 8 字节的倍数（至少一个 NUL）
+            pos += (cursor - pos + len(path) + 8) & ~7
+        previous_path = path
+
+        entries.append(IndexEntry(path.decode("utf-8", "surrogateescape"),
+                                  mtime_s * 1_000_000_000 + mtime_ns, mtime_ns != 0,
+                                  size, mode, sha, flags, ext_flags))
+
+    cache_tree: Dict[str, str] = {}
+    end = len(data) - 20
+    while pos + 8 <= end:
+        ext_signature, ext_size = struct.unpack(">4sL", data[pos:pos + 8])
+        ext_data = data[pos + 8:pos + 8 + ext_size]
+        if ext_signature in UNSUPPORTED_EXTENSIONS:
+            raise AmbiguousStatus(f"不支持的索引扩展: {ext_signature.decode('ascii', 'replace')}")
+        if ext_signature == b"TREE":
+            cache_tree = _parse_cache_tree(ext_data)
+        pos += 8 + ext_size
+
+    return entries, cache_tree, index_mtime
+
+
+class IgnoreRules:
+    """.gitignore 规则（支持否定、仅目录、锚定路径和 ** 通配）"""
+
+    def __init__(self):
+        # [(基准目录, 正则, 是否否定, 是否仅匹配目录, 是否匹配完整相对路径)]，按优先级从低到高排列
+        self.rules: List[Tuple[str, "re.Pattern", bool, bool, bool]] = []
+        self._dir_cache: Dict[str, bool] = {}
+
+    @staticmethod
+    def _translate(pattern: str) -> str:
+        """把 gitignore 通配模式转换为正则表达式"""
+        regex = ""
+        i = 0
+        while i < len(pattern):
+            char = pattern[i]
+            if pattern.startswith("**/", i):
+                regex += "(?:.*/)?"
+                i += 3
+                continue
+            if pattern.startswith("/**", i) and i + 3 == len(pattern):
+                regex += "/.*"
+                i += 3
+                continue
+            if pattern.startswith("**", i):
+                regex += ".*"
+                i += 2
+                continue
+            if char == "*":
+                regex += "[^/]*"
+            elif char == "?":
+                regex += "[^/]"
+            elif char == "[":
+                end = pattern.find("]", i + 2)
+                if end == -1:
+                    regex += re.escape(char)
+                else:
+                    body = pattern[i + 1:end]
+                    if body.startswith("!"):
+                        body = "^" + body[1:]
+                    regex += f"[{body}]"
+                    i = end
+            elif char == "\\" and i + 1 < len(pattern):
+                i += 1
+                regex += re.escape(pattern[i])
+            else:
+                regex += re.escape(char)
+            i += 1
+        return regex + r"\Z"
+
+    def add_lines(self, lines: Iterable[str], base: str = "") -> None:
+        """添加一个 .gitignore 文件中的规则
+
+        Args:
+            lines: 文件内容的各行
+            base: .gitignore 所在目录（相对项目根目录，根目录为空字符串）
+        """
+        for line in lines:
+            line = line.rstrip("\n")
+            if not line.endswith("\\ "):
+                line = line.rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            if line.startswith("\\"):
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            anchored = "/" in line
+            line = line.lstrip("/")
+            self.rules.append((base, re.compile(self._translate(line)), negated, dir_only, anchored))
+        self._dir_cache.clear()
+
+    def _match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """返回最后一条匹配规则的结论（True 忽略 / False 不忽略），没有匹配时返回 None"""
+        name = rel_path.rsplit("/", 1)[-1]
+        for base, regex, negated, dir_only, anchored in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if base:
+                if not rel_path.startswith(base + "/"):
+                    continue
+                target = rel_path[len(base) + 1:] if anchored else name
+            else:
+                target = rel_path if anchored else name
+            if regex.match(target):
+                return not negated
+        return None
+
+    def is_ignored(self, rel_path: str, is_dir: bool = False) -> bool:
+        """判断相对路径是否被忽略（父目录被忽略时其中的文件一律忽略）
+
+        Args:
+            rel_path: 相对项目根目录的路径（以 / 分隔）
+            is_dir: 是否为目录
+
+        Returns:
+            是否被忽略
+        """
+        parent = rel_path.rsplit("/", 1)[0] if "/" in rel_path else ""
+        if parent and self._is_dir_ignored(parent):
+            return True
+        return bool(self._match(rel_path, is_dir))
+
+    def _is_dir_ignored(self, rel_dir: str) -> bool:
+        """判断目录（含祖先目录）是否被忽略，结果缓存"""
+        cached = self._dir_cache.get(rel_dir)
+        if cached is None:
+            parent = rel_dir.rsplit("/", 1)[0] if "/" in rel_dir else ""
+            cached = (bool(parent) and self._is_dir_ignored(parent)) or bool(self._match(rel_dir, True))
+            self._dir_cache[rel_dir] = cached
+        return cached
+
+
+def _read_lines(path: Path) -> List[str]:
+    """读取文本文件的各行，不存在时返回空列表"""
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return f.readlines()
+    except OSError:
+        return []
+
+
+def _global_excludes_file(common_dir: Path) -> Optional[Path]:
+    """查找全局忽略文件（core.excludesFile，未设置时使用 XDG 默认位置）"""
+    for config_path in (common_dir / "config", Path.home() / ".gitconfig"):
+        for line in _read_lines(config_path):
+            key, _, value = line.partition("=")
+            if key.strip().lower() == "excludesfile" and value.strip():
+                return Path(os.path.expanduser(value.strip().strip('"')))
+    xdg_home = os.environ.get("XDG_CONFIG_HOME") or os.path.join(Path.home(), ".config")
+    return Path(xdg_home) / "git" / "ignore"
+
+
+def load_ignore_rules(project_path: Path, git_dir: Path, snapshot: TreeSnapshot) -> IgnoreRules:
+    """加载项目的忽略规则：全局忽略文件、.git/info/exclude 和扫描到的各级 .gitignore
+
+    Args:
+        project_path: 项目路径
+        git_dir: git 目录
+        snapshot: 项目目录扫描结果
+
+    Returns:
+        忽略规则
+    """
+    common_dir = _common_dir(git_dir)
+    rules = IgnoreRules()
+    excludes_file = _global_excludes_file(common_dir)
+    if excludes_file:
+        rules.add_lines(_read_lines(excludes_file))
+    rules.add_lines(_read_lines(common_dir / "info" / "exclude"))
+
+    # 按目录深度排列，深层目录中的规则优先级更高
+    ignore_files = sorted((rel for rel, _ in snapshot.iter_files() if os.path.basename(rel) == ".gitignore"),
+                          key=lambda rel: rel.count("/"))
+    for rel in ignore_files:
+        base = os.path.dirname(rel).replace(os.sep, "/")
+        rules.add_lines(_read_lines(project_path / rel), base)
+    return rules
+
+
+def _blob_sha(path: Path, size: int) -> str:
+    """按 git 的方式计算文件内容的 blob 哈希"""
+    digest = hashlib.sha1(b"blob %d\0" % size)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _uses_content_filters(common_dir: Path, snapshot: TreeSnapshot) -> bool:
+    """仓库是否可能对工作区内容做转换（.gitattributes 或 core.autocrlf），此时无法直接比对内容哈希"""
+    if any(os.path.basename(rel) == ".gitattributes" for rel, _ in snapshot.iter_files()):
+        return True
+    for line in _read_lines(common_dir / "config"):
+        key, _, value = line.partition("=")
+        if key.strip().lower() == "autocrlf" and value.strip().lower() not in ("false", "0", "no"):
+            return True
+    return False
+
+
+def _staged_count(project_path: Path, head: Optional[str], entries: Dict[str, IndexEntry],
+                  cache_tree: Dict[str, str], timeout: Optional[float]) -> int:
+    """统计索引与 HEAD 不同的路径数，TREE 扩展中与 HEAD 一致的子树直接跳过"""
+    if head is None:
+        return len(entries)
+
+    children: Dict[str, Dict[str, bool]] = {}
+    for path in entries:
+        parts = path.split("/")
+        for depth in range(len(parts)):
+            parent = "/".join(parts[:depth])
+            children.setdefault(parent, {})[parts[depth]] = depth < len(parts) - 1
+
+    def count_index(dir_path: str) -> int:
+        # 索引中该目录下的条目数（HEAD 中不存在该目录时全部为新增）
+        prefix = dir_path + "/"
+        return sum(1 for path in entries if path.startswith(prefix))
+
+    pool = get_git_pool()
+    with pool.worker(project_path, timeout) as worker:
+        def count_tree(tree_sha: str) -> int:
+            tree = worker.read_tree(tree_sha) or []
+            return sum(count_tree(sha) if mode == "40000" else 1 for mode, _, sha in tree)
+
+        def diff(dir_path: str, tree_sha: str) -> int:
+            if cache_tree.get(dir_path) == tree_sha:
+                return 0
+            tree = worker.read_tree(tree_sha)
+            if tree is None:
+                raise AmbiguousStatus(f"无法读取树对象: {tree_sha}")
+            staged = 0
+            index_children = dict(children.get(dir_path, {}))
+            for mode, name, sha in tree:
+                path = f"{dir_path}/{name}" if dir_path else name
+                is_index_dir = index_children.pop(name, None)
+                if mode == "40000":
+                    if is_index_dir:
+                        staged += diff(path, sha)
+                    else:
+                        staged += count_tree(sha) + (1 if is_index_dir is False else 0)
+                elif is_index_dir:
+                    staged += 1 + count_index(path)
+                elif is_index_dir is None:
+                    staged += 1
+                else:
+                    entry = entries[path]
+                    if entry.sha != sha or int(mode, 8) != entry.mode:
+                        staged += 1
+            for name, is_dir in index_children.items():
+                path = f"{dir_path}/{name}" if dir_path else name
+                staged += count_index(path) if is_dir else 1
+            return staged
+
+        commit = worker.read_commit(head)
+        if commit is None:
+            raise AmbiguousStatus(f"无法读取提交: {head}")
+        return diff("", commit.tree)
+
+
+def _git_status(project_path: Path, timeout: Optional[float]) -> Dict[str, Any]:
+    """运行 git status 统计工作区状态（回退路径）
+
+    Raises:
+        GitTimeout: 超过超时时间
+    """
+    try:
+        result = subprocess.run(["git", "status", "--porcelain=v1", "-z", "--untracked-files=all"],
+                                cwd=project_path, capture_output=True, timeout=timeout)
+    except subprocess.TimeoutExpired as e:
+        raise GitTimeout("status") from e
+
+    modified = untracked = staged = 0
+    records = result.stdout.split(b"\0")
+    i = 0
+    while i < len(records):
+        record = records[i]
+        i += 1
+        if len(record) < 3:
+            continue
+        x, y = chr(record[0]), chr(record[1])
+        if x == "?":
+            untracked += 1
+            continue
+        if x in "RC":
+            # 重命名和复制后面跟着原路径
+            i += 1
+        if x == "U" or y == "U" or (x, y) in (("A", "A"), ("D", "D")):
+            modified += 1
+            continue
+        if x not in " !":
+            staged += 1
+        if y not in " !":
+            modified += 1
+    return {"modified": modified, "untracked": untracked, "staged": staged, "method": "git_status"}
+
+
+def _index_status(project_path: Path, git_dir: Path, snapshot: TreeSnapshot,
+                  timeout: Optional[float]) -> Dict[str, Any]:
+    """根据索引和目录扫描结果统计工作区状态
+
+    Raises:
+        AmbiguousStatus: 无法确定结果，需要回退到 git status
+    """
+    index_path = git_dir / "index"
+    if not index_path.exists():
+        # 新建的仓库还没有索引，所有文件都是未跟踪或被忽略的
+        entries, cache_tree, index_mtime = [], {}, 0.0
+    else:
+        entries, cache_tree, index_mtime = parse_index(index_path)
+    common_dir = _common_dir(git_dir)
+    index_mtime_ns = int(index_mtime * 1_000_000_000)
+
+    # 扫描结果中的文件记录（扫描过的目录中的记录都是本次 stat 的结果）
+    files: Dict[str, List[Any]] = {}
+    for rel, record in snapshot.iter_files():
+        files[rel.replace(os.sep, "/")] = record
+    fresh_dirs = {rel.replace(os.sep, "/") for rel in snapshot.fresh_dirs}
+
+    tracked: Dict[str, IndexEntry] = {}
+    submodules: List[str] = []
+    to_hash: List[Tuple[IndexEntry, int]] = []
+    modified = 0
+    for entry in entries:
+        if entry.flags & FLAG_STAGE_MASK:
+            raise AmbiguousStatus(f"存在未解决的冲突: {entry.path}")
+        tracked[entry.path] = entry
+        mode_type = entry.mode & 0o170000
+        if mode_type == 0o160000:
+            submodules.append(entry.path)
+            continue
+        if mode_type == 0o120000 or entry.flags & FLAG_ASSUME_VALID or \
+                entry.ext_flags & (EXT_FLAG_SKIP_WORKTREE | EXT_FLAG_INTENT_TO_ADD):
+            continue
+
+        parent = entry.path.rsplit("/", 1)[0] if "/" in entry.path else ""
+        record = files.get(entry.path)
+        if parent in fresh_dirs:
+            if record is None:
+                modified += 1  # 已删除
+                continue
+            size, mtime_ns = record[1], record[2]
+        else:
+            # 文件不在扫描范围内（被排除或扫描被截断）
+            try:
+                st = os.stat(project_path / entry.path)
+            except OSError:
+                modified += 1
+                continue
+            size, mtime_ns = st.st_size, st.st_mtime_ns
+
+        if size % (1 << 32) != entry.size:
+            modified += 1
+            continue
+        same_mtime = (mtime_ns == entry.mtime_ns) if entry.nsec_known else \
+            (mtime_ns // 1_000_000_000 == entry.mtime_ns // 1_000_000_000)
+        # 修改时间不早于索引本身时可能是“时间戳竞争”，与修改时间不同一样需要比对内容
+        if not same_mtime or entry.mtime_ns >= index_mtime_ns:
+            to_hash.append((entry, size))
+
+    if to_hash:
+        if len(to_hash) > DIRTY_HASH_MAX_FILES or sum(size for _, size in to_hash) > DIRTY_HASH_MAX_BYTES:
+            raise AmbiguousStatus(f"需要比对内容的文件过多: {len(to_hash)}")
+        if _uses_content_filters(common_dir, snapshot):
+            raise AmbiguousStatus("仓库对工作区内容做转换，无法直接比对内容哈希")
+        for entry, size in to_hash:
+            if _blob_sha(project_path / entry.path, size) != entry.sha:
+                modified += 1
+
+    # 未跟踪文件：扫描到但不在索引中、也未被忽略的文件（子模块目录和 .git 文件除外）
+    rules = load_ignore_rules(project_path, git_dir, snapshot)
+    submodule_prefixes = tuple(path + "/" for path in submodules)
+    untracked = 0
+    for rel in files:
+        if rel in tracked or rel == ".git" or (submodule_prefixes and rel.startswith(submodule_prefixes)):
+            continue
+        if not rules.is_ignored(rel):
+            untracked += 1
+
+    head, _ = read_head(git_dir)
+    staged = _staged_count(project_path, head, tracked, cache_tree, timeout)
+    return {"modified": modified, "untracked": untracked, "staged": staged, "method": "index"}
+
+
+def get_working_tree_status(project_path: Path, snapshot: TreeSnapshot,
+                            timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """统计工作区中已修改、未跟踪和已暂存的文件数
+
+    优先比对 .git/index 与目录扫描结果，无法确定时回退到 git status。
+
+    Args:
+        project_path: 项目路径
+        snapshot: 项目目录扫描结果（需为完整扫描）
+        timeout: git 调用的超时时间（秒）
+
+    Returns:
+        包含 modified、untracked、staged、dirty、method（"index" 或 "git_status"）和 timed_out 的字典，
+        git 超时时各项统计为 None；不是 Git 仓库或扫描被截断时返回 None
+    """
+    git_dir = find_git_dir(project_path)
+    if git_dir is None or snapshot.truncated:
+        return None
+
+    try:
+        try:
+            status = _index_status(project_path, git_dir, snapshot, timeout)
+        except (AmbiguousStatus, ValueError, struct.error, OSError) as e:
+            logger.debug(f"无法仅凭索引确定工作区状态，回退到 git status: {project_path.name} - {str(e)}")
+            status = _git_status(project_path, timeout)
+    except GitTimeout as e:
+        logger.warning(f"git 调用超时: {project_path.name} - {str(e)}")
+        return {"modified": None, "untracked": None, "staged": None, "dirty": None,
+                "method": None, "timed_out": True}
+    except OSError as e:
+        logger.debug(f"无法运行 git: {project_path.name} - {str(e)}")
+        return None
+
+    status["dirty"] = bool(status["modified"] or status["untracked"] or status["staged"])
+    status["timed_out"] = False
+    return status
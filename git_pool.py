@@ -0,0 +1,415 @@
+"""
+Git 进程池模块，为每个仓库维护常驻的 ``git cat-file --batch`` 进程，在一次运行内的多次查询间复用
+
+提交遍历（新提交、祖先判断、领先/落后统计）直接读取提交对象完成，不再为每次查询启动新的 git 进程；
+空闲超过 GIT_POOL_IDLE_SECONDS 的进程会被自动关闭。
+"""
+
+import time
+import heapq
+import datetime
+import itertools
+import threading
+import subprocess
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Iterable, Iterator, NamedTuple, Set, Tuple
+from loguru import logger
+
+from config import GIT_POOL_MAX_WORKERS, GIT_POOL_IDLE_SECONDS
+
+
+class GitTimeout(Exception):
+    """git 子进程超时"""
+
+
+class CommitInfo(NamedTuple):
+    """提交对象中用到的字段"""
+    tree: str
+    parents: Tuple[str, ...]
+    author_email: str
+    commit_time: int
+    commit_iso: str
+
+
+def parse_commit(data: bytes) -> CommitInfo:
+    """解析原始提交对象的头部
+
+    Args:
+        data: git cat-file 输出的提交对象内容
+
+    Returns:
+        提交信息
+    """
+    tree = ""
+    parents = []
+    author_email = ""
+    commit_time = 0
+    commit_iso = ""
+    for line in data.split(b"\n"):
+        if not line:
+            break
+        key, _, value = line.partition(b" ")
+        if key == b"tree":
+            tree = value.decode("ascii")
+        elif key == b"parent":
+            parents.append(value.decode("ascii"))
+        elif key == b"author":
+            author_email = value[value.rfind(b"<") + 1:value.rfind(b">")].decode("utf-8", "replace").lower()
+        elif key == b"committer":
+            timestamp, tz = value[value.rfind(b">") + 1:].split()
+            commit_time = int(timestamp)
+            sign = -1 if tz.startswith(b"-") else 1
+            offset = datetime.timedelta(hours=int(tz[1:3]), minutes=int(tz[3:5])) * sign
+            commit_iso = datetime.datetime.fromtimestamp(
+                commit_time, datetime.timezone(offset)).isoformat()
+    return CommitInfo(tree, tuple(parents), author_email, commit_time, commit_iso)
+
+
+class CatFileWorker:
+    """绑定到单个仓库的常驻 git cat-file --batch 进程"""
+
+    def __init__(self, repo_path: Path):
+        """启动 cat-file 进程
+
+        Args:
+            repo_path: 仓库路径
+        """
+        self.repo_path = repo_path
+        self.process = subprocess.Popen(["git", "cat-file", "--batch"], cwd=repo_path,
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL)
+        self.last_used = 0.0
+
+    @property
+    def alive(self) -> bool:
+        """进程是否仍在运行"""
+        return self.process.poll() is None
+
+    def read(self, rev: str) -> Optional[Tuple[str, bytes]]:
+        """读取一个对象
+
+        Args:
+            rev: 对象哈希或任意 git 修订表达式
+
+        Returns:
+            (对象类型, 对象内容)，对象不存在时返回 None
+
+        Raises:
+            GitTimeout: 进程已被关闭（超时后被终止）
+        """
+        try:
+            self.process.stdin.write(rev.encode("utf-8") + b"\n")
+            self.process.stdin.flush()
+            header = self.process.stdout.readline()
+        except (BrokenPipeError, ValueError) as e:
+            raise GitTimeout(f"cat-file {rev}") from e
+        if not header:
+            raise GitTimeout(f"cat-file {rev}")
+
+        parts = header.split()
+        if len(parts) != 3:
+            # "<rev> missing" 或 "<rev> ambiguous"
+            return None
+        size = int(parts[2])
+        data = self.process.stdout.read(size + 1)
+        if len(data) != size + 1:
+            raise GitTimeout(f"cat-file {rev}")
+        return parts[1].decode("ascii"), data[:-1]
+
+    def read_commit(self, rev: str) -> Optional[CommitInfo]:
+        """读取并解析提交对象，对象不存在或不是提交时返回 None"""
+        obj = self.read(rev)
+        if obj is None or obj[0] != "commit":
+            return None
+        return parse_commit(obj[1])
+
+    def read_tree(self, rev: str) -> Optional[List[Tuple[str, str, str]]]:
+        """读取并解析树对象
+
+        Args:
+            rev: 树对象哈希或修订表达式（例如 "HEAD^{tree}"）
+
+        Returns:
+            [(模式, 名称, 对象哈希), ...]，对象不存在或不是树时返回 None
+        """
+        obj = self.read(rev)
+        if obj is None or obj[0] != "tree":
+            return None
+        data = obj[1]
+        entries = []
+        pos = 0
+        while pos < len(data):
+            space = data.index(b" ", pos)
+            nul = data.index(b"\0", space)
+            entries.append((data[pos:space].decode("ascii"),
+                            data[space + 1:nul].decode("utf-8", "surrogateescape"),
+                            data[nul + 1:nul + 21].hex()))
+            pos = nul + 21
+        return entries
+
+    def close(self) -> None:
+        """关闭进程"""
+        if self.alive:
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=1)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+        for stream in (self.process.stdin, self.process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+
+class WalkResult(NamedTuple):
+    """提交遍历结果"""
+    commits: List[Tuple[str, CommitInfo]]
+    boundary: Set[str]
+
+
+class GitWorkerPool:
+    """按仓库划分的 cat-file 进程池，最多保留 max_workers 个进程"""
+
+    def __init__(self, max_workers: int = GIT_POOL_MAX_WORKERS,
+                 idle_seconds: float = GIT_POOL_IDLE_SECONDS):
+        """初始化进程池
+
+        Args:
+            max_workers: 最多保留的空闲进程数，超出时关闭最久未用的进程
+            idle_seconds: 空闲超过该时间的进程会被关闭
+        """
+        self.max_workers = max_workers
+        self.idle_seconds = idle_seconds
+        self.spawned = 0
+        self._idle: "OrderedDict[str, CatFileWorker]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @contextmanager
+    def worker(self, repo_path: Path, timeout: Optional[float] = None) -> Iterator[CatFileWorker]:
+        """取出仓库对应的进程，使用完毕后放回池中
+
+        超时后进程会被终止，正在进行的读取抛出 GitTimeout。
+
+        Args:
+            repo_path: 仓库路径
+            timeout: 本次使用的超时时间（秒），None 表示不限制
+        """
+        key = str(repo_path)
+        with self._lock:
+            worker = self._idle.pop(key, None)
+        if worker is None or not worker.alive:
+            worker = CatFileWorker(repo_path)
+            with self._lock:
+                self.spawned += 1
+
+        timer = None
+        if timeout:
+            timer = threading.Timer(timeout, worker.process.kill)
+            timer.daemon = True
+            timer.start()
+
+        ok = False
+        try:
+            yield worker
+            ok = True
+        finally:
+            if timer:
+                timer.cancel()
+            if ok and worker.alive:
+                self._release(key, worker)
+            else:
+                worker.close()
+
+    def _release(self, key: str, worker: CatFileWorker) -> None:
+        """把进程放回池中"""
+        worker.last_used = time.monotonic()
+        evicted = []
+        with self._lock:
+            if key in self._idle:
+                # 同一仓库被并发使用时只保留一个进程
+                evicted.append(self._idle.pop(key))
+            self._idle[key] = worker
+            while len(self._idle) > self.max_workers:
+                evicted.append(self._idle.popitem(last=False)[1])
+            if self._reaper is None and self.idle_seconds:
+                self._stop.clear()
+                self._reaper = threading.Thread(target=self._reap_loop, name="git-pool-reaper", daemon=True)
+                self._reaper.start()
+        for old in evicted:
+            old.close()
+
+    def close_idle(self, max_idle: Optional[float] = None) -> int:
+        """关闭空闲超时的进程
+
+        Args:
+            max_idle: 空闲时间阈值（秒），None 时使用 idle_seconds，0 表示关闭所有空闲进程
+
+        Returns:
+            关闭的进程数
+        """
+        max_idle = self.idle_seconds if max_idle is None else max_idle
+        deadline = time.monotonic() - max_idle
+        with self._lock:
+            expired = [key for key, worker in self._idle.items() if worker.last_used <= deadline]
+            workers = [self._idle.pop(key) for key in expired]
+        for worker in workers:
+            worker.close()
+        if workers:
+            logger.debug(f"关闭 {len(workers)} 个空闲的 git 进程")
+        return len(workers)
+
+    def _reap_loop(self) -> None:
+        """后台线程：定期关闭空闲进程，池为空或进程池关闭时退出"""
+        while not self._stop.wait(max(0.5, self.idle_seconds / 2)):
+            self.close_idle()
+            with self._lock:
+                if not self._idle:
+                    # 与检查在同一次加锁中清除，之后放回进程的 _release 会启动新的后台线程
+                    if self._reaper is threading.current_thread():
+                        self._reaper = None
+                    return
+        with self._lock:
+            if self._reaper is threading.current_thread():
+                self._reaper = None
+
+    def close(self) -> None:
+        """关闭所有空闲进程并停止后台线程"""
+        self._stop.set()
+        self.close_idle(0)
+
+    def walk(self, repo_path: Path, include: Iterable[str], exclude: Iterable[str] = (),
+             since: Optional[int] = None, timeout: Optional[float] = None) -> WalkResult:
+        """按提交时间倒序遍历 include 可达、exclude 不可达的提交（相当于 git rev-list include ^exclude）
+
+        与 git 相同，假设提交时间不早于其父提交。
+
+        Args:
+            repo_path: 仓库路径
+            include: 起始提交
+            exclude: 排除的提交（及其所有祖先）
+            since: 遇到早于该时间戳的提交即停止，None 表示遍历到底
+            timeout: 超时时间（秒）
+
+        Returns:
+            遍历到的提交（从新到旧），以及作为某个遍历提交父提交、但被排除的提交集合
+
+        Raises:
+            GitTimeout: 超过超时时间
+        """
+        commits: Dict[str, Optional[CommitInfo]] = {}
+        uninteresting: Set[str] = set()
+        propagated: Set[str] = set()
+        queued: Set[str] = set()
+        emitted: List[str] = []
+        boundary: Set[str] = set()
+        heap: List[Tuple[int, int, str, bool]] = []
+        sequence = itertools.count()
+        interesting_left = 0
+        oldest_emitted: Optional[int] = None
+        cut_off = False
+
+        with self.worker(repo_path, timeout) as worker:
+            def push(sha: str, interesting: bool) -> None:
+                nonlocal interesting_left
+                if sha not in commits:
+                    commits[sha] = worker.read_commit(sha)
+                commit = commits[sha]
+                if commit is None:
+                    # 浅克隆等情况下缺失的对象
+                    return
+                heapq.heappush(heap, (-commit.commit_time, next(sequence), sha, interesting))
+                if interesting:
+                    interesting_left += 1
+
+            for sha in exclude:
+                if sha not in uninteresting:
+                    uninteresting.add(sha)
+                    push(sha, False)
+            for sha in include:
+                if sha not in queued and sha not in uninteresting:
+                    queued.add(sha)
+                    push(sha, True)
+
+            while heap:
+                neg_time, _, sha, interesting = heapq.heappop(heap)
+                if interesting:
+                    interesting_left -= 1
+                commit = commits[sha]
+
+                if sha in uninteresting:
+                    # 排除标记沿父提交传播，包括已经输出过的提交（提交时间相同时可能先被当作新提交）
+                    if sha not in propagated:
+                        propagated.add(sha)
+                        for parent in commit.parents:
+                            if parent not in uninteresting:
+                                uninteresting.add(parent)
+                                push(parent, False)
+                elif since is not None and -neg_time < since:
+                    cut_off = True
+                elif not cut_off:
+                    emitted.append(sha)
+                    oldest_emitted = -neg_time
+                    for parent in commit.parents:
+                        if parent in uninteresting:
+                            boundary.add(parent)
+                        elif parent not in queued:
+                            queued.add(parent)
+                            push(parent, True)
+
+                # 没有待遍历的新提交后，继续处理不早于最旧输出提交的排除标记，然后结束
+                if (interesting_left == 0 or cut_off) and \
+                        (oldest_emitted is None or not heap or -heap[0][0] < oldest_emitted):
+                    break
+
+        return WalkResult([(sha, commits[sha]) for sha in emitted if sha not in uninteresting], boundary)
+
+    def read_commit(self, repo_path: Path, rev: str,
+                    timeout: Optional[float] = None) -> Optional[CommitInfo]:
+        """读取单个提交对象
+
+        Args:
+            repo_path: 仓库路径
+            rev: 提交哈希或修订表达式
+            timeout: 超时时间（秒）
+
+        Returns:
+            提交信息，不存在时返回 None
+        """
+        with self.worker(repo_path, timeout) as worker:
+            return worker.read_commit(rev)
+
+    def count(self, repo_path: Path, include: str, exclude: str,
+              timeout: Optional[float] = None) -> int:
+        """统计 include 可达、exclude 不可达的提交数（相当于 git rev-list --count include ^exclude）"""
+        return len(self.walk(repo_path, [include], [exclude], timeout=timeout).commits)
+
+
+_pool: Optional[GitWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_git_pool() -> GitWorkerPool:
+    """获取进程内共享的 git 进程池
+
+    Returns:
+        git 进程池
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = GitWorkerPool()
+        return _pool
+
+
+def close_git_pool() -> None:
+    """关闭共享进程池中的所有进程"""
+    with _pool_lock:
+        pool = _pool
+    if pool is not None:
+        pool.close()
@@ -0,0 +1,143 @@
+"""
+项目标识模块，为每个项目生成不随目录名变化的稳定标识
+
+Git 仓库使用根提交的哈希（"git:<sha>"），同一仓库的不同克隆得到相同标识；
+其他项目生成随机标识（"dir:<uuid>"），之后初始化为 Git 仓库并有提交时升级为 "git:" 标识。
+标识按目录的设备号和 inode 缓存，同一文件系统内重命名或移动目录后仍能找回原标识；
+inode 可能被删除后新建的目录复用，因此同时记录目录路径和第一层文件名用于核对。
+"""
+
+import os
+import uuid
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from loguru import logger
+
+from config import STATE_DIR
+from state import StateFile
+from git_activity import find_git_dir
+from git_pool import GitTimeout, get_git_pool
+
+# 标识缓存文件
+IDENTITY_CACHE_FILE = STATE_DIR / "identities.json"
+
+# 缓存格式版本
+IDENTITY_CACHE_VERSION = 2
+
+# 核对目录时记录的第一层文件名数量上限
+DIR_NAMES_LIMIT = 64
+
+# "设备号:inode" -> {"id": 项目标识, "path": 目录路径, "names": 第一层文件名}（路径和文件名只用于 "dir:" 标识）
+_cache = StateFile(IDENTITY_CACHE_FILE, IDENTITY_CACHE_VERSION)
+
+
+def git_root_commit(project_path: Path, timeout: Optional[float] = None) -> Optional[str]:
+    """获取 HEAD 可达的根提交（有多个根提交时取哈希最小的一个）
+
+    Args:
+        project_path: 项目路径
+        timeout: 超时时间（秒）
+
+    Returns:
+        根提交哈希，空仓库或 git 失败时返回 None
+
+    Raises:
+        GitTimeout: 超过超时时间
+    """
+    try:
+        result = subprocess.run(["git", "rev-list", "--max-parents=0", "HEAD"], cwd=project_path,
+                                capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        raise GitTimeout("rev-list")
+    except OSError as e:
+        logger.debug(f"无法运行 git: {project_path} - {str(e)}")
+        return None
+    roots = result.stdout.split() if result.returncode == 0 else []
+    return min(roots) if roots else None
+
+
+def _dir_names(project_path: Path) -> List[str]:
+    """返回目录第一层的文件名（排序后最多 DIR_NAMES_LIMIT 个）"""
+    try:
+        return sorted(os.listdir(project_path))[:DIR_NAMES_LIMIT]
+    except OSError:
+        return []
+
+
+def _dir_entry(project_path: Path, identity: str) -> Dict[str, Any]:
+    """生成 "dir:" 标识的缓存项"""
+    return {"id": identity, "path": os.path.abspath(project_path), "names": _dir_names(project_path)}
+
+
+def _is_same_dir(project_path: Path, entry: Dict[str, Any]) -> bool:
+    """检查 "dir:" 标识的缓存项是否仍是同一目录
+
+    路径不变即为同一目录；路径变化时可能是目录被移动，也可能是 inode 被新目录复用，
+    此时要求原路径已不存在，且至少一半原有的第一层文件名仍在。
+    """
+    old_path = entry.get("path")
+    if old_path == os.path.abspath(project_path):
+        return True
+    if not old_path or os.path.exists(old_path):
+        return False
+    stored = set(entry.get("names", []))
+    current = set(_dir_names(project_path))
+    if not stored:
+        return not current
+    return len(stored & current) * 2 >= len(stored)
+
+
+def _is_valid(project_path: Path, entry: Any, timeout: Optional[float]) -> bool:
+    """检查缓存的标识是否仍属于该目录（inode 可能被删除后新建的目录复用）"""
+    if not isinstance(entry, dict) or not isinstance(entry.get("id"), str):
+        return False
+    identity = entry["id"]
+    if not identity.startswith("git:"):
+        return _is_same_dir(project_path, entry)
+    if find_git_dir(project_path) is None:
+        return False
+    # 根提交对象仍在仓库中即视为同一仓库，通过常驻 git 进程读取，无需启动新进程
+    return get_git_pool().read_commit(project_path, identity[4:], timeout) is not None
+
+
+def get_project_identity(project_path: Path, timeout: Optional[float] = None) -> Optional[str]:
+    """获取项目的稳定标识
+
+    Args:
+        project_path: 项目路径
+        timeout: git 调用的超时时间（秒）
+
+    Returns:
+        项目标识，目录无法访问时返回 None
+
+    Raises:
+        GitTimeout: git 调用超时
+    """
+    try:
+        st = os.stat(project_path)
+    except OSError:
+        return None
+
+    key = f"{st.st_dev}:{st.st_ino}"
+    entry = _cache.get(key)
+    is_git = find_git_dir(project_path) is not None
+    identity = None
+    if entry is not None and _is_valid(project_path, entry, timeout):
+        identity = entry["id"]
+        if identity.startswith("git:"):
+            return identity
+
+    # 新目录、缓存失效，或 "dir:" 项目已初始化为 Git 仓库（有根提交时升级为 "git:" 标识）
+    root = git_root_commit(project_path, timeout) if is_git else None
+    if root:
+        identity = f"git:{root}"
+        _cache.set(key, {"id": identity})
+        return identity
+
+    # 记录目录的当前路径和文件名，使之后的移动仍能核对
+    identity = identity or f"dir:{uuid.uuid4().hex}"
+    current = _dir_entry(project_path, identity)
+    if current != entry:
+        _cache.set(key, current)
+    return identity
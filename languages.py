@@ -0,0 +1,108 @@
+"""
+语言构成统计模块，按文件扩展名把文件映射为整数语言 ID，并按字节数汇总各语言占比
+"""
+
+import os
+from array import array
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from config import LANGUAGE_EXTENSIONS
+
+# 语言 ID 0 表示未识别的文件（不计入语言构成）
+LANGUAGE_NAMES: List[str] = ["Other"] + list(LANGUAGE_EXTENSIONS)
+
+# 扩展名（小写）到语言 ID 的映射
+EXTENSION_LANGUAGE_IDS: Dict[str, int] = {
+    ext.lower(): lang_id
+    for lang_id, name in enumerate(LANGUAGE_NAMES)
+    if name in LANGUAGE_EXTENSIONS
+    for ext in LANGUAGE_EXTENSIONS[name]
+}
+
+
+def language_id(file_name: str) -> int:
+    """根据文件名返回语言 ID
+
+    Args:
+        file_name: 文件名
+
+    Returns:
+        语言 ID，未识别时为 0
+    """
+    return EXTENSION_LANGUAGE_IDS.get(os.path.splitext(file_name)[1].lower(), 0)
+
+
+def new_id_array() -> array:
+    """创建存放语言 ID 的紧凑数组"""
+    return array("H")
+
+
+def new_size_array() -> array:
+    """创建存放文件字节数的紧凑数组"""
+    return array("q")
+
+
+def bincount(ids: Sequence[int], weights: Sequence[int], length: int) -> List[int]:
+    """按 ID 对权重求和（与 numpy.bincount 的 weights 用法相同）
+
+    安装了 numpy 时使用向量化实现，否则逐项累加。
+
+    Args:
+        ids: ID 数组
+        weights: 与 ids 一一对应的权重数组
+        length: 结果长度
+
+    Returns:
+        每个 ID 的权重之和
+    """
+    if np is not None and len(ids) > 0:
+        id_view = np.frombuffer(ids, dtype=np.uint16) if isinstance(ids, array) else np.asarray(ids)
+        weight_view = np.frombuffer(weights, dtype=np.int64) if isinstance(weights, array) else np.asarray(weights)
+        totals = np.bincount(id_view, weights=weight_view, minlength=length)
+        return [int(value) for value in totals]
+
+    totals = [0] * length
+    for lang_id, weight in zip(ids, weights):
+        totals[lang_id] += weight
+    return totals
+
+
+def language_breakdown(ids: Sequence[int], sizes: Sequence[int]) -> Dict[str, float]:
+    """计算各语言按字节数的占比
+
+    Args:
+        ids: 每个文件的语言 ID
+        sizes: 每个文件的字节数
+
+    Returns:
+        语言名称到占比（0-1）的映射，按占比从高到低排列，不含未识别文件
+    """
+    totals = bincount(ids, sizes, len(LANGUAGE_NAMES))
+    known = sum(totals[1:])
+    if known == 0:
+        return {}
+
+    shares = [
+        (LANGUAGE_NAMES[lang_id], total / known)
+        for lang_id, total in enumerate(totals)
+        if lang_id and total
+    ]
+    shares.sort(key=lambda item: item[1], reverse=True)
+    return {name: round(share, 4) for name, share in shares}
+
+
+def primary_language(breakdown: Dict[str, float]) -> Optional[str]:
+    """返回占比最高的语言
+
+    Args:
+        breakdown: language_breakdown() 的结果
+
+    Returns:
+        主要语言名称，没有可识别的代码时返回 None
+    """
+    return next(iter(breakdown), None)
@@ -4,65 +4,480 @@
 """
 
 import os
+import time
 import argparse
 import sys
+from concurrent.futures import Executor, Future, as_completed
+from functools import partial
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
 from loguru import logger
-from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
 
-from config import SCAN_DIR, LOG_FILE
-from analyzer import get_projects, analyze_project
-from notion_client import sync_projects
-from scheduler import run_scheduler, run_at_specific_time, run_with_cron_expression
+from config import (
+    LOG_FILE,
+    BUDGET_LOG_FILE,
+    NOTION_ARCHIVE_MISSING,
+    CONTROL_HOST,
+    CONTROL_PORT,
+    CONTROL_TOKEN,
+    METRICS_TEXTFILE,
+    get_scan_targets,
+)
+from analyzer import get_projects, get_nested_projects, find_nested_projects, analyze_project
+from project_table import ProjectTable
+from exporter import EXPORT_FORMATS, ProjectExporter
+from state import save_all_state
+from runtime import get_runtime, close_runtime
+from timing import PhaseTimer
+from metrics import RUN_DURATION, LAST_RUN_TIMESTAMP, write_textfile
 
 
-# 配置日志
-logger.remove()  # 移除默认处理器
-logger.add(sys.stderr, level="INFO")  # 添加标准错误输出处理器
-logger.add(LOG_FILE, rotation="500 MB", level="DEBUG")  # 添加文件处理器
+# rich、requests（notion_client、sync_plan、control_server）和 schedule（scheduler）在用到的函数中导入，
+# 使 --help 和 git 钩子触发的 --project 同步不必加载用不到的模块（见 tests/test_main.py）
+if TYPE_CHECKING:
+    from rich.console import Console
 
 
-def execute_sync():
-    """执行项目同步"""
+def setup_logging():
+    """配置日志（日志目录和文件在第一次写入时创建，--help 不会产生日志文件）"""
+    logger.remove()  # 移除默认处理器
+    logger.add(sys.stderr, level="INFO")  # 添加标准错误输出处理器
+    logger.add(LOG_FILE, rotation="500 MB", level="DEBUG", delay=True)  # 添加文件处理器
+    logger.add(BUDGET_LOG_FILE, rotation="50 MB", level="WARNING", delay=True,
+               filter=lambda record: record["extra"].get("budget"))  # 触发分析预算限制的项目
+
+
+def submit_analysis(targets: List[Dict[str, Any]], analysis_pool: Executor,
+                    console: "Console") -> List[Tuple[Dict[str, Any], List[Future]]]:
+    """扫描所有目标目录，并把分析任务提交到线程池
+
+    Args:
+        targets: 扫描目标列表
+        analysis_pool: 执行分析的线程池
+        console: 输出错误信息的控制台
+
+    Returns:
+        (扫描目标, 分析任务列表) 的列表，没有找到项目的目标不包含在内
+    """
+    pending = []
+    for target in targets:
+        scan_dir = target["scan_dir"]
+        project_paths = get_projects(scan_dir)
+        
+        if not project_paths:
+            logger.error(f"没有在 {scan_dir} 找到任何项目")
+            console.print(f"[bold red]错误：没有在 {scan_dir} 找到任何项目[/bold red]")
+            continue
+        
+        # 嵌套的子项目单独分析，不计入父项目
+        nested_projects = get_nested_projects(project_paths)
+        futures = [
+            analysis_pool.submit(analyze_project, project_path, nested_projects.get(project_path, []))
+            for project_path in project_paths
+        ]
+        pending.append((target, futures))
+    return pending
+
+
+def find_target(project_path: Path, targets: List[Dict[str, Any]]) -> Optional[Tuple[Dict[str, Any], Path]]:
+    """找到包含项目的扫描目标（扫描目录相互嵌套时取最近的一个）
+
+    Args:
+        project_path: 项目路径
+        targets: 扫描目标列表
+
+    Returns:
+        (扫描目标, 以扫描目录为前缀的项目路径)，项目不在任何扫描目录中时返回 None
+    """
+    resolved = project_path.resolve()
+    found = None
+    for target in targets:
+        scan_dir = target["scan_dir"].resolve()
+        if scan_dir not in resolved.parents:
+            continue
+        if found is None or len(scan_dir.parts) > len(found[1].parts):
+            found = (target, scan_dir)
+    if found is None:
+        return None
+    target, scan_dir = found
+    # 与全量扫描得到的路径保持一致（页面的“路径”属性不因调用方式而变化）
+    return target, target["scan_dir"] / resolved.relative_to(scan_dir)
+
+
+def resolve_project(name: str, targets: List[Dict[str, Any]]) -> Optional[Path]:
+    """把项目名称（扫描目录下的相对路径）解析为项目路径
+
+    Args:
+        name: 项目名称，例如 "api" 或 "org/team/repo"
+        targets: 扫描目标列表
+
+    Returns:
+        第一个包含该项目的扫描目录下的项目路径，找不到（或路径不在扫描目录中）时返回 None
+    """
+    for target in targets:
+        project_path = target["scan_dir"] / name
+        if project_path.is_dir() and find_target(project_path, targets) is not None:
+            return project_path
+    return None
+
+
+def submit_projects(project_paths: List[Path], targets: List[Dict[str, Any]], analysis_pool: Executor,
+                    console: "Console") -> List[Tuple[Dict[str, Any], List[Future]]]:
+    """只把指定项目的分析任务提交到线程池，不扫描整个扫描目录
+
+    Args:
+        project_paths: 项目路径列表
+        targets: 扫描目标列表
+        analysis_pool: 执行分析的线程池
+        console: 输出错误信息的控制台
+
+    Returns:
+        与 submit_analysis 相同格式的 (扫描目标, 分析任务列表) 列表
+    """
+    grouped: Dict[str, Tuple[Dict[str, Any], Dict[Path, None]]] = {}
+    for project_path in project_paths:
+        found = find_target(project_path, targets) if project_path.is_dir() else None
+        if found is None:
+            logger.error(f"项目不存在或不在任何扫描目录中: {project_path}")
+            console.print(f"[bold red]错误：项目不存在或不在任何扫描目录中: {project_path}[/bold red]")
+            continue
+        target, path = found
+        grouped.setdefault(str(target["scan_dir"]), (target, {}))[1][path] = None
+    
+    pending = []
+    for target, paths in grouped.values():
+        futures = []
+        for path in paths:
+            depth = len(path.relative_to(target["scan_dir"]).parts)
+            futures.append(analysis_pool.submit(analyze_project, path, find_nested_projects(path, depth)))
+        pending.append((target, futures))
+    return pending
+
+
+def execute_export(export_path: Path):
+    """只分析项目并把结果导出到文件，不访问 Notion
+
+    每个项目分析完成后立即写入，全部完成后原子替换目标文件。
+
+    Args:
+        export_path: 导出文件路径（.jsonl 或 .csv）
+    """
+    from rich.console import Console
+    from rich.panel import Panel
+    
     console = Console()
+    targets = get_scan_targets()
+    runtime = get_runtime()
     
     with console.status("[bold green]扫描项目目录...") as status:
-        # 扫描项目
-        project_paths = get_projects(SCAN_DIR)
-        
-        if not project_paths:
-            logger.error(f"没有在 {SCAN_DIR} 找到任何项目")
-            console.print(f"[bold red]错误：没有在 {SCAN_DIR} 找到任何项目[/bold red]")
+        pending = submit_analysis(targets, runtime.analysis_pool, console)
+        if not pending:
             return
         
-        status.update(f"[bold green]正在分析 {len(project_paths)} 个项目...")
-        
-        # 分析项目
-        projects_info = []
-        for i, project_path in enumerate(project_paths):
-            status.update(f"[bold green]正在分析项目 ({i+1}/{len(project_paths)}): {project_path.name}")
-            project_info = analyze_project(project_path)
-            projects_info.append(project_info)
+        futures = [future for _, target_futures in pending for future in target_futures]
+        with ProjectExporter(export_path) as exporter:
+            for future in as_completed(futures):
+                exporter.write(future.result())
+                status.update(f"[bold green]正在分析项目 ({exporter.count}/{len(futures)})...")
+    
+    runtime.end_run()
+    
+    console.print(Panel.fit(
+        f"[bold green]导出完成！[/bold green] 共 {exporter.count} 个项目: {export_path}",
+        title="Notion 项目更新器"
+    ))
+
+
+def iter_analyzed(pending: List[Tuple[Dict[str, Any], List[Future]]], status, console: "Console",
+                  timer: Optional[PhaseTimer] = None) -> Iterator[Tuple[Dict[str, Any], ProjectTable]]:
+    """按目标依次收集分析结果，后续目标的分析在调用方处理当前目标期间继续进行
+
+    Args:
+        pending: submit_analysis 返回的分析任务
+        status: 显示进度的状态栏
+        console: 输出提示信息的控制台
+        timer: 记录等待分析结果耗时（analyze 阶段）的计时器
+
+    Yields:
+        (扫描目标, 该目标的项目表)
+    """
+    total = sum(len(futures) for _, futures in pending)
+    status.update(f"[bold green]正在分析 {total} 个项目...")
+    
+    timer = timer or PhaseTimer()
+    analyzed = 0
+    for target, futures in pending:
+        projects_info = ProjectTable()
+        with timer.phase("analyze"):
+            for future in futures:
+                projects_info.append(future.result())
+                analyzed += 1
+                status.update(f"[bold green]正在分析项目 ({analyzed}/{total})...")
         
-        status.update(f"[bold green]正在同步 {len(projects_info)} 个项目到 Notion...")
+        save_all_state()
         
-        # 同步到 Notion
-        result = sync_projects(projects_info)
+        truncated = projects_info.where(truncated=True)
+        if truncated:
+            console.print(f"[bold yellow]{len(truncated)} 个项目触发分析预算限制，"
+                          f"仅同步部分结果（详见 {BUDGET_LOG_FILE}）[/bold yellow]")
+        yield target, projects_info
+
+
+def can_archive(target: Dict[str, Any], targets: List[Dict[str, Any]]) -> bool:
+    """判断是否可以归档目标数据库中找不到的项目
+
+    多个扫描目标同步到同一个数据库时，单个目标的扫描结果不完整，不归档。
+
+    Args:
+        target: 当前扫描目标
+        targets: 所有扫描目标
+
+    Returns:
+        是否可以归档
+    """
+    shared = sum(1 for other in targets if other["database_id"] == target["database_id"])
+    return NOTION_ARCHIVE_MISSING and shared == 1
+
+
+def print_results(console: "Console", title: str, results: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+                  rows: List[Tuple[str, str]]):
+    """按扫描目标分列显示统计结果
+
+    Args:
+        console: 控制台
+        title: 表格标题
+        results: (扫描目标, 统计结果) 列表
+        rows: (行标签, 统计字段) 列表
+    """
+    from rich.table import Table
     
-    # 显示同步结果
-    table = Table(title="同步结果")
+    table = Table(title=title)
     table.add_column("类型", style="cyan")
-    table.add_column("数量", style="magenta")
+    for target, _ in results:
+        header = "数量" if len(results) == 1 else str(target["scan_dir"])
+        table.add_column(header, style="magenta")
     
-    table.add_row("总计项目", str(result["total"]))
-    table.add_row("新建项目", str(result["created"]))
-    table.add_row("更新项目", str(result["updated"]))
-    table.add_row("失败项目", str(result["failed"]))
-    table.add_row("跳过项目", str(result["skipped"]))
+    for label, key in rows:
+        table.add_row(label, *[str(result[key]) for _, result in results])
     
     console.print(table)
+
+
+def run_summary(timer: PhaseTimer, results: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> Dict[str, Any]:
+    """汇总一次运行的阶段耗时和各扫描目标的同步结果（可序列化为 JSON）
+
+    Args:
+        timer: 本次运行的计时器
+        results: (扫描目标, 统计结果) 列表
+
+    Returns:
+        运行摘要
+    """
+    return {
+        "phases": timer.summary(),
+        "results": [dict(result, scan_dir=str(target["scan_dir"])) for target, result in results],
+    }
+
+
+def record_run(mode: str, timer: PhaseTimer):
+    """记录一次同步的运行指标，配置了 METRICS_TEXTFILE 时写入指标文件
+
+    Args:
+        mode: 运行方式（full 或 projects）
+        timer: 本次运行的计时器
+    """
+    RUN_DURATION.observe(timer.summary()["total"], mode=mode)
+    LAST_RUN_TIMESTAMP.set(time.time(), mode=mode)
+    if METRICS_TEXTFILE:
+        try:
+            write_textfile(Path(METRICS_TEXTFILE))
+        except OSError as e:
+            logger.warning(f"写入指标文件失败: {METRICS_TEXTFILE} - {str(e)}")
+
+
+def execute_sync() -> Optional[Dict[str, Any]]:
+    """执行项目同步
+
+    所有扫描目标共享同一个分析线程池、写入线程池、HTTP 会话和按 API 密钥划分的限流器；
+    定时运行时这些资源在各次运行之间复用（见 runtime.py）。
+
+    Returns:
+        运行摘要（阶段耗时和同步结果），没有找到任何项目时返回 None
+    """
+    from rich.console import Console
+    from rich.panel import Panel
+    from notion_client import NotionClient, sync_projects
+    
+    console = Console()
+    targets = get_scan_targets()
+    timer = PhaseTimer()
+    runtime = get_runtime()
+    results = []
+    
+    with console.status("[bold green]扫描项目目录...") as status:
+        # 扫描所有目标目录，并把分析任务提交到共享线程池
+        with timer.phase("discover"):
+            pending = submit_analysis(targets, runtime.analysis_pool, console)
+        if not pending:
+            return None
+        
+        for target, projects_info in iter_analyzed(pending, status, console, timer):
+            status.update(f"[bold green]正在同步 {len(projects_info)} 个项目到 Notion ({target['scan_dir']})...")
+            
+            # 同步到 Notion
+            client = NotionClient(target["api_key"], target["database_id"])
+            with timer.phase("sync"):
+                results.append((target, sync_projects(projects_info, client=client, executor=runtime.sync_pool,
+                                                      archive_missing=can_archive(target, targets))))
+    
+    # 保存本地记录的页面映射，需要时回收常驻资源
+    runtime.end_run()
+    
+    # 显示同步结果
+    print_results(console, "同步结果", results,
+                  [("总计项目", "total"), ("新建项目", "created"), ("更新项目", "updated"),
+                   ("归档项目", "archived"), ("失败项目", "failed"), ("跳过项目", "skipped")])
+    console.print(Panel.fit(
+        "[bold green]同步完成！[/bold green] 详细日志请查看: " + str(LOG_FILE),
+        title="Notion 项目更新器"
+    ))
+    record_run("full", timer)
+    return run_summary(timer, results)
+
+
+def execute_project_sync(project_paths: List[Path]) -> Optional[Dict[str, Any]]:
+    """只分析并同步指定的项目
+
+    不扫描整个扫描目录，也不读取整个数据库：页面按本地记录或按名称过滤查询查找，
+    只写入这些项目的页面，不归档其他页面。适合在 git 钩子或 CI 中调用。
+
+    Args:
+        project_paths: 项目路径列表
+
+    Returns:
+        运行摘要（阶段耗时和同步结果），没有可分析的项目时返回 None
+    """
+    from rich.console import Console
+    from notion_client import NotionClient, sync_projects
+    
+    console = Console()
+    targets = get_scan_targets()
+    timer = PhaseTimer()
+    runtime = get_runtime()
+    results = []
+    
+    with console.status("[bold green]分析指定项目...") as status:
+        with timer.phase("discover"):
+            pending = submit_projects(project_paths, targets, runtime.analysis_pool, console)
+        if not pending:
+            return None
+        
+        for target, projects_info in iter_analyzed(pending, status, console, timer):
+            status.update(f"[bold green]正在同步 {len(projects_info)} 个项目到 Notion ({target['scan_dir']})...")
+            client = NotionClient(target["api_key"], target["database_id"])
+            with timer.phase("sync"):
+                results.append((target, sync_projects(projects_info, client=client, executor=runtime.sync_pool,
+                                                      targeted=True)))
+    
+    runtime.end_run()
+    
+    print_results(console, "同步结果", results,
+                  [("总计项目", "total"), ("新建项目", "created"), ("更新项目", "updated"),
+                   ("失败项目", "failed")])
+    record_run("projects", timer)
+    return run_summary(timer, results)
+
+
+def execute_plan(plan_path: Path):
+    """分析项目并计算同步计划，不写入 Notion
+
+    显示各类操作的数量和按当前限流速率估算的耗时，并把计划保存到文件供 --apply 执行。
+
+    Args:
+        plan_path: 计划文件路径
+    """
+    from rich.console import Console
+    from rich.panel import Panel
+    from notion_client import NotionClient
+    from sync_plan import (
+        OP_CREATE,
+        OP_UPDATE,
+        OP_SKIP,
+        OP_ARCHIVE,
+        build_plan,
+        plan_counts,
+        plan_requests,
+        estimate_seconds,
+        save_plans,
+    )
+    
+    console = Console()
+    targets = get_scan_targets()
+    runtime = get_runtime()
+    plans = []
+    results = []
+    
+    with console.status("[bold green]扫描项目目录...") as status:
+        pending = submit_analysis(targets, runtime.analysis_pool, console)
+        if not pending:
+            return
+        
+        for target, projects_info in iter_analyzed(pending, status, console):
+            status.update(f"[bold green]正在比对 Notion 数据库 ({target['scan_dir']})...")
+            client = NotionClient(target["api_key"], target["database_id"])
+            plan = build_plan(projects_info, client, archive_missing=can_archive(target, targets))
+            counts = plan_counts(plan)
+            counts["requests"] = plan_requests(plan)
+            counts["schema"] = len(plan["schema"] or {})
+            counts["estimate"] = f"{estimate_seconds(plan):.0f} 秒"
+            plans.append(plan)
+            results.append((target, counts))
+    
+    runtime.end_run()
+    save_plans(plans, plan_path)
+    
+    print_results(console, "同步计划", results,
+                  [("新建项目", OP_CREATE), ("更新项目", OP_UPDATE), ("跳过项目", OP_SKIP),
+                   ("归档项目", OP_ARCHIVE), ("结构变更属性", "schema"), ("请求数", "requests"),
+                   ("预计耗时", "estimate")])
+    console.print(Panel.fit(
+        f"[bold green]计划已保存！[/bold green] 确认后执行: python main.py --apply {plan_path}",
+        title="Notion 项目更新器"
+    ))
+
+
+def execute_apply(plan_path: Path):
+    """执行保存的同步计划，不重新分析项目
+
+    Args:
+        plan_path: 计划文件路径
+    """
+    from rich.console import Console
+    from rich.panel import Panel
+    from notion_client import NotionClient
+    from sync_plan import load_plans, apply_plan
+    
+    console = Console()
+    targets = {target["database_id"]: target for target in get_scan_targets()}
+    plans = load_plans(plan_path)
+    runtime = get_runtime()
+    results = []
+    
+    with console.status("[bold green]正在执行同步计划...") as status:
+        for plan in plans:
+            target = targets.get(plan["database_id"])
+            if target is None:
+                console.print(f"[bold red]错误：计划中的数据库不在当前配置中: {plan['database_id']}[/bold red]")
+                continue
+            status.update(f"[bold green]正在执行同步计划 ({target['scan_dir']})...")
+            client = NotionClient(target["api_key"], target["database_id"])
+            results.append((target, apply_plan(plan, client, executor=runtime.sync_pool)))
+    
+    runtime.end_run()
+    
+    print_results(console, "同步结果", results,
+                  [("总计项目", "total"), ("新建项目", "created"), ("更新项目", "updated"),
+                   ("归档项目", "archived"), ("失败项目", "failed"), ("跳过项目", "skipped")])
     console.print(Panel.fit(
         "[bold green]同步完成！[/bold green] 详细日志请查看: " + str(LOG_FILE),
         title="Notion 项目更新器"
@@ -71,6 +486,16 @@ def execute_sync():
 
 def main():
     """主程序入口"""
+    setup_logging()
+    try:
+        cli()
+    finally:
+        # 关闭常驻的线程池和 git 进程，保存本地状态
+        close_runtime()
+
+
+def cli():
+    """解析命令行参数并执行"""
     # 解析命令行参数
     parser = argparse.ArgumentParser(description="Notion 项目更新器 - 自动扫描并同步代码项目到 Notion 数据库")
     
@@ -78,54 +503,145 @@ def main():
     parser.add_argument("--interval", type=int, default=24, help="执行间隔（小时）")
     parser.add_argument("--time", type=str, help="每天固定执行时间（格式：HH:MM）")
     parser.add_argument("--cron", type=str, help="使用 cron 表达式设置执行计划")
+    parser.add_argument("--serve", action="store_true",
+                        help="定时运行模式下启动控制服务（POST /sync 触发同步，GET /status 查看状态）")
+    parser.add_argument("--port", type=int, default=CONTROL_PORT, help=f"控制服务端口（默认 {CONTROL_PORT}）")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--export", type=Path, metavar="PATH",
+                      help="只分析项目并导出到文件（.jsonl 或 .csv），不同步到 Notion")
+    mode.add_argument("--plan", type=Path, nargs="?", const=Path("sync-plan.json"), metavar="PATH",
+                      help="只计算同步计划并保存到文件（默认 sync-plan.json），不写入 Notion")
+    mode.add_argument("--apply", type=Path, metavar="PATH", help="执行保存的同步计划，不重新分析项目")
+    mode.add_argument("--project", type=Path, action="append", metavar="PATH",
+                      help="只分析并同步指定的项目（可重复），不扫描整个目录")
     
     args = parser.parse_args()
     
     # 创建控制台
+    from rich.console import Console
+    from rich.panel import Panel
+    
     console = Console()
     
+    if args.export and args.export.suffix.lower() not in EXPORT_FORMATS:
+        console.print(f"[bold red]错误：不支持的导出格式 {args.export.suffix}，请使用 "
+                      f"{' 或 '.join(EXPORT_FORMATS)}[/bold red]")
+        return
+    
+    if args.serve and (not args.schedule or args.export or args.plan or args.apply):
+        console.print("[bold red]错误：--serve 只能与 --schedule 一起用于同步模式[/bold red]")
+        return
+    
     # 显示欢迎信息
+    targets = get_scan_targets()
+    scan_dirs = "\n".join(f"  [bold yellow]{target['scan_dir']}[/bold yellow]" for target in targets)
+    if args.apply:
+        summary = f"将执行保存的同步计划: {args.apply}"
+    elif args.project:
+        projects = "\n".join(f"  [bold yellow]{path}[/bold yellow]" for path in args.project)
+        summary = f"将分析以下项目\n{projects}\n并同步到 Notion 数据库"
+    elif args.export:
+        summary = f"将扫描以下目录中的所有代码项目\n{scan_dirs}\n并导出到 {args.export}"
+    elif args.plan:
+        summary = f"将扫描以下目录中的所有代码项目\n{scan_dirs}\n并计算同步计划（保存到 {args.plan}）"
+    else:
+        summary = f"将扫描以下目录中的所有代码项目\n{scan_dirs}\n并自动同步到 Notion 数据库"
     console.print(Panel.fit(
-        "[bold cyan]Notion 项目更新器[/bold cyan]\n\n"
-        f"将扫描 [bold yellow]{SCAN_DIR}[/bold yellow] 目录下的所有代码项目\n"
-        "并自动同步到 Notion 数据库",
+        "[bold cyan]Notion 项目更新器[/bold cyan]\n\n" + summary,
         title="欢迎"
     ))
     
-    # 检查 API 配置
-    if os.environ.get("NOTION_API_KEY") == "your-secret-api-key" or os.environ.get("NOTION_DATABASE_ID") == "your-database-id":
+    # 检查 API 配置（导出模式不需要）
+    unconfigured = (os.environ.get("NOTION_API_KEY") == "your-secret-api-key"
+                    or os.environ.get("NOTION_DATABASE_ID") == "your-database-id")
+    if unconfigured and not args.export:
         console.print("[bold red]警告：尚未配置 Notion API 密钥或数据库 ID[/bold red]")
         console.print("请在 .env 文件中设置 NOTION_API_KEY 和 NOTION_DATABASE_ID 环境变量")
         return
     
+    # 执行保存的计划（不需要扫描目录）
+    if args.apply:
+        execute_apply(args.apply)
+        return
+    
+    # 只同步指定项目（项目所在的扫描目录必须已配置）
+    if args.project and not args.schedule:
+        execute_project_sync(args.project)
+        return
+    
     # 检查扫描目录
-    if not SCAN_DIR.exists() or not SCAN_DIR.is_dir():
-        console.print(f"[bold red]错误：扫描目录不存在或不是一个有效的目录: {SCAN_DIR}[/bold red]")
+    valid_dirs = [target["scan_dir"] for target in targets if target["scan_dir"].is_dir()]
+    for target in targets:
+        if target["scan_dir"] not in valid_dirs:
+            console.print(f"[bold red]错误：扫描目录不存在或不是一个有效的目录: {target['scan_dir']}[/bold red]")
+    if not valid_dirs:
         return
     
-    # 执行同步或启动调度器
+    # 执行同步（或导出、计算计划）或启动调度器
+    if args.export:
+        job = partial(execute_export, args.export)
+    elif args.plan:
+        job = partial(execute_plan, args.plan)
+    elif args.project:
+        job = partial(execute_project_sync, args.project)
+    else:
+        job = execute_sync
+    
+    # 控制服务：定时任务和触发的同步都通过同一个队列执行，不会重叠
+    server = None
+    if args.serve:
+        from control_server import SyncQueue, ControlServer
+        
+        sync_queue = SyncQueue(execute_sync, execute_project_sync)
+        try:
+            server = ControlServer(sync_queue, partial(resolve_project, targets=targets),
+                                   CONTROL_HOST, args.port, CONTROL_TOKEN)
+        except OSError as e:
+            console.print(f"[bold red]错误：无法启动控制服务 {CONTROL_HOST}:{args.port} - {str(e)}[/bold red]")
+            return
+        server.start()
+        console.print(f"[bold green]控制服务已启动: {server.address}[/bold green]")
+        job = partial(sync_queue.submit, args.project)
+    
+    try:
+        run_job(job, args, console)
+    finally:
+        if server is not None:
+            server.close()
+
+
+def run_job(job, args: argparse.Namespace, console: "Console"):
+    """立即执行任务，或按命令行参数启动调度器
+
+    Args:
+        job: 要执行的任务函数
+        args: 命令行参数
+        console: 控制台
+    """
     if args.schedule:
+        from scheduler import run_scheduler, run_at_specific_time, run_with_cron_expression
+        
         if args.time:
             try:
                 hour, minute = map(int, args.time.split(':'))
                 console.print(f"[bold green]启动定时运行模式，将在每天 {hour:02d}:{minute:02d} 执行[/bold green]")
-                run_at_specific_time(execute_sync, hour, minute)
+                run_at_specific_time(job, hour, minute)
             except ValueError:
                 console.print("[bold red]错误：时间格式无效，请使用 HH:MM 格式[/bold red]")
                 return
         elif args.cron:
             console.print(f"[bold green]启动定时运行模式，cron 表达式: {args.cron}[/bold green]")
-            run_with_cron_expression(execute_sync, args.cron)
+            run_with_cron_expression(job, args.cron)
         else:
             interval = args.interval
             console.print(f"[bold green]启动定时运行模式，每 {interval} 小时执行一次[/bold green]")
             # 先执行一次
-            execute_sync()
+            job()
             # 然后启动调度器
-            run_scheduler(execute_sync, interval)
+            run_scheduler(job, interval)
     else:
-        # 立即执行同步
-        execute_sync()
+        # 立即执行
+        job()
 
 
 if __name__ == "__main__":
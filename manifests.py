@@ -0,0 +1,247 @@
+"""
+清单文件解析模块，按需解析 package.json、pyproject.toml 等文件中的真实依赖，
+解析结果按文件大小和修改时间缓存
+"""
+
+import os
+import re
+import json
+from pathlib import Path
+from typing import Dict, Optional, Any
+from loguru import logger
+
+try:
+    import tomllib  # Python 3.11+
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+from config import STATE_DIR
+from state import StateFile
+from metrics import CACHE_REQUESTS
+
+# 清单解析缓存文件
+MANIFEST_CACHE_FILE = STATE_DIR / "manifests.json"
+
+# 缓存格式版本，解析逻辑变化时递增以丢弃旧数据
+MANIFEST_CACHE_VERSION = 1
+
+# 单个清单文件的最大读取字节数，超过时跳过解析
+MAX_MANIFEST_BYTES = 1024 * 1024
+
+# 路径 -> [大小, mtime 纳秒, 解析结果]
+_cache = StateFile(MANIFEST_CACHE_FILE, MANIFEST_CACHE_VERSION)
+
+
+def _empty_result() -> Dict[str, Any]:
+    """空的解析结果"""
+    return {"dependencies": [], "description": None, "name": None}
+
+
+def _normalize_name(spec: str) -> str:
+    """从依赖声明中提取规范化的包名（小写，去掉版本约束和 extras）"""
+    spec = spec.strip()
+    if "://" in spec:
+        return ""
+    match = re.match(r"^(@?[A-Za-z0-9][A-Za-z0-9._\-/]*)", spec)
+    return match.group(1).lower() if match else ""
+
+
+def _parse_toml_light(text: str) -> Dict[str, Any]:
+    """没有 tomllib 时的简易 TOML 解析，只支持表头、字符串和字符串数组"""
+    data: Dict[str, Any] = {}
+    table = data
+    key = None
+    buffer = None
+
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if buffer is not None:
+            buffer += " " + line
+            if "]" in line:
+                table[key] = re.findall(r'"([^"]*)"|\'([^\']*)\'', buffer)
+                table[key] = [a or b for a, b in table[key]]
+                buffer = None
+            continue
+        if not line or line.startswith("#"):
+            continue
+        header = re.match(r"^\[+([^\]]+)\]+$", line)
+        if header:
+            table = data
+            for part in header.group(1).strip().split("."):
+                table = table.setdefault(part.strip().strip('"'), {})
+            continue
+        match = re.match(r'^([A-Za-z0-9_.\-"]+)\s*=\s*(.*)$', line)
+        if not match:
+            continue
+        key, value = match.group(1).strip('"'), match.group(2).strip()
+        if value.startswith("[") and "]" not in value:
+            buffer = value
+        elif value.startswith("["):
+            table[key] = [a or b for a, b in re.findall(r'"([^"]*)"|\'([^\']*)\'', value)]
+        elif value[:1] in ('"', "'"):
+            table[key] = value[1:].split(value[0], 1)[0]
+        else:
+            table[key] = value
+    return data
+
+
+def _load_toml(text: str) -> Dict[str, Any]:
+    """解析 TOML 文本"""
+    if tomllib is not None:
+        return tomllib.loads(text)
+    return _parse_toml_light(text)
+
+
+def _parse_package_json(text: str) -> Dict[str, Any]:
+    """解析 package.json"""
+    data = json.loads(text)
+    deps = []
+    for section in ("dependencies", "devDependencies", "peerDependencies"):
+        deps.extend((data.get(section) or {}).keys())
+    description = data.get("description")
+    return {
+        "dependencies": sorted({name.lower() for name in deps}),
+        "description": description if isinstance(description, str) else None,
+        "name": data.get("name"),
+    }
+
+
+def _parse_pyproject(text: str) -> Dict[str, Any]:
+    """解析 pyproject.toml（PEP 621 和 Poetry）"""
+    data = _load_toml(text)
+    project = data.get("project") or {}
+    poetry = (data.get("tool") or {}).get("poetry") or {}
+
+    deps = [_normalize_name(dep) for dep in project.get("dependencies") or [] if isinstance(dep, str)]
+    for extra in (project.get("optional-dependencies") or {}).values():
+        deps.extend(_normalize_name(dep) for dep in extra if isinstance(dep, str))
+    for section in (poetry.get("dependencies"), poetry.get("dev-dependencies")):
+        if isinstance(section, dict):
+            deps.extend(name.lower() for name in section if name.lower() != "python")
+
+    description = project.get("description") or poetry.get("description")
+    return {
+        "dependencies": sorted(set(filter(None, deps))),
+        "description": description if isinstance(description, str) else None,
+        "name": project.get("name") or poetry.get("name"),
+    }
+
+
+def _parse_requirements(text: str) -> Dict[str, Any]:
+    """解析 requirements.txt"""
+    deps = set()
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line or line.startswith("-"):
+            continue
+        name = _normalize_name(line)
+        if name:
+            deps.add(name)
+    result = _empty_result()
+    result["dependencies"] = sorted(deps)
+    return result
+
+
+def _parse_go_mod(text: str) -> Dict[str, Any]:
+    """解析 go.mod"""
+    deps = set()
+    in_block = False
+    name = None
+    for line in text.splitlines():
+        line = line.split("//", 1)[0].strip()
+        if line.startswith("module "):
+            name = line.split()[1]
+        elif line.startswith("require ("):
+            in_block = True
+        elif in_block and line == ")":
+            in_block = False
+        elif in_block and line:
+            deps.add(line.split()[0].lower())
+        elif line.startswith("require "):
+            parts = line.split()
+            if len(parts) >= 2:
+                deps.add(parts[1].lower())
+    result = _empty_result()
+    result["dependencies"] = sorted(deps)
+    result["name"] = name
+    return result
+
+
+def _parse_cargo_toml(text: str) -> Dict[str, Any]:
+    """解析 Cargo.toml"""
+    data = _load_toml(text)
+    deps = set()
+    for section in ("dependencies", "dev-dependencies", "build-dependencies"):
+        table = data.get(section)
+        if isinstance(table, dict):
+            deps.update(name.lower() for name in table)
+    package = data.get("package") or {}
+    description = package.get("description")
+    return {
+        "dependencies": sorted(deps),
+        "description": description if isinstance(description, str) else None,
+        "name": package.get("name"),
+    }
+
+
+# 支持的清单文件名到解析函数的映射
+MANIFEST_PARSERS = {
+    "package.json": _parse_package_json,
+    "pyproject.toml": _parse_pyproject,
+    "requirements.txt": _parse_requirements,
+    "go.mod": _parse_go_mod,
+    "Cargo.toml": _parse_cargo_toml,
+}
+
+
+def save_manifest_cache() -> None:
+    """把解析缓存写回磁盘（没有变化时不写）"""
+    _cache.save()
+
+
+def parse_manifest(path: Path, size: Optional[int] = None,
+                   mtime_ns: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """解析清单文件，文件大小和修改时间未变化时直接返回缓存结果
+
+    Args:
+        path: 清单文件路径
+        size: 文件大小（可由目录扫描结果提供，避免再次 stat）
+        mtime_ns: 文件修改时间（纳秒）
+
+    Returns:
+        解析结果（dependencies、description、name），不支持或解析失败时返回 None
+    """
+    parser = MANIFEST_PARSERS.get(path.name)
+    if parser is None:
+        return None
+
+    if size is None or mtime_ns is None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        size, mtime_ns = st.st_size, st.st_mtime_ns
+
+    key = str(path)
+    cached = _cache.get(key)
+    if cached is not None and cached[0] == size and cached[1] == mtime_ns:
+        CACHE_REQUESTS.inc(cache="manifest", result="hit")
+        return cached[2]
+    CACHE_REQUESTS.inc(cache="manifest", result="miss")
+
+    if size > MAX_MANIFEST_BYTES:
+        logger.debug(f"清单文件过大，跳过解析: {path}")
+        result = None
+    else:
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                result = parser(f.read())
+        except Exception as e:
+            logger.debug(f"解析清单文件失败: {path} - {str(e)}")
+            result = None
+
+    _cache.set(key, [size, mtime_ns, result])
+    return result
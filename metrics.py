@@ -0,0 +1,260 @@
+"""
+运行指标模块，以 Prometheus 文本格式导出计数器和直方图
+
+指标保存在进程内：定时运行模式下由控制服务的 ``GET /metrics`` 提供，
+也可以在每次运行后写入 node_exporter 的 textfile collector 目录（见 METRICS_TEXTFILE）。
+"""
+
+import os
+import math
+import time
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# 默认的直方图分桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 整次运行耗时的分桶（秒）
+RUN_BUCKETS = (1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+
+# 文本格式的 Content-Type
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    """转义标签值中的反斜杠、双引号和换行"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    """格式化标签，例如 {endpoint="pages",status="200"}"""
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    """格式化样本值（整数不带小数点）"""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    """指标基类，按标签值分别记录样本"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """初始化指标
+
+        Args:
+            name: 指标名称
+            documentation: 说明（HELP 行）
+            labelnames: 标签名称
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        """按标签名称的顺序取出标签值
+
+        Raises:
+            ValueError: 标签与定义不一致
+        """
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"指标 {self.name} 的标签应为 {self.labelnames}，实际为 {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[Tuple[str, Sequence[Tuple[str, str]], float]]:
+        """返回 (样本名称, 标签, 值) 列表"""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """输出文本格式"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class Counter(Metric):
+    """只增不减的计数器"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: object) -> None:
+        """增加计数
+
+        Args:
+            amount: 增加量
+            **labels: 标签值
+        """
+        key = self._key(labels)
+        with self.lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: object) -> float:
+        """返回当前计数"""
+        with self.lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self.lock:
+            return [(self.name, list(zip(self.labelnames, key)), value)
+                    for key, value in sorted(self._values.items())]
+
+
+class Gauge(Metric):
+    """可以任意设置的数值"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: object) -> None:
+        """设置数值"""
+        key = self._key(labels)
+        with self.lock:
+            self._values[key] = value
+
+    def samples(self):
+        with self.lock:
+            return [(self.name, list(zip(self.labelnames, key)), value)
+                    for key, value in sorted(self._values.items())]
+
+
+class Histogram(Metric):
+    """按分桶统计观测值的直方图"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """初始化直方图
+
+        Args:
+            name: 指标名称
+            documentation: 说明
+            labelnames: 标签名称
+            buckets: 分桶上界（不含 +Inf）
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # 标签值 -> [各分桶计数（非累计）, 总和, 总数]
+        self._values: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        """记录一个观测值
+
+        Args:
+            value: 观测值（例如秒数）
+            **labels: 标签值
+        """
+        key = self._key(labels)
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self.lock:
+            entry = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels: object) -> Iterator[None]:
+        """记录代码块的耗时（秒）"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - start, **labels)
+
+    def count(self, **labels: object) -> int:
+        """返回观测次数"""
+        with self.lock:
+            entry = self._values.get(self._key(labels))
+            return entry[2] if entry else 0
+
+    def samples(self):
+        samples = []
+        with self.lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                labels = list(zip(self.labelnames, key))
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    samples.append((f"{self.name}_bucket", labels + [("le", _format_value(bound))], cumulative))
+                samples.append((f"{self.name}_sum", labels, total))
+                samples.append((f"{self.name}_count", labels, count))
+        return samples
+
+
+# 已注册的指标（按注册顺序输出）
+_registry: List[Metric] = []
+
+
+def _register(metric: Metric) -> Metric:
+    """注册指标"""
+    _registry.append(metric)
+    return metric
+
+
+def render() -> str:
+    """以 Prometheus 文本格式输出所有指标"""
+    return "".join(metric.render() for metric in _registry)
+
+
+def write_textfile(path: Path) -> None:
+    """把所有指标原子写入文件（node_exporter textfile collector 只读取完整的 .prom 文件）
+
+    Args:
+        path: 输出文件路径
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(render())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+# 项目分析
+PROJECTS_ANALYZED = _register(Counter(
+    "notion_updater_projects_analyzed_total", "分析完成的项目数", ["result"]))
+CACHE_REQUESTS = _register(Counter(
+    "notion_updater_cache_requests_total", "本地缓存的命中和未命中次数", ["cache", "result"]))
+WALK_DURATION = _register(Histogram(
+    "notion_updater_walk_duration_seconds", "单个项目目录扫描耗时"))
+FILES_VISITED = _register(Counter(
+    "notion_updater_files_visited_total", "目录扫描覆盖的文件数"))
+GIT_DURATION = _register(Histogram(
+    "notion_updater_git_duration_seconds", "单个项目的 git 操作耗时", ["operation"]))
+
+# Notion API
+NOTION_REQUEST_DURATION = _register(Histogram(
+    "notion_updater_notion_request_duration_seconds", "Notion API 请求耗时（不含限流等待）",
+    ["endpoint", "status"]))
+NOTION_RATE_LIMITED = _register(Counter(
+    "notion_updater_notion_rate_limited_total", "收到 429 响应的次数"))
+NOTION_RETRIES = _register(Counter(
+    "notion_updater_notion_retries_total", "因 429 重试的请求数"))
+
+# 整次运行
+RUN_DURATION = _register(Histogram(
+    "notion_updater_run_duration_seconds", "一次同步从开始到结束的耗时", ["mode"], buckets=RUN_BUCKETS))
+LAST_RUN_TIMESTAMP = _register(Gauge(
+    "notion_updater_last_run_timestamp_seconds", "最近一次同步完成的时间（Unix 时间戳）", ["mode"]))
@@ -5,25 +5,299 @@ Notion API 交互模块，用于将项目信息同步到 Notion 数据库
 
 import time
 import json
-from typing import Dict, List, Any, Optional
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Set, Tuple
 import requests
+from requests.adapters import HTTPAdapter
 from loguru import logger
 
-from config import NOTION_API_KEY, NOTION_DATABASE_ID
+from config import (
+    NOTION_API_KEY,
+    NOTION_DATABASE_ID,
+    NOTION_SYNC_WORKERS,
+    NOTION_RATE_LIMIT,
+    NOTION_MAX_RETRIES,
+    NOTION_REQUEST_TIMEOUT,
+    NOTION_ARCHIVE_MISSING,
+    NOTION_ARCHIVE_MAX_RATIO,
+    NOTION_ARCHIVE_ALWAYS_ALLOWED,
+    NOTION_BREAKER_FAILURES,
+    NOTION_BREAKER_COOLDOWN,
+    STATE_DIR,
+)
+from state import StateFile
+from metrics import NOTION_REQUEST_DURATION, NOTION_RATE_LIMITED, NOTION_RETRIES
+
+# 保存项目标识的页面属性（可以在数据库视图中隐藏）
+IDENTITY_PROPERTY = "项目标识"
+
+# 所有版本的 setup_notion_db.py 都会创建的属性；其他属性（代码统计、语言、git 活跃度、工作区状态等）
+# 只在数据库结构中确认存在时写入
+BASE_PROPERTIES = frozenset(["名称", "路径", "技术栈", "项目类型", "状态", "优先级", "描述", "最后修改日期"])
+
+# 单个文本片段的最大长度（Notion API 限制）
+RICH_TEXT_MAX_LENGTH = 2000
+
+# 复合过滤条件中最多包含的条件数（Notion API 限制）
+NOTION_FILTER_MAX_CONDITIONS = 100
+
+# 本地记录的页面映射："数据库 ID:项目标识" -> 页面 ID
+PAGE_INDEX_FILE = STATE_DIR / "notion_pages.json"
+_page_index = StateFile(PAGE_INDEX_FILE)
+
+
+class RateLimiter:
+    """线程安全的令牌桶限流器"""
+    
+    def __init__(self, rate: float, burst: int = 1):
+        """初始化限流器
+
+        Args:
+            rate: 每秒允许的请求数
+            burst: 允许的突发请求数
+        """
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def _refill(self) -> None:
+        """按经过的时间补充令牌（调用方需持有锁）"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def acquire(self) -> float:
+        """获取一个令牌，令牌不足时阻塞等待
+
+        Returns:
+            实际等待的秒数
+        """
+        with self.lock:
+            self._refill()
+            # 预占令牌，令牌数可以为负，表示排队中的请求
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+    
+    def snapshot(self) -> Dict[str, float]:
+        """返回当前状态（用于状态查询）
+
+        Returns:
+            速率、可用令牌数（为负表示排队或暂停中的请求）和预计等待秒数
+        """
+        with self.lock:
+            self._refill()
+            return {
+                "rate": self.rate,
+                "tokens": round(self.tokens, 2),
+                "wait_seconds": round(max(0.0, -self.tokens) / self.rate, 2),
+            }
+    
+    def pause(self, seconds: float) -> None:
+        """暂停发放令牌（例如收到 429 的 Retry-After 时）
+
+        Args:
+            seconds: 暂停秒数
+        """
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+
+class CircuitOpenError(Exception):
+    """熔断器打开时拒绝发送请求"""
+
+
+class CircuitBreaker:
+    """线程安全的熔断器
+
+    连续失败（连接错误、超时或 5xx 响应）达到阈值后打开，冷却期内的请求立即失败；
+    冷却期结束后进入半开状态，只放行一个探测请求，成功则恢复，失败则重新打开。
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold: int, cooldown: float):
+        """初始化熔断器
+
+        Args:
+            failure_threshold: 打开熔断器的连续失败次数
+            cooldown: 打开后到允许探测请求的秒数
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self.lock = threading.Lock()
+    
+    def before_request(self) -> None:
+        """请求前检查是否允许发送
+
+        Raises:
+            CircuitOpenError: 熔断器打开，或半开状态下已有探测请求在进行
+        """
+        with self.lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                # 冷却期结束，放行一个探测请求
+                self.state = self.HALF_OPEN
+                logger.info("Notion 熔断器进入半开状态，发送探测请求")
+                return
+            self.rejected += 1
+        raise CircuitOpenError("Notion API 暂时不可用（熔断器已打开）")
+    
+    def record_success(self) -> None:
+        """记录一次成功的请求"""
+        with self.lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Notion 已恢复，熔断器关闭（期间拒绝了 {self.rejected} 个请求）")
+            self.state = self.CLOSED
+            self.failures = 0
+            self.rejected = 0
+    
+    def record_failure(self) -> None:
+        """记录一次失败的请求"""
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (
+                    self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                if self.state == self.CLOSED:
+                    logger.error(f"Notion 请求连续失败 {self.failures} 次，熔断器打开，"
+                                 f"{self.cooldown:.0f} 秒内的请求将立即失败")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+# 进程内共享的 HTTP 会话，以及按 API 密钥划分的限流器和熔断器
+_session: Optional[requests.Session] = None
+_rate_limiters: Dict[str, RateLimiter] = {}
+_breakers: Dict[str, CircuitBreaker] = {}
+_shared_lock = threading.Lock()
+
+
+def request_endpoint(method: str, url: str) -> str:
+    """把请求地址归一化为不含 ID 的接口名称（用作指标标签），例如 "POST /databases/:id/query"
+
+    Args:
+        method: HTTP 方法
+        url: 请求地址
+
+    Returns:
+        接口名称
+    """
+    path = url.split("/v1/", 1)[-1].split("?", 1)[0]
+    parts = [part if part in ("databases", "pages", "query") else ":id" for part in path.split("/") if part]
+    return f"{method} /" + "/".join(parts)
+
+
+def get_session() -> requests.Session:
+    """获取进程内共享的 HTTP 会话（复用连接池）
+
+    Returns:
+        requests 会话
+    """
+    global _session
+    with _shared_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(10, NOTION_SYNC_WORKERS * 2))
+            _session.mount("https://", adapter)
+        return _session
+
+
+def reset_session() -> None:
+    """关闭共享的 HTTP 会话，下次请求时重新创建（长时间运行时定期回收连接）"""
+    global _session
+    with _shared_lock:
+        session, _session = _session, None
+    if session is not None:
+        session.close()
+
+
+def get_rate_limiter(api_key: str) -> RateLimiter:
+    """获取 API 密钥对应的限流器，同一密钥的所有客户端共享
+
+    Args:
+        api_key: Notion API 密钥
+
+    Returns:
+        限流器
+    """
+    with _shared_lock:
+        if api_key not in _rate_limiters:
+            _rate_limiters[api_key] = RateLimiter(NOTION_RATE_LIMIT)
+        return _rate_limiters[api_key]
+
+
+def get_circuit_breaker(api_key: str) -> CircuitBreaker:
+    """获取 API 密钥对应的熔断器，同一密钥的所有客户端共享
+
+    Args:
+        api_key: Notion API 密钥
+
+    Returns:
+        熔断器
+    """
+    with _shared_lock:
+        if api_key not in _breakers:
+            _breakers[api_key] = CircuitBreaker(NOTION_BREAKER_FAILURES, NOTION_BREAKER_COOLDOWN)
+        return _breakers[api_key]
+
+
+def get_limiter_status() -> List[Dict[str, Any]]:
+    """返回各 API 密钥的限流器和熔断器状态（密钥只显示末 4 位）
+
+    Returns:
+        每个已使用的 API 密钥一项
+    """
+    with _shared_lock:
+        keys = sorted(set(_rate_limiters) | set(_breakers))
+        limiters = dict(_rate_limiters)
+        breakers = dict(_breakers)
+    status = []
+    for api_key in keys:
+        item: Dict[str, Any] = {"api_key": "..." + api_key[-4:]}
+        if api_key in limiters:
+            item.update(limiters[api_key].snapshot())
+        if api_key in breakers:
+            item["breaker"] = breakers[api_key].state
+        status.append(item)
+    return status
 
 
 class NotionClient:
     """Notion API 客户端"""
     
-    def __init__(self, api_key: str, database_id: str):
+    def __init__(self, api_key: str, database_id: str,
+                 session: Optional[requests.Session] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 breaker: Optional[CircuitBreaker] = None):
         """初始化 Notion 客户端
 
         Args:
             api_key: Notion API 密钥
             database_id: Notion 数据库 ID
+            session: HTTP 会话，默认使用进程内共享会话
+            rate_limiter: 限流器，默认使用该 API 密钥的共享限流器
+            breaker: 熔断器，默认使用该 API 密钥的共享熔断器
         """
         self.api_key = api_key
         self.database_id = database_id
+        self.session = session or get_session()
+        self.rate_limiter = rate_limiter or get_rate_limiter(api_key)
+        self.breaker = breaker or get_circuit_breaker(api_key)
         self.base_url = "https://api.notion.com/v1"
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -31,41 +305,145 @@ class NotionClient:
             "Notion-Version": "2022-06-28"
         }
         
+        # 数据库是否有项目标识属性，以及最近一次加载得到的 项目标识 -> 页面 ID 索引
+        self.has_identity_property = False
+        self._identities: Dict[str, str] = {}
+        
+        # 更新时发现已被归档或删除的页面
+        self._gone_pages: Set[str] = set()
+        
+        # 缓存的数据库结构（属性定义）、尚未提交的结构变更和已警告过的问题
+        self._schema: Optional[Dict[str, Any]] = None
+        self._pending_schema: Dict[str, Any] = {}
+        self._warned = set()
+        
         # 验证配置
         if self.api_key == "your-secret-api-key" or self.database_id == "your-database-id":
             logger.warning("使用了默认的 API 密钥或数据库 ID，请更新 config.py 文件或设置环境变量")
     
-    def load_existing_projects(self) -> Dict[str, str]:
-        """从 Notion 数据库加载已存在项目
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """发送经过限流和熔断保护的 API 请求，遇到 429 时按 Retry-After 等待后重试
+
+        Args:
+            method: HTTP 方法
+            url: 请求地址
+            **kwargs: 传给 requests 的其他参数
 
         Returns:
-            项目名称到页面 ID 的映射
+            响应对象
+
+        Raises:
+            CircuitOpenError: 熔断器打开，请求未发送
+            requests.RequestException: 连接错误或超时
         """
-        logger.info("从 Notion 加载已存在项目...")
-        
-        try:
-            url = f"{self.base_url}/databases/{self.database_id}/query"
-            response = requests.post(url, headers=self.headers, json={})
+        endpoint = request_endpoint(method, url)
+        for attempt in range(NOTION_MAX_RETRIES + 1):
+            self.breaker.before_request()
+            self.rate_limiter.acquire()
+            start = time.monotonic()
+            try:
+                response = self.session.request(
+                    method, url, headers=self.headers, timeout=NOTION_REQUEST_TIMEOUT, **kwargs
+                )
+            except requests.RequestException:
+                NOTION_REQUEST_DURATION.observe(time.monotonic() - start, endpoint=endpoint, status="error")
+                self.breaker.record_failure()
+                raise
+            NOTION_REQUEST_DURATION.observe(time.monotonic() - start, endpoint=endpoint,
+                                            status=response.status_code)
+            
+            # 5xx 视为服务不可用；其他响应（包括 4xx 和 429）说明服务仍在响应
+            if response.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            
+            if response.status_code == 429:
+                NOTION_RATE_LIMITED.inc()
+            if response.status_code != 429 or attempt == NOTION_MAX_RETRIES:
+                return response
             
+            NOTION_RETRIES.inc()
+            retry_after = float(response.headers.get("Retry-After", 1))
+            logger.warning(f"触发 Notion 限流，{retry_after} 秒后重试 ({attempt + 1}/{NOTION_MAX_RETRIES})")
+            self.rate_limiter.pause(retry_after)
+        
+        return response
+    
+    def _query_pages(self, query_filter: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """分页查询数据库中的页面
+
+        Args:
+            query_filter: Notion 查询过滤条件，None 时查询所有页面
+
+        Yields:
+            Notion 页面对象
+
+        Raises:
+            RuntimeError: 查询失败
+        """
+        url = f"{self.base_url}/databases/{self.database_id}/query"
+        body: Dict[str, Any] = {"filter": query_filter} if query_filter else {}
+        while True:
+            response = self._request("POST", url, json=body)
             if response.status_code != 200:
-                logger.error(f"加载项目失败: {response.status_code} - {response.text}")
-                return {}
+                raise RuntimeError(f"{response.status_code} - {response.text}")
             
             data = response.json()
+            yield from data.get("results", [])
             
-            # 解析响应，提取项目名称和页面 ID
-            projects = {}
-            for page in data.get("results", []):
-                properties = page.get("properties", {})
-                title_property = properties.get("名称", {}).get("title", [])
-                
-                if title_property:
-                    project_name = title_property[0].get("text", {}).get("content", "")
-                    project_id = page.get("id", "")
-                    
-                    if project_name and project_id:
-                        projects[project_name] = project_id
+            if not data.get("has_more") or not data.get("next_cursor"):
+                return
+            body = dict(body, start_cursor=data["next_cursor"])
+    
+    def _collect_pages(self, pages: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """提取页面的项目名称、页面 ID、项目标识和属性，并更新 项目标识 -> 页面 ID 索引
+
+        Args:
+            pages: Notion 页面对象
+
+        Returns:
+            项目名称到 {"id": 页面 ID, "identity": 项目标识, "properties": 页面属性} 的映射
+        """
+        projects = {}
+        identities = {}
+        for page in pages:
+            properties = page.get("properties", {})
+            title_property = properties.get("名称", {}).get("title", [])
             
+            if title_property:
+                project_name = title_property[0].get("text", {}).get("content", "")
+                project_id = page.get("id", "")
+                
+                if project_name and project_id:
+                    identity = "".join(part.get("plain_text", "") for part in
+                                       (properties.get(IDENTITY_PROPERTY) or {}).get("rich_text") or [])
+                    projects[project_name] = {"id": project_id, "identity": identity or None,
+                                              "properties": properties}
+                    if identity:
+                        identities[identity] = project_id
+            if IDENTITY_PROPERTY in properties:
+                self.has_identity_property = True
+        
+        # 页面上没有标识（例如在添加标识属性之前创建）时使用本地记录
+        page_ids = {page["id"] for page in projects.values()}
+        prefix = f"{self.database_id}:"
+        for key, page_id in _page_index.items():
+            if key.startswith(prefix) and page_id in page_ids:
+                identities.setdefault(key[len(prefix):], page_id)
+        self._identities = identities
+        return projects
+    
+    def load_existing_pages(self) -> Dict[str, Dict[str, Any]]:
+        """从 Notion 数据库加载已存在项目的页面 ID 和属性
+
+        Returns:
+            项目名称到 {"id": 页面 ID, "identity": 项目标识, "properties": 页面属性} 的映射
+        """
+        logger.info("从 Notion 加载已存在项目...")
+        
+        try:
+            projects = self._collect_pages(self._query_pages())
             logger.info(f"已加载 {len(projects)} 个已存在项目")
             return projects
             
@@ -73,74 +451,388 @@ class NotionClient:
             logger.error(f"加载项目时出错: {str(e)}")
             return {}
     
-    def create_project(self, project_info: Dict[str, Any]) -> Optional[str]:
-        """在 Notion 中创建新项目页面
+    def find_project_pages(self, projects_info: Iterable[Dict[str, Any]]) -> Dict[str, str]:
+        """只查找指定项目对应的页面，不读取整个数据库
+
+        本地记录了项目标识对应页面的项目直接使用记录；其余项目按名称（以及数据库有标识属性时按标识）
+        过滤查询数据库，每 NOTION_FILTER_MAX_CONDITIONS 个条件一个查询。
+
+        Args:
+            projects_info: 项目信息列表
+
+        Returns:
+            找到的项目名称到页面 ID 的映射（按本地记录找到的项目通过 page_identities 返回）
+        """
+        projects_info = list(projects_info)
+        prefix = f"{self.database_id}:"
+        known = {}
+        for project_info in projects_info:
+            identity = project_info.get("identity")
+            page_id = _page_index.get(prefix + identity) if identity else None
+            if page_id:
+                known[identity] = page_id
+        
+        remaining = [info for info in projects_info if info.get("identity") not in known]
+        conditions = self._page_conditions(remaining)
+        
+        pages = []
+        try:
+            for start in range(0, len(conditions), NOTION_FILTER_MAX_CONDITIONS):
+                chunk = conditions[start:start + NOTION_FILTER_MAX_CONDITIONS]
+                pages.extend(self._query_pages({"or": chunk}))
+        except Exception as e:
+            logger.error(f"查找项目页面时出错: {str(e)}")
+        
+        projects = self._collect_pages(pages)
+        for identity, page_id in known.items():
+            self._identities.setdefault(identity, page_id)
+        logger.info(f"找到 {len(projects) + len(known)}/{len(projects_info)} 个项目的已有页面"
+                    f"（本地记录 {len(known)}）")
+        return {name: page["id"] for name, page in projects.items()}
+    
+    def _page_conditions(self, projects_info: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """按名称（以及数据库有标识属性时按标识）查找这些项目页面的过滤条件"""
+        conditions = [{"property": "名称", "title": {"equals": info["name"]}} for info in projects_info]
+        # 按标识过滤需要知道数据库是否有标识属性（数据库结构随后用于校验，不额外花费请求）
+        if projects_info and self.load_schema() is not None and self.has_identity_property:
+            conditions += [{"property": IDENTITY_PROPERTY, "rich_text": {"equals": info["identity"]}}
+                           for info in projects_info if info.get("identity")]
+        return conditions
+    
+    def find_page(self, project_info: Dict[str, Any]) -> Optional[str]:
+        """按名称或标识重新查找单个项目的页面（不使用本地记录，不修改已加载的索引）
 
         Args:
             project_info: 项目信息
 
+        Returns:
+            页面 ID，找不到时返回 None
+        """
+        try:
+            for page in self._query_pages({"or": self._page_conditions([project_info])}):
+                if page.get("id") and page["id"] not in self._gone_pages:
+                    return page["id"]
+        except Exception as e:
+            logger.error(f"查找项目页面时出错: {project_info['name']} - {str(e)}")
+        return None
+    
+    def forget_page(self, page_id: str) -> None:
+        """删除指向该页面的标识索引和本地记录（页面已被归档或删除）
+
+        Args:
+            page_id: 页面 ID
+        """
+        for identity, known_id in list(self._identities.items()):
+            if known_id == page_id:
+                self._identities.pop(identity, None)
+        prefix = f"{self.database_id}:"
+        for key, known_id in _page_index.items():
+            if key.startswith(prefix) and known_id == page_id:
+                _page_index.pop(key)
+    
+    def page_gone(self, page_id: str) -> bool:
+        """更新时是否发现该页面已被归档或删除"""
+        return page_id in self._gone_pages
+    
+    def load_existing_projects(self) -> Dict[str, str]:
+        """从 Notion 数据库加载已存在项目
+
+        Returns:
+            项目名称到页面 ID 的映射
+        """
+        return {name: page["id"] for name, page in self.load_existing_pages().items()}
+    
+    def page_identities(self) -> Dict[str, str]:
+        """返回最近一次加载得到的 项目标识 -> 页面 ID 索引（含本地记录）"""
+        return self._identities
+    
+    def owned_page_ids(self) -> Set[str]:
+        """返回由本工具写入的页面 ID（页面有项目标识或本地记录了该页面）
+
+        只有这些页面会在项目找不到时被归档，用户手动添加的行不受影响。
+        """
+        return set(self._identities.values())
+    
+    def remember_identity(self, identity: str, page_id: str) -> None:
+        """在本地记录项目标识对应的页面
+
+        Args:
+            identity: 项目标识
+            page_id: 页面 ID
+        """
+        self._identities[identity] = page_id
+        _page_index.set(f"{self.database_id}:{identity}", page_id)
+    
+    def load_schema(self) -> Optional[Dict[str, Any]]:
+        """获取数据库的属性定义，每个客户端只请求一次
+
+        Returns:
+            属性名称到属性定义的映射，获取失败时返回 None
+        """
+        if self._schema is None:
+            try:
+                response = self._request("GET", f"{self.base_url}/databases/{self.database_id}")
+                if response.status_code != 200:
+                    logger.error(f"获取数据库结构失败: {response.status_code} - {response.text}")
+                    return None
+                self._schema = response.json().get("properties", {})
+            except Exception as e:
+                logger.error(f"获取数据库结构时出错: {str(e)}")
+                return None
+            self.has_identity_property = self._schema.get(IDENTITY_PROPERTY, {}).get("type") == "rich_text"
+        return self._schema
+    
+    def plan_schema(self, projects_info: Iterable[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """计算写入这些项目前需要的数据库结构变更
+
+        已有 select / multi_select 属性中缺少的选项（以及匹配页面所需的项目标识属性）汇总为一次
+        数据库 PATCH 的请求体；不添加其他属性，数据库中没有的属性由 validate_properties 丢弃。
+        变更在执行前即视为有效，之后构造和校验的属性会按变更后的结构处理。
+
+        Args:
+            projects_info: 项目信息列表
+
+        Returns:
+            数据库 PATCH 的 properties 请求体，不需要变更或无法获取数据库结构时返回 None
+        """
+        schema = self.load_schema()
+        if schema is None:
+            return None
+        
+        projects_info = list(projects_info)
+        if not self.has_identity_property and any(info.get("identity") for info in projects_info):
+            if IDENTITY_PROPERTY in schema:
+                self._warn_once(IDENTITY_PROPERTY, f"属性 {IDENTITY_PROPERTY} 的类型不是文本，不写入项目标识")
+            else:
+                self._pending_schema[IDENTITY_PROPERTY] = {"rich_text": {}}
+                self.has_identity_property = True
+        
+        new_options: Dict[str, List[str]] = {}
+        for project_info in projects_info:
+            for name, prop in self._build_properties(project_info).items():
+                kind = next(iter(prop))
+                definition = schema.get(name)
+                if definition is None or definition.get("type") != kind:
+                    continue
+                if kind in ("select", "multi_select"):
+                    values = [prop[kind]] if kind == "select" else prop[kind]
+                    known = {option.get("name") for option in definition.get(kind, {}).get("options", [])}
+                    for value in values:
+                        if value and value["name"] not in known and value["name"] not in new_options.get(name, []):
+                            new_options.setdefault(name, []).append(value["name"])
+        
+        for name, values in new_options.items():
+            kind = schema[name]["type"]
+            existing = schema[name].get(kind, {}).get("options", [])
+            # 更新选项时需要带上已有选项，否则已有选项会被删除
+            options = [{"id": option["id"], "name": option["name"]} for option in existing if "id" in option]
+            self._pending_schema[name] = {kind: {"options": options + [{"name": value} for value in values]}}
+        
+        return dict(self._pending_schema) or None
+    
+    def update_schema(self, changes: Dict[str, Any]) -> bool:
+        """用一次数据库 PATCH 添加缺少的选项（和项目标识属性）
+
+        Args:
+            changes: plan_schema 返回的请求体
+
+        Returns:
+            是否更新成功
+        """
+        added = ", ".join(changes)
+        try:
+            url = f"{self.base_url}/databases/{self.database_id}"
+            response = self._request("PATCH", url, json={"properties": changes})
+            if response.status_code == 200:
+                self._schema = response.json().get("properties", self._schema)
+                self._pending_schema = {}
+                logger.info(f"已更新数据库结构: {added}")
+                return True
+            logger.error(f"更新数据库结构失败: {response.status_code} - {response.text}")
+        except Exception as e:
+            logger.error(f"更新数据库结构时出错: {str(e)}")
+        
+        # 新增的属性不可用，写入时丢弃
+        self._pending_schema = {}
+        if self._schema is not None:
+            self.has_identity_property = self._schema.get(IDENTITY_PROPERTY, {}).get("type") == "rich_text"
+        return False
+    
+    def prepare_schema(self, projects_info: Iterable[Dict[str, Any]]) -> bool:
+        """获取数据库结构并一次性添加写入这些项目所需的选项（和项目标识属性）
+
+        Args:
+            projects_info: 项目信息列表
+
+        Returns:
+            数据库结构是否可用（获取或更新失败时返回 False，写入时不做本地校验）
+        """
+        changes = self.plan_schema(projects_info)
+        if changes:
+            return self.update_schema(changes)
+        return self._schema is not None
+    
+    def _warn_once(self, key: str, message: str) -> None:
+        """每个客户端对同一问题只记录一次警告"""
+        if key not in self._warned:
+            self._warned.add(key)
+            logger.warning(message)
+    
+    def validate_properties(self, properties: Dict[str, Any]) -> Dict[str, Any]:
+        """按数据库结构在本地校验页面属性
+
+        丢弃数据库中不存在或类型不一致的属性，截断超过 Notion 长度限制的文本。
+        未获取数据库结构时只保留 BASE_PROPERTIES 中的属性，旧数据库不会因新增的属性写入失败。
+
+        Args:
+            properties: 页面属性
+
+        Returns:
+            校验后的页面属性
+        """
+        if self._schema is None:
+            return {name: prop for name, prop in properties.items() if name in BASE_PROPERTIES}
+        
+        valid = {}
+        for name, prop in properties.items():
+            kind = next(iter(prop))
+            definition = self._schema.get(name)
+            if definition is None and name in self._pending_schema:
+                definition = {"type": next(iter(self._pending_schema[name]))}
+            if definition is None:
+                self._warn_once(name, f"数据库中没有属性 {name}，已跳过")
+                continue
+            if definition.get("type") != kind:
+                self._warn_once(name, f"属性 {name} 的类型为 {definition.get('type')}，与写入的 {kind} 不一致，已跳过")
+                continue
+            if kind in ("title", "rich_text"):
+                prop = {kind: [
+                    {**part, "text": {**part["text"], "content": part["text"]["content"][:RICH_TEXT_MAX_LENGTH]}}
+                    for part in prop[kind]
+                ]}
+            valid[name] = prop
+        return valid
+    
+    def create_page(self, name: str, properties: Dict[str, Any]) -> Optional[str]:
+        """在数据库中创建页面
+
+        Args:
+            name: 项目名称（用于日志）
+            properties: Notion 页面属性
+
         Returns:
             创建的页面 ID，失败则返回 None
         """
-        logger.info(f"创建新项目: {project_info['name']}")
+        logger.info(f"创建新项目: {name}")
         
         try:
-            # 构造 Notion 页面属性
-            properties = self._build_properties(project_info)
-            
-            # 创建页面
             url = f"{self.base_url}/pages"
             data = {
                 "parent": {"database_id": self.database_id},
                 "properties": properties
             }
             
-            response = requests.post(url, headers=self.headers, json=data)
+            response = self._request("POST", url, json=data)
             
             if response.status_code != 200:
                 logger.error(f"创建项目失败: {response.status_code} - {response.text}")
                 return None
             
             page_id = response.json().get("id")
-            logger.info(f"项目创建成功: {project_info['name']} (ID: {page_id})")
+            logger.info(f"项目创建成功: {name} (ID: {page_id})")
             return page_id
             
+        except CircuitOpenError:
+            logger.debug(f"熔断器已打开，跳过创建: {name}")
+            return None
         except Exception as e:
-            logger.error(f"创建项目时出错: {project_info['name']} - {str(e)}")
+            logger.error(f"创建项目时出错: {name} - {str(e)}")
             return None
     
-    def update_project(self, page_id: str, project_info: Dict[str, Any]) -> bool:
-        """更新 Notion 中的已有项目
+    def update_page(self, page_id: str, name: str, data: Dict[str, Any]) -> bool:
+        """更新页面（属性或归档状态）
 
         Args:
             page_id: 页面 ID
-            project_info: 更新后的项目信息
+            name: 项目名称（用于日志）
+            data: PATCH 请求体，例如 {"properties": {...}} 或 {"archived": True}
 
         Returns:
             是否更新成功
         """
-        logger.info(f"更新项目: {project_info['name']}")
+        logger.info(f"更新项目: {name}")
         
         try:
-            # 构造 Notion 页面属性
-            properties = self._build_properties(project_info)
-            
-            # 更新页面
             url = f"{self.base_url}/pages/{page_id}"
-            data = {"properties": properties}
-            
-            response = requests.patch(url, headers=self.headers, json=data)
+            response = self._request("PATCH", url, json=data)
             
             if response.status_code != 200:
                 logger.error(f"更新项目失败: {response.status_code} - {response.text}")
+                # 页面已被删除或归档：本地记录失效，由调用方重新查找或新建
+                if response.status_code == 404 or (response.status_code == 400 and "archived" in response.text):
+                    self._gone_pages.add(page_id)
+                    self.forget_page(page_id)
                 return False
             
-            logger.info(f"项目更新成功: {project_info['name']}")
+            logger.info(f"项目更新成功: {name}")
             return True
             
+        except CircuitOpenError:
+            logger.debug(f"熔断器已打开，跳过更新: {name}")
+            return False
+        except Exception as e:
+            logger.error(f"更新项目时出错: {name} - {str(e)}")
+            return False
+    
+    def archive_page(self, page_id: str, name: str) -> bool:
+        """归档页面
+
+        Args:
+            page_id: 页面 ID
+            name: 项目名称（用于日志）
+
+        Returns:
+            是否归档成功
+        """
+        if not self.update_page(page_id, name, {"archived": True}):
+            return False
+        self.forget_page(page_id)
+        return True
+    
+    def create_project(self, project_info: Dict[str, Any]) -> Optional[str]:
+        """在 Notion 中创建新项目页面
+
+        Args:
+            project_info: 项目信息
+
+        Returns:
+            创建的页面 ID，失败则返回 None
+        """
+        try:
+            # 构造 Notion 页面属性并按数据库结构校验
+            properties = self.validate_properties(self._build_properties(project_info))
+        except Exception as e:
+            logger.error(f"创建项目时出错: {project_info['name']} - {str(e)}")
+            return None
+        return self.create_page(project_info["name"], properties)
+    
+    def update_project(self, page_id: str, project_info: Dict[str, Any]) -> bool:
+        """更新 Notion 中的已有项目
+
+        Args:
+            page_id: 页面 ID
+            project_info: 更新后的项目信息
+
+        Returns:
+            是否更新成功
+        """
+        try:
+            # 构造 Notion 页面属性并按数据库结构校验
+            properties = self.validate_properties(self._build_properties(project_info))
         except Exception as e:
             logger.error(f"更新项目时出错: {project_info['name']} - {str(e)}")
             return False
+        return self.update_page(page_id, project_info["name"], {"properties": properties})
     
     def _build_properties(self, project_info: Dict[str, Any]) -> Dict[str, Any]:
         """构建 Notion 页面属性
@@ -206,6 +898,43 @@ class NotionClient:
             }
         }
         
+        # 代码统计（由分析器在扫描时计算）
+        if "size_mb" in project_info:
+            properties["项目大小"] = {"number": project_info["size_mb"]}
+        if "file_count" in project_info:
+            properties["文件数量"] = {"number": project_info["file_count"]}
+        if "code_lines" in project_info:
+            properties["代码行数"] = {"number": project_info["code_lines"]}
+        
+        # 语言构成
+        if project_info.get("primary_language"):
+            properties["主要语言"] = {"select": {"name": project_info["primary_language"]}}
+        if project_info.get("languages"):
+            summary = ", ".join(
+                f"{name} {share * 100:.1f}%"
+                for name, share in list(project_info["languages"].items())[:5]
+            )
+            properties["语言构成"] = {"rich_text": [{"text": {"content": summary}}]}
+        
+        # Git 活跃度（非 Git 仓库或 git 超时时不写入）
+        for key, name in [("commits_30d", "近30天提交"), ("commits_90d", "近90天提交"),
+                          ("contributors_90d", "活跃贡献者"), ("ahead", "领先提交"), ("behind", "落后提交")]:
+            if project_info.get(key) is not None:
+                properties[name] = {"number": project_info[key]}
+        if project_info.get("branch"):
+            properties["当前分支"] = {"rich_text": [{"text": {"content": project_info["branch"]}}]}
+        
+        # 工作区状态
+        if project_info.get("dirty") is not None:
+            properties["有未提交更改"] = {"checkbox": project_info["dirty"]}
+            summary = (f"修改 {project_info['modified_files']} / 未跟踪 {project_info['untracked_files']}"
+                       f" / 暂存 {project_info['staged_files']}")
+            properties["工作区状态"] = {"rich_text": [{"text": {"content": summary}}]}
+        
+        # 项目标识（数据库有该属性时才写入）
+        if self.has_identity_property and project_info.get("identity"):
+            properties[IDENTITY_PROPERTY] = {"rich_text": [{"text": {"content": project_info["identity"]}}]}
+        
         return properties
 
 
@@ -246,11 +975,87 @@ def update_project(page_id: str, project_info: Dict[str, Any]) -> bool:
     return client.update_project(page_id, project_info)
 
 
-def sync_projects(projects_info: List[Dict[str, Any]]) -> Dict[str, Any]:
+def match_pages(projects_info: Iterable[Dict[str, Any]], existing_projects: Dict[str, str],
+                identities: Dict[str, str]) -> List[Optional[str]]:
+    """为每个项目找到对应的已有页面
+
+    先按项目标识匹配（重命名或移动的项目仍对应原页面），再按名称匹配；
+    每个页面最多对应一个项目，同一次扫描中标识重复的项目（例如同一仓库的多个克隆）只按名称匹配。
+
+    Args:
+        projects_info: 项目信息列表
+        existing_projects: 项目名称到页面 ID 的映射
+        identities: 项目标识到页面 ID 的映射
+
+    Returns:
+        与 projects_info 顺序一致的页面 ID 列表，需要新建的项目为 None
+    """
+    projects_info = list(projects_info)
+    counts: Dict[str, int] = {}
+    for project_info in projects_info:
+        identity = project_info.get("identity")
+        if identity:
+            counts[identity] = counts.get(identity, 0) + 1
+    
+    matches: List[Optional[str]] = [None] * len(projects_info)
+    claimed = set()
+    for index, project_info in enumerate(projects_info):
+        identity = project_info.get("identity")
+        page_id = identities.get(identity) if identity and counts[identity] == 1 else None
+        if page_id and page_id not in claimed:
+            matches[index] = page_id
+            claimed.add(page_id)
+    
+    for index, project_info in enumerate(projects_info):
+        page_id = existing_projects.get(project_info["name"])
+        if matches[index] is None and page_id and page_id not in claimed:
+            matches[index] = page_id
+            claimed.add(page_id)
+    return matches
+
+
+def find_pages_to_archive(existing_projects: Dict[str, str], names: Iterable[str],
+                          owned: Optional[Set[str]] = None) -> Dict[str, str]:
+    """找出数据库中有、本次扫描没有的项目页面
+
+    只考虑本工具写入的页面（owned）；待归档页面超过这些页面的 NOTION_ARCHIVE_MAX_RATIO
+    （且多于 NOTION_ARCHIVE_ALWAYS_ALLOWED 个）时认为扫描结果不完整（例如扫描目录未挂载），不归档任何页面。
+
+    Args:
+        existing_projects: 项目名称到页面 ID 的映射
+        names: 本次扫描到的项目名称
+        owned: 本工具写入的页面 ID，None 表示所有页面
+
+    Returns:
+        需要归档的项目名称到页面 ID 的映射
+    """
+    if owned is not None:
+        existing_projects = {name: page_id for name, page_id in existing_projects.items() if page_id in owned}
+    names = set(names)
+    missing = {name: page_id for name, page_id in existing_projects.items() if name not in names}
+    limit = max(NOTION_ARCHIVE_ALWAYS_ALLOWED, int(len(existing_projects) * NOTION_ARCHIVE_MAX_RATIO))
+    if len(missing) > limit:
+        logger.warning(f"有 {len(missing)}/{len(existing_projects)} 个已有项目未在本次扫描中找到，"
+                       f"超过归档上限 {limit}，跳过归档（请检查扫描目录是否完整）")
+        return {}
+    return missing
+
+
+def sync_projects(projects_info: List[Dict[str, Any]],
+                  client: Optional[NotionClient] = None,
+                  executor: Optional[Executor] = None,
+                  archive_missing: bool = NOTION_ARCHIVE_MISSING,
+                  targeted: bool = False) -> Dict[str, Any]:
     """批量同步项目信息到 Notion
 
+    写入和归档请求并发执行，请求速率由客户端的共享限流器控制。
+
     Args:
         projects_info: 项目信息列表
+        client: Notion 客户端，默认使用配置中的 API 密钥和数据库
+        executor: 执行写入的线程池，默认临时创建
+        archive_missing: 是否归档数据库中有、本次扫描没有的项目
+        targeted: 只同步指定的项目：按过滤查询或本地记录查找页面，不读取整个数据库，也不归档
 
     Returns:
         同步结果统计
@@ -258,50 +1063,90 @@ def sync_projects(projects_info: List[Dict[str, Any]]) -> Dict[str, Any]:
     logger.info(f"开始同步 {len(projects_info)} 个项目到 Notion...")
     
     # 初始化 Notion 客户端
-    client = NotionClient(NOTION_API_KEY, NOTION_DATABASE_ID)
+    if client is None:
+        client = NotionClient(NOTION_API_KEY, NOTION_DATABASE_ID)
     
-    # 加载已存在项目
-    existing_projects = client.load_existing_projects()
+    # 加载已存在项目（指定项目时只查找这些项目的页面）
+    if targeted:
+        existing_projects = client.find_project_pages(projects_info)
+        archive_missing = False
+    else:
+        existing_projects = client.load_existing_projects()
     
     # 统计信息
     stats = {
         "total": len(projects_info),
         "created": 0,
         "updated": 0,
+        "archived": 0,
         "failed": 0,
         "skipped": 0
     }
     
-    # 同步每个项目
-    for project_info in projects_info:
-        project_name = project_info["name"]
+    # 按项目标识或名称匹配已有页面（重命名或移动的项目更新原页面）
+    with_identity = any(project_info.get("identity") for project_info in projects_info)
+    identities = client.page_identities() if with_identity else {}
+    
+    # 一次性补齐数据库中缺少的选项，结构问题只花费一个请求
+    client.prepare_schema(projects_info)
+    matches = match_pages(projects_info, existing_projects, identities)
+    
+    def sync_one(project_info: Dict[str, Any], page_id: Optional[str]) -> str:
+        """同步单个项目，返回结果类型"""
+        identity = project_info.get("identity")
         
-        # 检查是否已存在
-        if project_name in existing_projects:
-            # 更新已有项目
-            page_id = existing_projects[project_name]
-            success = client.update_project(page_id, project_info)
-            
-            if success:
-                stats["updated"] += 1
-            else:
-                stats["failed"] += 1
+        if page_id and not client.update_project(page_id, project_info):
+            if not client.page_gone(page_id):
+                return "failed"
+            # 页面已被归档或删除（本地记录过期）：按名称或标识重新查找，找不到时新建
+            page_id = client.find_page(project_info)
+            if page_id and not client.update_project(page_id, project_info):
+                return "failed"
+        
+        if page_id:
+            outcome = "updated"
         else:
             # 创建新项目
             page_id = client.create_project(project_info)
-            
-            if page_id:
-                stats["created"] += 1
-            else:
-                stats["failed"] += 1
+            if not page_id:
+                return "failed"
+            outcome = "created"
         
-        # 添加延迟，避免 API 限流
-        time.sleep(0.5)
+        if identity:
+            client.remember_identity(identity, page_id)
+        return outcome
+    
+    def archive_one(item: Tuple[str, str]) -> str:
+        """归档单个项目页面，返回结果类型"""
+        project_name, page_id = item
+        return "archived" if client.archive_page(page_id, project_name) else "failed"
+    
+    # 找不到的项目与写入请求一起排队归档
+    tasks = [partial(sync_one, project_info, page_id) for project_info, page_id in zip(projects_info, matches)]
+    if archive_missing:
+        # 已匹配的页面（包括按标识匹配到的旧名称页面）不归档
+        matched = set(matches)
+        keep = {info["name"] for info in projects_info}
+        keep.update(name for name, page_id in existing_projects.items() if page_id in matched)
+        to_archive = find_pages_to_archive(existing_projects, keep, client.owned_page_ids())
+        tasks += [partial(archive_one, item) for item in to_archive.items()]
+    
+    # 并发执行（限流由客户端负责）
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=NOTION_SYNC_WORKERS)
+    try:
+        for outcome in executor.map(lambda task: task(), tasks):
+            stats[outcome] += 1
+    finally:
+        if own_executor:
+            executor.shutdown()
     
     # 记录同步结果
     logger.info(f"同步完成. 总计: {stats['total']}, "
                 f"新建: {stats['created']}, "
                 f"更新: {stats['updated']}, "
+                f"归档: {stats['archived']}, "
                 f"失败: {stats['failed']}, "
                 f"跳过: {stats['skipped']}")
     
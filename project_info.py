@@ -0,0 +1,194 @@
+"""
+项目信息记录模块，用紧凑的 __slots__ 记录代替每个项目一个字典
+
+状态、优先级和项目类型以整数编码存储（取值表在进程内共享），技术栈存为元组。
+记录同时提供字典兼容接口（info["name"]、info.get()、"key" in info、info["自定义字段"] = ...），
+旧代码和自定义分析器无需修改。
+"""
+
+import sys
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from config import PROJECT_TYPE_MARKERS
+
+
+class Vocabulary:
+    """字符串取值表，把取值映射为小整数编码（未登记的取值在首次出现时追加）"""
+
+    __slots__ = ("values", "_codes", "_lock")
+
+    def __init__(self, values: Iterable[str]):
+        """初始化取值表
+
+        Args:
+            values: 预先登记的取值（编码按顺序从 0 开始）
+        """
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        for value in values:
+            self.code(value)
+
+    def code(self, value: str) -> int:
+        """返回取值的编码，未登记时追加"""
+        code = self._codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(value)
+                if code is None:
+                    code = len(self.values)
+                    self.values.append(sys.intern(value))
+                    self._codes[self.values[code]] = code
+        return code
+
+    def find(self, value: str) -> int:
+        """返回取值的编码，未登记时返回 -1（不追加，用于查询）"""
+        return self._codes.get(value, -1)
+
+    def value(self, code: int) -> str:
+        """返回编码对应的取值"""
+        return self.values[code]
+
+
+STATUSES = Vocabulary(["活跃", "维护中", "暂停", "未知"])
+PRIORITIES = Vocabulary(["高", "中", "低"])
+PROJECT_TYPES = Vocabulary(list(PROJECT_TYPE_MARKERS) + ["其他", "未知"])
+
+# 按字典顺序对外暴露的字段
+FIELDS: Tuple[str, ...] = (
+    "name", "path", "identity", "tech_stack", "project_type", "status", "priority", "description",
+    "last_modified", "size_mb", "file_count", "code_lines", "languages", "primary_language",
+    "commits_30d", "commits_90d", "contributors_90d", "branch", "ahead", "behind",
+    "dirty", "modified_files", "untracked_files", "staged_files", "truncated", "limits_hit",
+)
+_FIELD_SET = frozenset(FIELDS)
+
+
+class ProjectInfo:
+    """单个项目的分析结果
+
+    未设置的可选字段为 None，在字典接口中视为不存在（"size_mb" in info 为 False）。
+    """
+
+    __slots__ = (
+        "name", "path", "identity", "tech_stack", "project_type_code", "status_code", "priority_code",
+        "description", "last_modified", "size_mb", "file_count", "code_lines", "languages",
+        "primary_language", "commits_30d", "commits_90d", "contributors_90d", "branch",
+        "ahead", "behind", "dirty", "modified_files", "untracked_files", "staged_files",
+        "truncated", "limits_hit", "extra",
+    )
+
+    def __init__(self, name: str, path: str, **fields: Any):
+        """创建项目记录
+
+        Args:
+            name: 项目名称
+            path: 项目路径
+            **fields: 其他字段（见 FIELDS），未知字段保存在 extra 中
+        """
+        for slot in self.__slots__:
+            object.__setattr__(self, slot, None)
+        self.name = name
+        self.path = path
+        self.tech_stack = ()
+        self.status = "未知"
+        self.priority = "低"
+        self.project_type = "未知"
+        self.truncated = False
+        self.limits_hit = []
+        for key, value in fields.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ProjectInfo":
+        """从字典创建记录
+
+        Args:
+            data: 包含 name 和 path 的项目信息字典
+
+        Returns:
+            项目记录
+        """
+        fields = dict(data)
+        return cls(fields.pop("name"), fields.pop("path"), **fields)
+
+    # 编码字段
+    @property
+    def status(self) -> str:
+        """项目状态"""
+        return STATUSES.value(self.status_code)
+
+    @status.setter
+    def status(self, value: str) -> None:
+        self.status_code = STATUSES.code(value)
+
+    @property
+    def priority(self) -> str:
+        """项目优先级"""
+        return PRIORITIES.value(self.priority_code)
+
+    @priority.setter
+    def priority(self, value: str) -> None:
+        self.priority_code = PRIORITIES.code(value)
+
+    @property
+    def project_type(self) -> str:
+        """项目类型"""
+        return PROJECT_TYPES.value(self.project_type_code)
+
+    @project_type.setter
+    def project_type(self, value: str) -> None:
+        self.project_type_code = PROJECT_TYPES.code(value)
+
+    # 字典兼容接口
+    def __getitem__(self, key: str) -> Any:
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        elif self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in _FIELD_SET:
+            if key == "tech_stack" and value is not None:
+                value = tuple(sys.intern(tech) for tech in value)
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key: object) -> bool:
+        if key in _FIELD_SET:
+            return getattr(self, key) is not None
+        return bool(self.extra) and key in self.extra
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """与 dict.get 相同"""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self) -> List[str]:
+        """已设置的字段名（含自定义字段）"""
+        return [key for key in FIELDS if getattr(self, key) is not None] + list(self.extra or ())
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def items(self) -> List[Tuple[str, Any]]:
+        """已设置的字段及其值"""
+        return [(key, self[key]) for key in self.keys()]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为普通字典（tech_stack 为列表）"""
+        data = dict(self.items())
+        data["tech_stack"] = list(self.tech_stack)
+        return data
+
+    def __repr__(self) -> str:
+        return f"ProjectInfo(name={self.name!r}, status={self.status!r}, path={self.path!r})"
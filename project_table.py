@@ -0,0 +1,354 @@
+"""
+项目表模块，按列存储一批项目的分析结果
+
+名称、状态编码、优先级编码、类型编码、最后修改时间和各项统计保存在平行数组中，
+技术栈编码为位掩码。表中只保存列，不保留 ProjectInfo 记录；按行读取时从各列重建记录。
+筛选和排序一次处理一整列，返回行号列表。
+"""
+
+import math
+import time
+import datetime
+from array import array
+from itertools import compress
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+from project_info import ProjectInfo, Vocabulary, STATUSES, PRIORITIES, PROJECT_TYPES
+
+# 技术栈取值表，编码即位掩码中的位序号
+TECH_STACKS = Vocabulary([])
+
+# 按列存储的数值统计字段（缺失值为 NaN）
+METRIC_COLUMNS = (
+    "size_mb", "file_count", "code_lines", "commits_30d", "commits_90d", "contributors_90d",
+    "ahead", "behind", "modified_files", "untracked_files", "staged_files",
+)
+
+# 时间参数可以是时间戳、日期或 datetime
+TimeLike = Union[float, int, datetime.date, datetime.datetime]
+
+
+def tech_mask(techs: Iterable[str]) -> int:
+    """把技术栈名称编码为位掩码
+
+    Args:
+        techs: 技术栈名称
+
+    Returns:
+        位掩码
+    """
+    mask = 0
+    for tech in techs:
+        mask |= 1 << TECH_STACKS.code(tech)
+    return mask
+
+
+def find_tech_mask(techs: Iterable[str]) -> Optional[int]:
+    """查询技术栈名称的位掩码（不登记新的技术栈）
+
+    Args:
+        techs: 技术栈名称
+
+    Returns:
+        位掩码；有未登记的技术栈时返回 None（没有项目包含它）
+    """
+    mask = 0
+    for tech in techs:
+        code = TECH_STACKS.find(tech)
+        if code < 0:
+            return None
+        mask |= 1 << code
+    return mask
+
+
+def mask_techs(mask: int) -> List[str]:
+    """把位掩码解码为技术栈名称列表（按编码顺序）"""
+    techs = []
+    code = 0
+    while mask:
+        if mask & 1:
+            techs.append(TECH_STACKS.value(code))
+        mask >>= 1
+        code += 1
+    return techs
+
+
+def epoch_date(epoch: float) -> Optional[str]:
+    """把时间戳转换为 "YYYY-MM-DD" 日期（本地时间），NaN 时返回 None"""
+    if math.isnan(epoch):
+        return None
+    return time.strftime("%Y-%m-%d", time.localtime(epoch))
+
+
+def date_epoch(value: Optional[str]) -> float:
+    """把 "YYYY-MM-DD" 日期转换为当天零点（本地时间）的时间戳，无法解析时返回 NaN"""
+    if not value:
+        return math.nan
+    try:
+        return time.mktime(time.strptime(value, "%Y-%m-%d"))
+    except (ValueError, OverflowError):
+        return math.nan
+
+
+def _epoch(value: TimeLike) -> float:
+    """把时间参数转换为时间戳"""
+    if isinstance(value, datetime.datetime):
+        return value.timestamp()
+    if isinstance(value, datetime.date):
+        return time.mktime(value.timetuple())
+    return float(value)
+
+
+class ProjectTable:
+    """按列存储的项目表
+
+    每行对应一个项目，所有字段都按列保存（不再另存 ProjectInfo 记录）；
+    table[row] 和迭代时从各列重建 ProjectInfo，修改重建的记录不会写回表中。
+    技术栈按编码顺序重建，与分析时的顺序可能不同。
+    """
+
+    def __init__(self, projects: Iterable[ProjectInfo] = ()):
+        """初始化项目表
+
+        Args:
+            projects: 初始项目记录
+        """
+        self.names: List[str] = []
+        self.paths: List[str] = []
+        self.identities: List[Optional[str]] = []
+        self.descriptions: List[Optional[str]] = []
+        self.status_codes = array("H")
+        self.priority_codes = array("H")
+        self.type_codes = array("H")
+        self.modified_epochs = array("d")
+        self.tech_masks: List[int] = []
+        self.truncated = array("b")
+        # 是否有未提交更改：1 / 0，未知为 -1
+        self.dirty = array("b")
+        self.metrics: Dict[str, array] = {key: array("d") for key in METRIC_COLUMNS}
+        self.primary_languages: List[Optional[str]] = []
+        self.languages: List[Optional[Dict[str, float]]] = []
+        self.branches: List[Optional[str]] = []
+        # 很少出现的字段按行号稀疏保存
+        self.limits_hit: Dict[int, List[str]] = {}
+        self.extras: Dict[int, Dict[str, Any]] = {}
+        self.extend(projects)
+
+    def append(self, info: Union[ProjectInfo, Dict[str, Any]]) -> int:
+        """追加一个项目
+
+        Args:
+            info: 项目记录（字典会先转换为 ProjectInfo）
+
+        Returns:
+            新行的行号
+        """
+        if not isinstance(info, ProjectInfo):
+            info = ProjectInfo.from_dict(info)
+        row = len(self.names)
+        self.names.append(info.name)
+        self.paths.append(info.path)
+        self.identities.append(info.identity)
+        self.descriptions.append(info.description)
+        self.status_codes.append(info.status_code)
+        self.priority_codes.append(info.priority_code)
+        self.type_codes.append(info.project_type_code)
+        self.modified_epochs.append(date_epoch(info.last_modified))
+        self.tech_masks.append(tech_mask(info.tech_stack))
+        self.truncated.append(bool(info.truncated))
+        self.dirty.append(-1 if info.dirty is None else int(info.dirty))
+        for key, column in self.metrics.items():
+            value = getattr(info, key)
+            column.append(math.nan if value is None else float(value))
+        self.primary_languages.append(info.primary_language)
+        self.languages.append(info.languages)
+        self.branches.append(info.branch)
+        if info.limits_hit:
+            self.limits_hit[row] = list(info.limits_hit)
+        if info.extra:
+            self.extras[row] = dict(info.extra)
+        return row
+
+    def extend(self, projects: Iterable[ProjectInfo]) -> None:
+        """追加多个项目"""
+        for info in projects:
+            self.append(info)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self) -> Iterator[ProjectInfo]:
+        return (self[row] for row in range(len(self.names)))
+
+    def __getitem__(self, row: int) -> ProjectInfo:
+        """从各列重建一行的项目记录"""
+        if row < 0:
+            row += len(self.names)
+        info = ProjectInfo(self.names[row], self.paths[row])
+        info.identity = self.identities[row]
+        info.description = self.descriptions[row]
+        info.status_code = self.status_codes[row]
+        info.priority_code = self.priority_codes[row]
+        info.project_type_code = self.type_codes[row]
+        info.last_modified = epoch_date(self.modified_epochs[row])
+        info["tech_stack"] = mask_techs(self.tech_masks[row])
+        info.truncated = bool(self.truncated[row])
+        info.dirty = None if self.dirty[row] < 0 else bool(self.dirty[row])
+        for key, column in self.metrics.items():
+            value = column[row]
+            if not math.isnan(value):
+                setattr(info, key, value if key == "size_mb" else int(value))
+        info.primary_language = self.primary_languages[row]
+        info.languages = self.languages[row]
+        info.branch = self.branches[row]
+        info.limits_hit = list(self.limits_hit.get(row, ()))
+        if row in self.extras:
+            info.extra = dict(self.extras[row])
+        return info
+
+    def where(self,
+              status: Optional[str] = None,
+              priority: Optional[str] = None,
+              project_type: Optional[str] = None,
+              tech: Union[str, Iterable[str], None] = None,
+              modified_since: Optional[TimeLike] = None,
+              truncated: Optional[bool] = None,
+              rows: Optional[Sequence[int]] = None) -> List[int]:
+        """按条件筛选行，所有条件同时满足
+
+        例如“本周修改过的活跃 Python 项目”：
+        ``table.where(status="活跃", tech="Python", modified_since=time.time() - 7 * 86400)``
+
+        Args:
+            status: 项目状态
+            priority: 项目优先级
+            project_type: 项目类型
+            tech: 技术栈名称（多个时需全部包含）
+            modified_since: 最后修改时间不早于该时间
+            truncated: 是否触发了分析预算限制
+            rows: 只在这些行中筛选，默认全部行
+
+        Returns:
+            满足条件的行号列表（按原顺序）
+        """
+        # 查询只查找已登记的取值，不向共享的取值表追加（未登记的取值没有匹配的行）
+        tests: List[tuple] = []
+        if status is not None:
+            tests.append((self.status_codes, STATUSES.find(status).__eq__))
+        if priority is not None:
+            tests.append((self.priority_codes, PRIORITIES.find(priority).__eq__))
+        if project_type is not None:
+            tests.append((self.type_codes, PROJECT_TYPES.find(project_type).__eq__))
+        if tech is not None:
+            mask = find_tech_mask([tech] if isinstance(tech, str) else tech)
+            if mask is None:
+                return []
+            tests.append((self.tech_masks, lambda value, mask=mask: value & mask == mask))
+        if modified_since is not None:
+            # NaN 的比较结果为 False，缺少日期的行不会被选中
+            tests.append((self.modified_epochs, _epoch(modified_since).__le__))
+        if truncated is not None:
+            tests.append((self.truncated, int(truncated).__eq__))
+
+        result = range(len(self.names)) if rows is None else rows
+        for column, test in tests:
+            result = self._select(column, test, result)
+        return list(result)
+
+    def _select(self, column: Sequence[Any], test: Callable[[Any], bool], rows: Sequence[int]) -> List[int]:
+        """保留列值满足条件的行（整列一次处理，不逐行执行 Python 代码）"""
+        if isinstance(rows, range) and rows == range(len(self.names)):
+            values = column
+        else:
+            values = map(column.__getitem__, rows)
+        return list(compress(rows, map(test, values)))
+
+    def column(self, key: str) -> Sequence[Any]:
+        """返回一列数据
+
+        Args:
+            key: name、status、priority、project_type、last_modified（时间戳）、
+                 tech_stack（位掩码）、truncated 或 METRIC_COLUMNS 中的字段
+
+        Returns:
+            列数据（编码列返回编码，数值列缺失值为 NaN）
+
+        Raises:
+            KeyError: 未按列存储的字段
+        """
+        columns = {
+            "name": self.names,
+            "status": self.status_codes,
+            "priority": self.priority_codes,
+            "project_type": self.type_codes,
+            "last_modified": self.modified_epochs,
+            "tech_stack": self.tech_masks,
+            "truncated": self.truncated,
+        }
+        if key in columns:
+            return columns[key]
+        return self.metrics[key]
+
+    def sort(self, key: str, reverse: bool = False, rows: Optional[Sequence[int]] = None) -> List[int]:
+        """按一列排序
+
+        编码列按取值表顺序排序（例如状态：活跃、维护中、暂停、未知）；
+        数值列的缺失值无论升序降序都排在最后。
+
+        Args:
+            key: 列名（见 column）
+            reverse: 是否降序
+            rows: 只对这些行排序，默认全部行
+
+        Returns:
+            排序后的行号列表
+        """
+        values = self.column(key)
+        rows = range(len(self.names)) if rows is None else rows
+        if isinstance(values, array) and values.typecode == "d":
+            present = [row for row in rows if not math.isnan(values[row])]
+            missing = [row for row in rows if math.isnan(values[row])]
+            return sorted(present, key=values.__getitem__, reverse=reverse) + missing
+        return sorted(rows, key=values.__getitem__, reverse=reverse)
+
+    def take(self, rows: Iterable[int]) -> "ProjectTable":
+        """返回由指定行组成的新表"""
+        return ProjectTable(self[row] for row in rows)
+
+    def to_columns(self, rows: Optional[Sequence[int]] = None) -> Dict[str, List[Any]]:
+        """批量导出为按列组织的普通数据
+
+        导出表中保存的全部字段：编码列解码为字符串，技术栈解码为名称列表，
+        最后修改时间为日期字符串，缺失的数值和未知的 dirty 为 None，
+        自定义字段在 extra 列中（没有时为 None）。
+
+        Args:
+            rows: 只导出这些行，默认全部行
+
+        Returns:
+            列名到值列表的映射
+        """
+        rows = range(len(self.names)) if rows is None else rows
+        statuses, priorities, types = STATUSES.values, PRIORITIES.values, PROJECT_TYPES.values
+        columns: Dict[str, List[Any]] = {
+            "name": [self.names[row] for row in rows],
+            "path": [self.paths[row] for row in rows],
+            "identity": [self.identities[row] for row in rows],
+            "description": [self.descriptions[row] for row in rows],
+            "status": [statuses[self.status_codes[row]] for row in rows],
+            "priority": [priorities[self.priority_codes[row]] for row in rows],
+            "project_type": [types[self.type_codes[row]] for row in rows],
+            "tech_stack": [mask_techs(self.tech_masks[row]) for row in rows],
+            "last_modified": [epoch_date(self.modified_epochs[row]) for row in rows],
+        }
+        for key, column in self.metrics.items():
+            convert = float if key == "size_mb" else int
+            columns[key] = [None if math.isnan(column[row]) else convert(column[row]) for row in rows]
+        columns["primary_language"] = [self.primary_languages[row] for row in rows]
+        columns["languages"] = [self.languages[row] for row in rows]
+        columns["branch"] = [self.branches[row] for row in rows]
+        columns["dirty"] = [None if self.dirty[row] < 0 else bool(self.dirty[row]) for row in rows]
+        columns["truncated"] = [bool(self.truncated[row]) for row in rows]
+        columns["limits_hit"] = [list(self.limits_hit.get(row, ())) for row in rows]
+        columns["extra"] = [dict(self.extras[row]) if row in self.extras else None for row in rows]
+        return columns
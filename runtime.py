@@ -0,0 +1,150 @@
+"""
+运行时资源模块，在定时运行的各次同步之间保留线程池等常驻资源
+
+分析线程池、Notion 写入线程池、git cat-file 进程、HTTP 连接池和内存中的状态缓存在第一次运行时创建，
+之后的运行直接复用。运行次数达到 RUNTIME_RECYCLE_RUNS 或进程常驻内存超过 RUNTIME_MAX_RSS_MB 时
+全部释放并在下次运行时重建，防止长时间运行时资源泄漏。
+"""
+
+import gc
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from loguru import logger
+
+from config import (ANALYSIS_WORKERS, NOTION_SYNC_WORKERS, RUNTIME_MAX_RSS_MB, RUNTIME_RECYCLE_RUNS,
+                    STATE_MAX_AGE_DAYS)
+from state import prune_all_state, save_all_state, unload_all_state
+from fingerprint import prune_tree_state
+from git_pool import close_git_pool
+
+
+def current_rss_mb() -> Optional[float]:
+    """获取进程当前的常驻内存（MB）
+
+    读取 /proc/self/statm。没有 /proc 的系统（macOS、BSD）无法获取当前值，返回 None，
+    不检查内存上限（getrusage 只提供不会下降的峰值，超过上限后会每次运行都回收）。
+
+    Returns:
+        常驻内存，无法获取时返回 None
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class Runtime:
+    """跨运行复用的线程池和缓存"""
+
+    def __init__(self, max_rss_mb: float = RUNTIME_MAX_RSS_MB, recycle_runs: int = RUNTIME_RECYCLE_RUNS):
+        """初始化运行时（线程池在首次使用时创建）
+
+        Args:
+            max_rss_mb: 运行结束后常驻内存超过该值（MB）时回收，0 表示不检查
+            recycle_runs: 每运行该次数回收一次，0 表示不定期回收
+        """
+        self.max_rss_mb = max_rss_mb
+        self.recycle_runs = recycle_runs
+        self.runs = 0
+        self.recycled = 0
+        self._analysis_pool: Optional[ThreadPoolExecutor] = None
+        self._sync_pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def analysis_pool(self) -> ThreadPoolExecutor:
+        """项目分析线程池"""
+        with self._lock:
+            if self._analysis_pool is None:
+                self._analysis_pool = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS,
+                                                         thread_name_prefix="analysis")
+            return self._analysis_pool
+
+    @property
+    def sync_pool(self) -> ThreadPoolExecutor:
+        """Notion 写入线程池"""
+        with self._lock:
+            if self._sync_pool is None:
+                self._sync_pool = ThreadPoolExecutor(max_workers=NOTION_SYNC_WORKERS,
+                                                     thread_name_prefix="notion-sync")
+            return self._sync_pool
+
+    def end_run(self) -> None:
+        """一次运行结束：删除长期未使用的状态后保存，需要时回收资源"""
+        prune_all_state(STATE_MAX_AGE_DAYS)
+        prune_tree_state(STATE_MAX_AGE_DAYS)
+        save_all_state()
+        self.runs += 1
+
+        reason = None
+        if self.recycle_runs and self.runs % self.recycle_runs == 0:
+            reason = f"已运行 {self.runs} 次"
+        elif self.max_rss_mb:
+            rss = current_rss_mb()
+            if rss is not None and rss > self.max_rss_mb:
+                reason = f"常驻内存 {rss:.0f} MB 超过上限 {self.max_rss_mb} MB"
+        if reason:
+            logger.info(f"回收运行时资源: {reason}")
+            self.recycle()
+
+    def _shutdown_pools(self) -> None:
+        """关闭线程池（等待进行中的任务完成）"""
+        with self._lock:
+            pools = [self._analysis_pool, self._sync_pool]
+            self._analysis_pool = self._sync_pool = None
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown()
+
+    def recycle(self) -> None:
+        """释放所有常驻资源，下次运行时重新创建"""
+        self._shutdown_pools()
+        close_git_pool()
+        # notion_client 依赖 requests，只在已加载时重置会话（导出模式不加载）
+        if "notion_client" in sys.modules:
+            sys.modules["notion_client"].reset_session()
+        unload_all_state()
+        gc.collect()
+        self.recycled += 1
+
+        rss = current_rss_mb()
+        if self.max_rss_mb and rss is not None and rss > self.max_rss_mb:
+            logger.warning(f"回收后常驻内存仍为 {rss:.0f} MB，超过上限 {self.max_rss_mb} MB，建议重启进程")
+
+    def close(self) -> None:
+        """关闭运行时（进程退出前调用）"""
+        self._shutdown_pools()
+        close_git_pool()
+        save_all_state()
+
+
+# 进程内共享的运行时
+_runtime: Optional[Runtime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime() -> Runtime:
+    """获取进程内共享的运行时
+
+    Returns:
+        运行时
+    """
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = Runtime()
+        return _runtime
+
+
+def close_runtime() -> None:
+    """关闭共享的运行时"""
+    global _runtime
+    with _runtime_lock:
+        runtime, _runtime = _runtime, None
+    if runtime is not None:
+        runtime.close()
@@ -159,6 +159,48 @@ def create_notion_database(api_key, parent_id):
             },
             "最后修改日期": {
                 "date": {}
+            },
+            "项目大小": {
+                "number": {"format": "number"}
+            },
+            "文件数量": {
+                "number": {"format": "number"}
+            },
+            "代码行数": {
+                "number": {"format": "number_with_commas"}
+            },
+            "主要语言": {
+                "select": {}
+            },
+            "语言构成": {
+                "rich_text": {}
+            },
+            "近30天提交": {
+                "number": {"format": "number"}
+            },
+            "近90天提交": {
+                "number": {"format": "number"}
+            },
+            "活跃贡献者": {
+                "number": {"format": "number"}
+            },
+            "当前分支": {
+                "rich_text": {}
+            },
+            "领先提交": {
+                "number": {"format": "number"}
+            },
+            "落后提交": {
+                "number": {"format": "number"}
+            },
+            "有未提交更改": {
+                "checkbox": {}
+            },
+            "工作区状态": {
+                "rich_text": {}
+            },
+            "项目标识": {
+                "rich_text": {}
             }
         }
     }
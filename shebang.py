@@ -0,0 +1,145 @@
+"""
+脚本识别模块，按 shebang 识别无扩展名的可执行脚本，并按文件名识别 Dockerfile
+
+每个脚本最多读取开头的 SHEBANG_READ_BYTES 字节，每个项目最多检查 SHEBANG_MAX_FILES 个文件；
+识别结果按 inode 和修改时间缓存，文件未变化时只 stat 不再读取。
+"""
+
+import os
+import re
+import stat
+from pathlib import Path
+from typing import List, Optional, Set
+from loguru import logger
+
+from config import (
+    STATE_DIR,
+    SHEBANG_TECH_MARKERS,
+    DOCKERFILE_PREFIXES,
+    DOCKERFILE_SUFFIXES,
+    SHEBANG_READ_BYTES,
+    SHEBANG_MAX_FILES,
+)
+from fingerprint import TreeSnapshot
+from state import StateFile
+
+# 识别结果缓存文件
+SHEBANG_CACHE_FILE = STATE_DIR / "shebangs.json"
+
+# 缓存格式版本
+SHEBANG_CACHE_VERSION = 1
+
+# 常被放置可执行脚本的目录，其中的文件即使没有可执行权限（例如在 Windows 上检出）也会检查
+SCRIPT_DIRS = {"bin", "scripts", "script", "tools", "hooks"}
+
+# "设备号:inode" -> [mtime 纳秒, 解释器名称或 None]
+_cache = StateFile(SHEBANG_CACHE_FILE, SHEBANG_CACHE_VERSION)
+
+
+def parse_shebang(head: bytes) -> Optional[str]:
+    """从文件开头解析解释器名称
+
+    Args:
+        head: 文件开头的字节
+
+    Returns:
+        去掉路径和版本号的小写解释器名称（如 "python"、"bash"），没有 shebang 时返回 None
+    """
+    if not head.startswith(b"#!"):
+        return None
+    line = head[2:].split(b"\n", 1)[0].decode("utf-8", "replace").strip()
+    parts = line.split()
+    if not parts:
+        return None
+
+    interpreter = os.path.basename(parts[0])
+    if interpreter == "env":
+        # "#!/usr/bin/env -S python3 -u" 等形式，跳过 env 自身的选项和变量赋值
+        args = [arg for arg in parts[1:] if not arg.startswith("-") and "=" not in arg]
+        if not args:
+            return None
+        interpreter = os.path.basename(args[0])
+    return re.sub(r"[\d.]+$", "", interpreter.lower()) or None
+
+
+def is_dockerfile(name: str) -> bool:
+    """根据文件名判断是否为 Dockerfile
+
+    Args:
+        name: 文件名
+
+    Returns:
+        是否为 Dockerfile
+    """
+    lower = name.lower()
+    return lower.startswith(DOCKERFILE_PREFIXES) or lower.endswith(DOCKERFILE_SUFFIXES)
+
+
+def _is_candidate(name: str) -> bool:
+    """无扩展名、非隐藏文件才需要检查 shebang"""
+    return "." not in name and not is_dockerfile(name)
+
+
+def sniff_interpreter(path: Path) -> Optional[str]:
+    """识别可执行脚本的解释器，结果按 inode 和修改时间缓存
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        解释器名称，不是脚本或无法读取时返回 None
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+
+    key = f"{st.st_dev}:{st.st_ino}"
+    cached = _cache.get(key)
+    if cached is not None and cached[0] == st.st_mtime_ns:
+        return cached[1]
+
+    interpreter = None
+    if st.st_mode & 0o111 or path.parent.name.lower() in SCRIPT_DIRS:
+        try:
+            with open(path, "rb") as f:
+                interpreter = parse_shebang(f.read(SHEBANG_READ_BYTES))
+        except OSError as e:
+            logger.debug(f"无法读取脚本: {path} - {str(e)}")
+    _cache.set(key, [st.st_mtime_ns, interpreter])
+    return interpreter
+
+
+def detect_script_tech(project_path: Path, snapshot: TreeSnapshot) -> Set[str]:
+    """识别项目中无扩展名脚本和 Dockerfile 对应的技术栈
+
+    优先检查 bin/、scripts/ 等目录和较浅层级中的文件，最多检查 SHEBANG_MAX_FILES 个。
+
+    Args:
+        project_path: 项目路径
+        snapshot: 项目目录扫描结果
+
+    Returns:
+        技术栈集合
+    """
+    tech: Set[str] = set()
+    candidates: List[str] = []
+    for rel, entry in snapshot.iter_files():
+        name = entry[0]
+        if is_dockerfile(name):
+            tech.add("Docker")
+        elif _is_candidate(name) and entry[1] > 2:
+            candidates.append(rel)
+
+    def priority(rel: str):
+        parent = os.path.basename(os.path.dirname(rel)).lower()
+        return (parent not in SCRIPT_DIRS, rel.count(os.sep), rel)
+
+    candidates.sort(key=priority)
+    for rel in candidates[:SHEBANG_MAX_FILES]:
+        interpreter = sniff_interpreter(project_path / rel)
+        if interpreter:
+            tech.update(SHEBANG_TECH_MARKERS.get(interpreter, []))
+    return tech
@@ -0,0 +1,198 @@
+"""
+本地状态模块，管理保存在 STATE_DIR 中、跨运行复用的 JSON 缓存文件
+"""
+
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple
+from loguru import logger
+
+# 所有已创建的状态文件，用于运行结束时统一保存
+_registry: List["StateFile"] = []
+_registry_lock = threading.Lock()
+
+
+class StateFile:
+    """持久化的 JSON 键值状态文件
+
+    首次访问时才从磁盘加载，修改后调用 save() 原子写回；版本号不一致时丢弃旧数据。
+    每项记录最近一次读写的日期，prune() 删除长期未使用的项（例如已删除或移动的项目）。
+    可在多个线程中同时使用。
+    """
+
+    def __init__(self, path: Path, version: int = 1):
+        """初始化状态文件
+
+        Args:
+            path: 状态文件路径
+            version: 数据格式版本
+        """
+        self.path = path
+        self.version = version
+        self._entries: Optional[Dict[str, Any]] = None
+        # 键 -> 最近一次读写的日期（自纪元起的天数）
+        self._used: Dict[str, int] = {}
+        self._dirty = False
+        self._lock = threading.RLock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def _load(self) -> Dict[str, Any]:
+        """加载状态数据（调用方需持有锁）"""
+        if self._entries is None:
+            self._entries = {}
+            self._used = {}
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == self.version:
+                    self._entries = data.get("entries", {})
+                    self._used = data.get("used", {})
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                logger.warning(f"状态文件损坏，将重新生成: {self.path} - {str(e)}")
+        return self._entries
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """读取一项状态
+
+        Args:
+            key: 键
+            default: 不存在时的默认值
+
+        Returns:
+            状态值
+        """
+        with self._lock:
+            entries = self._load()
+            if key not in entries:
+                return default
+            self._touch(key)
+            return entries[key]
+
+    def set(self, key: str, value: Any) -> None:
+        """写入一项状态
+
+        Args:
+            key: 键
+            value: 可 JSON 序列化的值
+        """
+        with self._lock:
+            self._load()[key] = value
+            self._used[key] = _today()
+            self._dirty = True
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        """删除一项状态并返回其值"""
+        with self._lock:
+            entries = self._load()
+            if key not in entries:
+                return default
+            self._dirty = True
+            self._used.pop(key, None)
+            return entries.pop(key)
+
+    def items(self) -> List[Tuple[str, Any]]:
+        """返回所有状态项的快照（不更新使用日期）"""
+        with self._lock:
+            return list(self._load().items())
+
+    def _touch(self, key: str) -> None:
+        """记录该项今天被使用（调用方需持有锁；每项每天最多标记一次修改）"""
+        today = _today()
+        if self._used.get(key) != today:
+            self._used[key] = today
+            self._dirty = True
+
+    def prune(self, max_age_days: int) -> int:
+        """删除超过指定天数未读写的项
+
+        没有使用日期的项（旧格式文件中加载）从今天开始计算。
+
+        Args:
+            max_age_days: 最长未使用天数
+
+        Returns:
+            删除的项数
+        """
+        with self._lock:
+            entries = self._load()
+            today = _today()
+            stale = [key for key in entries if today - self._used.setdefault(key, today) > max_age_days]
+            for key in stale:
+                del entries[key]
+                del self._used[key]
+            if stale:
+                self._dirty = True
+                logger.debug(f"删除 {len(stale)} 项长期未使用的状态: {self.path.name}")
+            return len(stale)
+
+    def clear_memory(self) -> None:
+        """丢弃内存中的数据，下次访问时重新从磁盘加载（未保存的修改会丢失）"""
+        with self._lock:
+            self._entries = None
+            self._used = {}
+            self._dirty = False
+
+    def unload(self) -> None:
+        """保存修改后释放内存中的数据，下次访问时重新从磁盘加载（保存失败时保留）"""
+        with self._lock:
+            self.save()
+            if not self._dirty:
+                self._entries = None
+                self._used = {}
+
+    def save(self) -> None:
+        """把修改写回磁盘（没有变化时不写）"""
+        with self._lock:
+            if self._entries is None or not self._dirty:
+                return
+            tmp_path = self.path.with_suffix(".tmp")
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"version": self.version, "entries": self._entries, "used": self._used},
+                              f, ensure_ascii=False, separators=(",", ":"))
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except OSError as e:
+                logger.warning(f"保存状态文件失败: {self.path} - {str(e)}")
+
+
+def _today() -> int:
+    """今天的日期（自纪元起的天数）"""
+    return int(time.time() // 86400)
+
+
+def prune_all_state(max_age_days: int) -> None:
+    """删除所有状态文件中超过指定天数未使用的项（不写盘）
+
+    Args:
+        max_age_days: 最长未使用天数，0 表示不删除
+    """
+    if max_age_days <= 0:
+        return
+    with _registry_lock:
+        state_files = list(_registry)
+    for state_file in state_files:
+        state_file.prune(max_age_days)
+
+
+def save_all_state() -> None:
+    """保存所有有修改的状态文件"""
+    with _registry_lock:
+        state_files = list(_registry)
+    for state_file in state_files:
+        state_file.save()
+
+
+def unload_all_state() -> None:
+    """保存并释放所有状态文件占用的内存（长时间运行时定期回收）"""
+    with _registry_lock:
+        state_files = list(_registry)
+    for state_file in state_files:
+        state_file.unload()
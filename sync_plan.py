@@ -0,0 +1,242 @@
+"""
+同步计划模块，在写入 Notion 之前计算完整的操作列表
+
+把分析结果与 Notion 数据库中已有页面的属性逐项比对，得到新建、更新（只包含变化的属性）、
+跳过和归档操作。计划可以保存为 JSON 文件，之后不重新分析直接执行。
+"""
+
+import json
+import datetime
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+from loguru import logger
+
+from config import NOTION_RATE_LIMIT, NOTION_SYNC_WORKERS, NOTION_ARCHIVE_MISSING
+from notion_client import NotionClient, find_pages_to_archive, match_pages
+
+# 计划文件格式版本
+PLAN_VERSION = 1
+
+# 操作类型
+OP_CREATE = "create"
+OP_UPDATE = "update"
+OP_SKIP = "skip"
+OP_ARCHIVE = "archive"
+
+
+def property_value(prop: Optional[Dict[str, Any]]) -> Any:
+    """提取 Notion 属性中可比较的值
+
+    同时适用于写入时构造的属性和从 Notion 读取的页面属性（后者带有 type、plain_text 等额外字段）。
+
+    Args:
+        prop: Notion 属性对象
+
+    Returns:
+        文本、数字、布尔值、选项名称（多选为排序后的元组）或 None
+    """
+    if not prop:
+        return None
+    for kind in ("title", "rich_text"):
+        if kind in prop:
+            return "".join(
+                part.get("plain_text") or part.get("text", {}).get("content", "")
+                for part in prop[kind] or []
+            )
+    if "select" in prop:
+        return (prop["select"] or {}).get("name")
+    if "multi_select" in prop:
+        return tuple(sorted(option.get("name", "") for option in prop["multi_select"] or []))
+    if "date" in prop:
+        return (prop["date"] or {}).get("start")
+    if "number" in prop:
+        return prop["number"]
+    if "checkbox" in prop:
+        return prop["checkbox"]
+    return None
+
+
+def changed_properties(properties: Dict[str, Any], existing: Dict[str, Any]) -> Dict[str, Any]:
+    """返回与页面现有属性不同的属性
+
+    Args:
+        properties: 本次要写入的属性
+        existing: 页面现有属性
+
+    Returns:
+        需要写入的属性子集
+    """
+    return {
+        name: prop for name, prop in properties.items()
+        if property_value(prop) != property_value(existing.get(name))
+    }
+
+
+def build_plan(projects: Iterable[Dict[str, Any]], client: NotionClient,
+               archive_missing: bool = NOTION_ARCHIVE_MISSING) -> Dict[str, Any]:
+    """根据分析结果和 Notion 数据库现状计算同步计划
+
+    Args:
+        projects: 项目信息列表
+        client: 目标数据库的 Notion 客户端
+        archive_missing: 是否归档数据库中有、本次扫描没有的项目（受 find_pages_to_archive 的安全阈值限制）
+
+    Returns:
+        同步计划（可直接序列化为 JSON）
+    """
+    projects = list(projects)
+    pages = client.load_existing_pages()
+    existing = {name: page["id"] for name, page in pages.items()}
+    pages_by_id = {page["id"]: page for page in pages.values()}
+    matches = match_pages(projects, existing, client.page_identities())
+    # 需要补齐的属性和选项在执行计划时用一次数据库 PATCH 完成
+    schema_changes = client.plan_schema(projects)
+    operations: List[Dict[str, Any]] = []
+
+    for project_info, page_id in zip(projects, matches):
+        name = project_info["name"]
+        identity = project_info.get("identity")
+        properties = client.validate_properties(client._build_properties(project_info))
+
+        if page_id is None:
+            operations.append({"op": OP_CREATE, "name": name, "identity": identity, "properties": properties})
+            continue
+
+        changed = changed_properties(properties, pages_by_id[page_id]["properties"])
+        if changed:
+            operations.append({"op": OP_UPDATE, "name": name, "identity": identity, "page_id": page_id,
+                               "fields": list(changed), "properties": changed})
+        else:
+            operations.append({"op": OP_SKIP, "name": name, "page_id": page_id})
+
+    # 数据库中有、本次扫描没有的项目（按标识匹配到的旧名称页面不归档）
+    if archive_missing:
+        matched = set(matches)
+        keep = {project_info["name"] for project_info in projects}
+        keep.update(name for name, page_id in existing.items() if page_id in matched)
+        for name, page_id in find_pages_to_archive(existing, keep, client.owned_page_ids()).items():
+            operations.append({"op": OP_ARCHIVE, "name": name, "page_id": page_id})
+
+    return {"database_id": client.database_id, "schema": schema_changes, "operations": operations}
+
+
+def plan_counts(plan: Dict[str, Any]) -> Dict[str, int]:
+    """统计计划中各类操作的数量"""
+    counts = {OP_CREATE: 0, OP_UPDATE: 0, OP_SKIP: 0, OP_ARCHIVE: 0}
+    for operation in plan["operations"]:
+        counts[operation["op"]] += 1
+    return counts
+
+
+def estimate_seconds(plan: Dict[str, Any], rate: float = NOTION_RATE_LIMIT) -> float:
+    """按当前限流速率估算执行计划所需的时间
+
+    Args:
+        plan: 同步计划
+        rate: 每秒请求数
+
+    Returns:
+        预计秒数（每个非跳过操作一个请求，结构变更一个请求）
+    """
+    return plan_requests(plan) / rate
+
+
+def plan_requests(plan: Dict[str, Any]) -> int:
+    """统计执行计划需要发送的请求数"""
+    counts = plan_counts(plan)
+    return len(plan["operations"]) - counts[OP_SKIP] + (1 if plan.get("schema") else 0)
+
+
+def save_plans(plans: List[Dict[str, Any]], path: Path) -> None:
+    """保存同步计划
+
+    Args:
+        plans: 各数据库的同步计划
+        path: 计划文件路径
+    """
+    data = {
+        "version": PLAN_VERSION,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "plans": plans,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def load_plans(path: Path) -> List[Dict[str, Any]]:
+    """读取同步计划
+
+    Args:
+        path: 计划文件路径
+
+    Returns:
+        各数据库的同步计划
+
+    Raises:
+        ValueError: 文件格式版本不匹配
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != PLAN_VERSION:
+        raise ValueError(f"不支持的计划文件版本: {data.get('version')}")
+    return data["plans"]
+
+
+def apply_plan(plan: Dict[str, Any], client: NotionClient,
+               executor: Optional[Executor] = None) -> Dict[str, Any]:
+    """并发执行同步计划
+
+    Args:
+        plan: 同步计划
+        client: 目标数据库的 Notion 客户端
+        executor: 执行写入的线程池，默认临时创建
+
+    Returns:
+        执行结果统计
+    """
+    counts = plan_counts(plan)
+    stats = {"total": len(plan["operations"]), "created": 0, "updated": 0,
+             "archived": 0, "failed": 0, "skipped": counts[OP_SKIP]}
+    logger.info(f"开始执行同步计划: {client.database_id}，"
+                f"新建 {counts[OP_CREATE]}，更新 {counts[OP_UPDATE]}，归档 {counts[OP_ARCHIVE]}")
+
+    def apply_one(operation: Dict[str, Any]) -> str:
+        """执行单个操作，返回结果类型"""
+        op, name = operation["op"], operation["name"]
+        if op == OP_ARCHIVE:
+            return "archived" if client.archive_page(operation["page_id"], name) else "failed"
+        if op == OP_CREATE:
+            page_id = client.create_page(name, operation["properties"])
+            outcome = "created"
+        else:
+            page_id = operation["page_id"]
+            if not client.update_page(page_id, name, {"properties": operation["properties"]}):
+                page_id = None
+            outcome = "updated"
+        if not page_id:
+            return "failed"
+        if operation.get("identity"):
+            client.remember_identity(operation["identity"], page_id)
+        return outcome
+
+    # 先补齐数据库结构，失败时仍继续写入（缺少的选项会导致对应页面写入失败）
+    if plan.get("schema"):
+        client.update_schema(plan["schema"])
+
+    pending = [operation for operation in plan["operations"] if operation["op"] != OP_SKIP]
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=NOTION_SYNC_WORKERS)
+    try:
+        for outcome in executor.map(apply_one, pending):
+            stats[outcome] += 1
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    logger.info(f"同步计划执行完成. 总计: {stats['total']}, 新建: {stats['created']}, "
+                f"更新: {stats['updated']}, 归档: {stats['archived']}, "
+                f"失败: {stats['failed']}, 跳过: {stats['skipped']}")
+    return stats
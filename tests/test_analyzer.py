@@ -5,19 +5,29 @@ Notion 项目更新器 - 项目分析器测试
 
 import os
 import sys
+import shutil
+import tempfile
 import unittest
 from pathlib import Path
+from unittest.mock import patch
 
 # 添加父目录到导入路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import analyzer
 from analyzer import (
+    get_projects,
+    get_nested_projects,
+    find_nested_projects,
     detect_tech_stack,
     detect_project_type,
     detect_project_status,
     detect_project_priority,
     extract_description,
-    get_last_modified_date
+    get_last_modified_date,
+    get_last_commit_time,
+    analyze_project,
+    AnalysisBudget
 )
 
 class TestAnalyzer(unittest.TestCase):
@@ -80,5 +90,111 @@ class TestAnalyzer(unittest.TestCase):
         self.assertIsInstance(date, str)
         self.assertTrue(len(date) > 0)
 
+    def test_get_last_commit_time_without_git(self):
+        """测试非 Git 项目没有提交时间"""
+        self.assertIsNone(get_last_commit_time(self.test_project_dir))
+    
+    def test_analyze_project_budget(self):
+        """测试触发文件数预算时返回标记为截断的结果"""
+        with patch("analyzer.AnalysisBudget", lambda: AnalysisBudget(max_files=1)):
+            info = analyze_project(self.test_project_dir)
+        self.assertTrue(info["truncated"])
+        self.assertEqual(info["limits_hit"], ["files"])
+    
+    def test_analyze_project_reads_activity_once(self):
+        """测试项目状态、最后修改日期和活跃度统计共用一次活跃度查询"""
+        activity = {"branch": "main", "last_commit": "2020-01-02T03:04:05+00:00", "commits_30d": 0,
+                    "commits_90d": 0, "contributors_90d": 0, "ahead": None, "behind": None, "timed_out": False}
+        with patch("analyzer.get_git_activity", return_value=activity) as mock_activity:
+            info = analyze_project(self.test_project_dir)
+        mock_activity.assert_called_once()
+        self.assertEqual(info["status"], "暂停")
+        self.assertEqual(info["last_modified"], "2020-01-02")
+        self.assertEqual(info["branch"], "main")
+
+class TestExtractDescription(unittest.TestCase):
+    """README 描述提取测试类"""
+    
+    def setUp(self):
+        """创建临时项目目录"""
+        self.project_dir = Path(tempfile.mkdtemp())
+    
+    def tearDown(self):
+        """清理临时项目目录"""
+        shutil.rmtree(self.project_dir)
+    
+    def test_markdown_skips_badges_and_title(self):
+        """测试跳过徽章、标题和图片，提取第一个正文段落"""
+        (self.project_dir / "README.md").write_text(
+            "[![CI](badge.svg)](ci)\n\n# 标题\n\n这是 **项目** [描述](http://x)。\n"
+        )
+        self.assertEqual(extract_description(self.project_dir), "这是 项目 描述。")
+    
+    def test_large_readme_bounded_read(self):
+        """测试大 README 只读取开头部分"""
+        with open(self.project_dir / "README.md", "w") as f:
+            f.write("# Big\n\n")
+            f.write("<!-- generated -->\n" * 2000)
+            f.write("\nParagraph after the read limit.\n")
+        
+        with patch("analyzer.README_MAX_BYTES", 8192):
+            self.assertTrue(extract_description(self.project_dir).startswith("位于"))
+        self.assertEqual(extract_description(self.project_dir), "Paragraph after the read limit.")
+    
+    def test_rst_readme(self):
+        """测试 reStructuredText README"""
+        (self.project_dir / "README.rst").write_text(
+            "=====\nTitle\n=====\n\n.. image:: badge.svg\n\nA ``tool`` for `docs <http://x>`_.\n"
+        )
+        self.assertEqual(extract_description(self.project_dir), "A tool for docs.")
+    
+    def test_manifest_description_fallback(self):
+        """测试没有 README 时使用 pyproject.toml 中的描述"""
+        (self.project_dir / "pyproject.toml").write_text('[project]\nname = "x"\ndescription = "清单描述"\n')
+        self.assertEqual(extract_description(self.project_dir), "清单描述")
+
+class TestProjectDiscovery(unittest.TestCase):
+    """项目发现测试类"""
+    
+    def setUp(self):
+        """创建 org/team/repo 布局和 monorepo 的测试目录"""
+        self.scan_dir = Path(tempfile.mkdtemp())
+        
+        (self.scan_dir / "org" / "team" / "repo" / ".git").mkdir(parents=True)
+        (self.scan_dir / "mono" / ".git").mkdir(parents=True)
+        (self.scan_dir / "mono" / "packages" / "web").mkdir(parents=True)
+        (self.scan_dir / "mono" / "packages" / "web" / "package.json").write_text("{}")
+        (self.scan_dir / "mono" / "node_modules" / "dep").mkdir(parents=True)
+        (self.scan_dir / "mono" / "node_modules" / "dep" / "package.json").write_text("{}")
+        (self.scan_dir / "scripts").mkdir()
+        (self.scan_dir / "scripts" / "run.sh").touch()
+    
+    def tearDown(self):
+        """清理测试目录"""
+        shutil.rmtree(self.scan_dir)
+    
+    def test_get_projects_recursive(self):
+        """测试按标记递归发现项目并剪枝依赖目录"""
+        projects = get_projects(self.scan_dir, max_depth=3)
+        relative = sorted(p.relative_to(self.scan_dir).as_posix() for p in projects)
+        self.assertEqual(relative, ["mono", "mono/packages/web", "org/team/repo", "scripts"])
+    
+    def test_get_projects_depth_limit(self):
+        """测试深度限制"""
+        projects = get_projects(self.scan_dir, max_depth=1)
+        relative = sorted(p.relative_to(self.scan_dir).as_posix() for p in projects)
+        self.assertEqual(relative, ["mono", "org", "scripts"])
+    
+    def test_get_nested_projects(self):
+        """测试嵌套子项目只计入最近的父项目"""
+        projects = get_projects(self.scan_dir, max_depth=3)
+        nested = get_nested_projects(projects)
+        self.assertEqual(nested, {self.scan_dir / "mono": ["packages/web"]})
+    
+    def test_find_nested_projects(self):
+        """测试单独分析项目时得到与全量扫描相同的嵌套子项目"""
+        self.assertEqual(find_nested_projects(self.scan_dir / "mono", depth=1, max_depth=3), ["packages/web"])
+        self.assertEqual(find_nested_projects(self.scan_dir / "mono", depth=1, max_depth=2), [])
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Notion 项目更新器 - 控制服务测试
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+# 添加父目录到导入路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from control_server import SyncQueue, ControlServer
+
+class TestControlServer(unittest.TestCase):
+    """控制服务测试类"""
+
+    def setUp(self):
+        """启动使用模拟同步函数的控制服务"""
+        self.calls = []
+        self.done = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+        def run_full():
+            self.release.wait()
+            self.calls.append(None)
+            self.done.set()
+            return {"phases": {"analyze": 1.0, "total": 2.0}}
+
+        def run_projects(paths):
+            self.release.wait()
+            self.calls.append(paths)
+            self.done.set()
+            return {"phases": {"total": 0.1}}
+
+        projects = {"api": Path("/scan/api")}
+        self.queue = SyncQueue(run_full, run_projects)
+        self.server = ControlServer(self.queue, projects.get, "127.0.0.1", 0, token="secret")
+        self.server.start()
+
+    def tearDown(self):
+        """停止控制服务"""
+        self.release.set()
+        self.server.close()
+
+    def _request(self, method, path, body=None, token="secret"):
+        """发送请求，返回 (状态码, JSON 响应)"""
+        request = urllib.request.Request(self.server.address + path, method=method,
+                                         data=json.dumps(body).encode() if body is not None else None)
+        if token:
+            request.add_header("Authorization", f"Bearer {token}")
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def _wait_idle(self):
+        """等待队列中的任务执行完成"""
+        for _ in range(100):
+            status = self.queue.status()
+            if not status["queue_depth"] and status["running"] is None:
+                return
+            time.sleep(0.02)
+
+    def test_sync_project(self):
+        """测试触发单个项目同步并在状态中看到结果"""
+        code, data = self._request("POST", "/sync/api")
+        self.assertEqual(code, 202)
+        self.assertEqual(data["queued"], ["/scan/api"])
+        self.assertTrue(self.done.wait(5))
+        self._wait_idle()
+
+        code, status = self._request("GET", "/status", token=None)
+        self.assertEqual(code, 200)
+        self.assertEqual(self.calls, [[Path("/scan/api")]])
+        self.assertEqual(status["last_run"]["kind"], "projects")
+        self.assertEqual(status["last_run"]["phases"], {"total": 0.1})
+        self.assertIn("notion", status)
+
+    def test_requests_coalesce(self):
+        """测试排队中的请求合并，全量同步包含指定项目"""
+        self.release.clear()
+        self._request("POST", "/sync")
+        # 等待第一个全量同步开始执行后再排队
+        for _ in range(100):
+            if self.queue.status()["running"]:
+                break
+            time.sleep(0.02)
+        self._request("POST", "/sync", {"projects": ["api"]})
+        self._request("POST", "/sync")
+        code, data = self._request("POST", "/sync/api")
+        self.assertEqual(data["queue_depth"], 2)
+
+        self.release.set()
+        self._wait_idle()
+        self.assertEqual(self.calls, [None, None])
+
+    def test_rejected_requests(self):
+        """测试令牌校验、未知项目和错误的请求体"""
+        self.assertEqual(self._request("POST", "/sync", token="wrong")[0], 401)
+        self.assertEqual(self._request("POST", "/sync/missing")[0], 404)
+        self.assertEqual(self._request("POST", "/sync", {"projects": []})[0], 400)
+        self.assertEqual(self._request("GET", "/unknown")[0], 404)
+        self.assertEqual(self.calls, [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Notion 项目更新器 - 结果导出测试
+"""
+
+import os
+import csv
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+# 添加父目录到导入路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exporter import ProjectExporter
+from project_info import ProjectInfo
+
+class TestExporter(unittest.TestCase):
+    """结果导出测试类"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.projects = [
+            ProjectInfo("api", "/p/api", tech_stack=["Python", "Docker"], status="活跃",
+                        languages={"Python": 1.0}, code_lines=10),
+            ProjectInfo("web", "/p/web", tech_stack=["JavaScript"]),
+        ]
+
+    def tearDown(self):
+        """清理测试环境"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_export_jsonl(self):
+        """测试导出 JSON Lines"""
+        path = self.temp_dir / "out" / "projects.jsonl"
+        with ProjectExporter(path) as exporter:
+            for info in self.projects:
+                exporter.write(info)
+
+        rows = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        self.assertEqual([row["name"] for row in rows], ["api", "web"])
+        self.assertEqual(rows[0]["tech_stack"], ["Python", "Docker"])
+        self.assertEqual(rows[0]["code_lines"], 10)
+        self.assertNotIn("code_lines", rows[1])
+        self.assertEqual(os.listdir(path.parent), ["projects.jsonl"])
+
+    def test_export_csv(self):
+        """测试导出 CSV"""
+        path = self.temp_dir / "projects.csv"
+        with ProjectExporter(path) as exporter:
+            for info in self.projects:
+                exporter.write(info)
+
+        with open(path, encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(rows[0]["tech_stack"], "Python, Docker")
+        self.assertEqual(rows[0]["status"], "活跃")
+        self.assertEqual(json.loads(rows[0]["languages"]), {"Python": 1.0})
+        self.assertEqual(rows[1]["code_lines"], "")
+
+    def test_failure_keeps_existing_file(self):
+        """测试导出中途失败时保留原文件并删除临时文件"""
+        path = self.temp_dir / "projects.jsonl"
+        path.write_text("old\n")
+        with self.assertRaises(RuntimeError):
+            with ProjectExporter(path) as exporter:
+                exporter.write(self.projects[0])
+                raise RuntimeError("分析失败")
+
+        self.assertEqual(path.read_text(), "old\n")
+        self.assertEqual(os.listdir(self.temp_dir), ["projects.jsonl"])
+
+    def test_unsupported_format(self):
+        """测试不支持的扩展名"""
+        with self.assertRaises(ValueError):
+            ProjectExporter(self.temp_dir / "projects.xml")
+
+if __name__ == "__main__":
+    unittest.main()
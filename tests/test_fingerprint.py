@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Notion 项目更新器 - 目录指纹测试
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# 添加父目录到导入路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fingerprint
+from fingerprint import scan_tree, scan_project_tree, count_lines
+
+class TestFingerprint(unittest.TestCase):
+    """目录指纹测试类"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.project_dir = self.temp_dir / "project"
+        (self.project_dir / "src" / "pkg").mkdir(parents=True)
+        (self.project_dir / "docs").mkdir()
+        (self.project_dir / ".git").mkdir()
+        (self.project_dir / "README.md").write_text("# Demo\n")
+        (self.project_dir / "src" / "main.py").write_text("print('hi')\n")
+        (self.project_dir / "src" / "pkg" / "util.py").write_text("x = 1\n")
+        (self.project_dir / "docs" / "guide.md").write_text("guide\n")
+        (self.project_dir / ".git" / "HEAD").write_text("ref: refs/heads/main\n")
+
+        self.state_patch = patch.object(fingerprint, "TREE_STATE_DIR", self.temp_dir / "state")
+        self.state_patch.start()
+
+    def tearDown(self):
+        """清理测试环境"""
+        self.state_patch.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def test_scan_tree_aggregates(self):
+        """测试扫描汇总文件数和字节数，并跳过 .git"""
+        snapshot = scan_tree(self.project_dir)
+        files = sorted(rel for rel, _ in snapshot.iter_files())
+
+        self.assertEqual(files, ["README.md", "docs/guide.md", "src/main.py", "src/pkg/util.py"])
+        self.assertEqual(snapshot.file_count, 4)
+        self.assertEqual(snapshot.total_bytes, sum(len(p.read_bytes()) for p in [
+            self.project_dir / "README.md",
+            self.project_dir / "docs" / "guide.md",
+            self.project_dir / "src" / "main.py",
+            self.project_dir / "src" / "pkg" / "util.py",
+        ]))
+        self.assertGreater(snapshot.newest_mtime, 0)
+
+    def test_rescan_reuses_unchanged_dirs(self):
+        """测试未变化的目录在重新扫描时被复用"""
+        first = scan_project_tree(self.project_dir)
+        self.assertEqual(first.dirs_reused, 0)
+
+        second = scan_project_tree(self.project_dir)
+        self.assertEqual(second.dirs_read, 0)
+        self.assertEqual(second.dirs_reused, len(first.records))
+        self.assertEqual(second.root_hash, first.root_hash)
+
+    def test_rescan_only_reads_changed_dir(self):
+        """测试只有发生变化的目录被重新读取"""
+        first = scan_project_tree(self.project_dir)
+
+        new_file = self.project_dir / "src" / "pkg" / "extra.py"
+        new_file.write_text("y = 2\n")
+        # 确保目录 mtime 与上次不同
+        pkg_dir = self.project_dir / "src" / "pkg"
+        st = os.stat(pkg_dir)
+        os.utime(pkg_dir, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+        second = scan_project_tree(self.project_dir)
+        self.assertEqual(second.dirs_read, 1)
+        self.assertEqual(second.file_count, first.file_count + 1)
+        self.assertNotEqual(second.root_hash, first.root_hash)
+        self.assertEqual(second.records["docs"]["h"], first.records["docs"]["h"])
+
+    def test_rescan_detects_in_place_edit(self):
+        """测试原地修改文件（目录 mtime 不变）后重新扫描得到最新的大小、时间和行数"""
+        first = scan_project_tree(self.project_dir)
+
+        src_dir = self.project_dir / "src"
+        dir_stat = os.stat(src_dir)
+        main_py = src_dir / "main.py"
+        old_size = main_py.stat().st_size
+        main_py.write_bytes(b"x = 1\n" * 2000)
+        file_stat = os.stat(main_py)
+        os.utime(main_py, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns + 5_000_000_000))
+        os.utime(src_dir, ns=(dir_stat.st_atime_ns, dir_stat.st_mtime_ns))
+
+        second = scan_project_tree(self.project_dir)
+        self.assertEqual(second.dirs_read, 0)
+        self.assertEqual(second.total_bytes, first.total_bytes - old_size + 12000)
+        self.assertEqual(second.code_lines, first.code_lines + 1999)
+        self.assertGreater(second.newest_mtime, first.newest_mtime)
+        self.assertNotEqual(second.root_hash, first.root_hash)
+
+    def test_exclude_skips_subtree(self):
+        """测试排除的子目录不计入扫描结果"""
+        snapshot = scan_tree(self.project_dir, exclude=["src/pkg"])
+        files = sorted(rel for rel, _ in snapshot.iter_files())
+        self.assertNotIn("src/pkg/util.py", files)
+        self.assertEqual(snapshot.file_count, 3)
+
+    def test_code_lines_counted_in_walk(self):
+        """测试代码行数在遍历中统计，未变化的文件沿用上次结果"""
+        (self.project_dir / "src" / "main.py").write_bytes(b"a = 1\nb = 2\nc = 3")
+        first = scan_project_tree(self.project_dir)
+        # main.py 3 行 + util.py 1 行，Markdown 不计入
+        self.assertEqual(first.code_lines, 4)
+
+        with patch.object(fingerprint, "count_lines") as mock_count:
+            second = scan_project_tree(self.project_dir)
+            mock_count.assert_not_called()
+        self.assertEqual(second.code_lines, 4)
+
+    def test_count_lines(self):
+        """测试按块统计行数"""
+        path = self.temp_dir / "lines.txt"
+        path.write_bytes(b"")
+        self.assertEqual(count_lines(str(path)), 0)
+        path.write_bytes(b"one\ntwo\n")
+        self.assertEqual(count_lines(str(path)), 2)
+        with patch.object(fingerprint, "LINE_COUNT_CHUNK", 3):
+            path.write_bytes(b"one\ntwo\nthree")
+            self.assertEqual(count_lines(str(path)), 3)
+
+    def test_scan_tree_truncated_by_file_budget(self):
+        """测试超过文件数预算时返回截断的部分结果且不保存"""
+        snapshot = scan_tree(self.project_dir, max_files=2)
+        self.assertEqual(snapshot.truncated, "files")
+        self.assertLessEqual(snapshot.file_count, 2)
+
+        with patch.object(fingerprint, "save_tree") as mock_save:
+            scan_project_tree(self.project_dir, max_files=2)
+            mock_save.assert_not_called()
+
+    def test_prune_tree_state(self):
+        """测试删除长期未更新的指纹文件"""
+        scan_project_tree(self.project_dir)
+        stale = fingerprint.TREE_STATE_DIR / "stale.json"
+        stale.write_text("{}")
+        os.utime(stale, (0, 0))
+
+        self.assertEqual(fingerprint.prune_tree_state(30), 1)
+        self.assertFalse(stale.exists())
+        self.assertIsNotNone(fingerprint.load_tree(self.project_dir))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Notion 项目更新器 - Git 活跃度统计测试
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# 添加父目录到导入路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import git_activity
+from git_activity import get_git_activity, read_head, read_upstream, resolve_ref
+from git_pool import GitWorkerPool
+from state import StateFile
+
+class TestGitActivity(unittest.TestCase):
+    """Git 活跃度统计测试类"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.repo = self.temp_dir / "repo"
+        self.repo.mkdir()
+        self._git("init", "-q", "-b", "main")
+
+        self.cache_patch = patch.object(git_activity, "_cache", StateFile(self.temp_dir / "git_activity.json"))
+        self.cache_patch.start()
+        self.pool_patch = patch.object(git_activity, "get_git_pool", return_value=GitWorkerPool(idle_seconds=0))
+        self.pool_patch.start()
+
+    def tearDown(self):
+        """清理测试环境"""
+        git_activity.get_git_pool().close()
+        self.pool_patch.stop()
+        self.cache_patch.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def _git(self, *args, env=None):
+        """在测试仓库中运行 git"""
+        return subprocess.run(["git", *args], cwd=self.repo, check=True, capture_output=True,
+                              text=True, env=env).stdout.strip()
+
+    def _commit(self, email, days_ago=0):
+        """以指定作者和时间创建一个空提交"""
+        date = f"@{int(time.time() - days_ago * 86400)} +0000"
+        env = dict(os.environ, GIT_AUTHOR_NAME="dev", GIT_AUTHOR_EMAIL=email,
+                   GIT_COMMITTER_NAME="dev", GIT_COMMITTER_EMAIL=email,
+                   GIT_AUTHOR_DATE=date, GIT_COMMITTER_DATE=date)
+        self._git("commit", "-q", "--allow-empty", "-m", "change", env=env)
+
+    def test_activity_metrics(self):
+        """测试统计近 30/90 天的提交数和贡献者"""
+        self._commit("old@example.com", days_ago=200)
+        self._commit("a@example.com", days_ago=60)
+        self._commit("b@example.com", days_ago=10)
+        self._commit("A@example.com", days_ago=1)
+
+        activity = get_git_activity(self.repo)
+        self.assertEqual(activity["branch"], "main")
+        self.assertEqual(activity["commits_30d"], 2)
+        self.assertEqual(activity["commits_90d"], 3)
+        self.assertEqual(activity["contributors_90d"], 2)
+        self.assertIsNotNone(activity["last_commit"])
+        self.assertIsNone(activity["ahead"])
+
+    def test_unchanged_head_runs_no_git(self):
+        """测试 HEAD 未变化时不启动 git 进程"""
+        self._commit("a@example.com")
+        first = get_git_activity(self.repo)
+
+        with patch.object(git_activity.subprocess, "Popen") as mock_popen, \
+                patch.object(git_activity.subprocess, "run") as mock_run:
+            second = get_git_activity(self.repo)
+            mock_popen.assert_not_called()
+            mock_run.assert_not_called()
+        self.assertEqual(second, first)
+
+    def test_new_commits_parsed_incrementally(self):
+        """测试 HEAD 前进时只解析新提交"""
+        self._commit("a@example.com", days_ago=5)
+        old_head = self._git("rev-parse", "HEAD")
+        get_git_activity(self.repo)
+        self._commit("b@example.com")
+
+        with patch.object(git_activity, "_stream_log") as mock_stream, \
+                patch.object(git_activity, "_new_commits", wraps=git_activity._new_commits) as mock_new:
+            activity = get_git_activity(self.repo)
+            mock_stream.assert_not_called()
+            self.assertEqual(mock_new.call_args.args[2], old_head)
+        self.assertEqual(activity["commits_30d"], 2)
+        self.assertEqual(activity["contributors_90d"], 2)
+
+    def test_mailmap_merges_contributors(self):
+        """测试按 .mailmap 合并同一作者的多个邮箱，新提交也不绕过 mailmap"""
+        (self.repo / ".mailmap").write_text("Dev <a@example.com> <b@example.com>\n")
+        self._commit("a@example.com", days_ago=5)
+        self._commit("b@example.com", days_ago=2)
+        self.assertEqual(get_git_activity(self.repo)["contributors_90d"], 1)
+
+        self._commit("b@example.com")
+        activity = get_git_activity(self.repo)
+        self.assertEqual(activity["commits_90d"], 3)
+        self.assertEqual(activity["contributors_90d"], 1)
+
+    def test_ahead_behind_upstream(self):
+        """测试读取上游分支并统计领先/落后提交数"""
+        self._commit("a@example.com")
+        self._git("branch", "base")
+        self._git("config", "branch.main.remote", ".")
+        self._git("config", "branch.main.merge", "refs/heads/base")
+        self._commit("a@example.com")
+        self._commit("a@example.com")
+
+        git_dir = self.repo / ".git"
+        self.assertEqual(read_upstream(git_dir, "main"), "refs/heads/base")
+        activity = get_git_activity(self.repo)
+        self.assertEqual((activity["ahead"], activity["behind"]), (2, 0))
+
+    def test_rewritten_history_reparsed(self):
+        """测试历史被改写（缓存的 HEAD 不再是祖先）时重新完整解析"""
+        self._commit("a@example.com", days_ago=2)
+        self._commit("b@example.com", days_ago=1)
+        get_git_activity(self.repo)
+        self._git("reset", "-q", "--hard", "HEAD~1")
+        self._commit("c@example.com")
+
+        activity = get_git_activity(self.repo)
+        self.assertEqual(activity["commits_90d"], 2)
+        self.assertEqual(activity["contributors_90d"], 2)
+
+    def test_read_packed_refs(self):
+        """测试从 packed-refs 解析引用"""
+        self._commit("a@example.com")
+        self._git("pack-refs", "--all")
+        head = self._git("rev-parse", "HEAD")
+        self.assertEqual(read_head(self.repo / ".git"), (head, "main"))
+        self.assertEqual(resolve_ref(self.repo / ".git", "refs/heads/main"), head)
+
+    def test_empty_repo_and_non_repo(self):
+        """测试空仓库没有提交，非 Git 目录返回 None"""
+        activity = get_git_activity(self.repo)
+        self.assertEqual(activity["commits_90d"], 0)
+        self.assertIsNone(activity["last_commit"])
+        self.assertIsNone(get_git_activity(self.temp_dir))
+
+if __name__ == "__main__":
+    unittest.main()
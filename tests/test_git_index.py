@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Notion 项目更新器 - 工作区状态检测测试
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# 添加父目录到导入路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import git_index
+from git_index import get_working_tree_status, parse_index, IgnoreRules
+from git_pool import GitWorkerPool
+from fingerprint import scan_tree
+
+class TestGitIndex(unittest.TestCase):
+    """工作区状态检测测试类"""
+
+    def setUp(self):
+        """设置测试环境：包含几个已提交文件的仓库"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.repo = self.temp_dir / "repo"
+        (self.repo / "src" / "pkg").mkdir(parents=True)
+        self._git("init", "-q", "-b", "main")
+        (self.repo / ".gitignore").write_text("*.log\nbuild/\n")
+        (self.repo / "README.md").write_text("# Demo\n")
+        (self.repo / "src" / "main.py").write_text("print('hi')\n")
+        (self.repo / "src" / "pkg" / "util.py").write_text("x = 1\n")
+        self._git("add", "-A")
+        self._git("commit", "-q", "-m", "init")
+
+        self.pool_patch = patch.object(git_index, "get_git_pool", return_value=GitWorkerPool(idle_seconds=0))
+        self.pool_patch.start()
+
+    def tearDown(self):
+        """清理测试环境"""
+        git_index.get_git_pool().close()
+        self.pool_patch.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def _git(self, *args):
+        """在测试仓库中运行 git"""
+        env = dict(os.environ, GIT_AUTHOR_NAME="dev", GIT_AUTHOR_EMAIL="dev@example.com",
+                   GIT_COMMITTER_NAME="dev", GIT_COMMITTER_EMAIL="dev@example.com")
+        return subprocess.run(["git", *args], cwd=self.repo, check=True, capture_output=True,
+                              text=True, env=env).stdout
+
+    def _status(self):
+        """基于索引检测的结果"""
+        return get_working_tree_status(self.repo, scan_tree(self.repo))
+
+    def _assert_matches_git(self, expected):
+        """检测结果与 git status 一致，且没有回退"""
+        status = self._status()
+        self.assertEqual(status["method"], "index")
+        self.assertEqual((status["modified"], status["untracked"], status["staged"]), expected)
+        fallback = git_index._git_status(self.repo, None)
+        self.assertEqual((fallback["modified"], fallback["untracked"], fallback["staged"]), expected)
+        return status
+
+    def test_clean_repo(self):
+        """测试干净的仓库"""
+        status = self._assert_matches_git((0, 0, 0))
+        self.assertFalse(status["dirty"])
+
+    def test_modified_untracked_and_ignored(self):
+        """测试修改、删除和未跟踪文件，忽略的文件不计入"""
+        (self.repo / "src" / "main.py").write_text("print('changed')\n")
+        # 大小相同、内容不同的修改
+        util = self.repo / "src" / "pkg" / "util.py"
+        util.write_text("x = 2\n")
+        st = os.stat(util)
+        os.utime(util, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        (self.repo / "README.md").unlink()
+        (self.repo / "notes.txt").write_text("todo\n")
+        (self.repo / "debug.log").write_text("log\n")
+        (self.repo / "build").mkdir()
+        (self.repo / "build" / "out.bin").write_bytes(b"\0")
+
+        status = self._assert_matches_git((3, 1, 0))
+        self.assertTrue(status["dirty"])
+
+    def test_staged_changes(self):
+        """测试已暂存的新增、修改和删除"""
+        (self.repo / "src" / "main.py").write_text("print('staged')\n")
+        (self.repo / "src" / "pkg" / "new.py").write_text("y = 2\n")
+        self._git("add", "src")
+        self._git("rm", "-q", "README.md")
+
+        self._assert_matches_git((0, 0, 3))
+
+    def test_touched_file_is_not_modified(self):
+        """测试只改变修改时间、内容未变的文件不算修改"""
+        main = self.repo / "src" / "main.py"
+        st = os.stat(main)
+        os.utime(main, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+
+        self._assert_matches_git((0, 0, 0))
+
+    def test_index_v4(self):
+        """测试解析路径前缀压缩的 v4 索引"""
+        self._git("update-index", "--index-version", "4")
+        entries, _, _ = parse_index(self.repo / ".git" / "index")
+        self.assertEqual([entry.path for entry in entries],
+                         [".gitignore", "README.md", "src/main.py", "src/pkg/util.py"])
+        (self.repo / "src" / "main.py").write_text("print('v4')\n")
+        self._assert_matches_git((1, 0, 0))
+
+    def test_ambiguous_falls_back_to_git_status(self):
+        """测试需要比对的文件过多时回退到 git status"""
+        # 大小相同，只能通过比对内容判断
+        main = self.repo / "src" / "main.py"
+        main.write_text("print('ho')\n")
+        st = os.stat(main)
+        os.utime(main, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        with patch.object(git_index, "DIRTY_HASH_MAX_FILES", 0), \
+                patch.object(git_index, "_git_status", wraps=git_index._git_status) as mock_status:
+            status = self._status()
+            mock_status.assert_called_once()
+        self.assertEqual(status["method"], "git_status")
+        self.assertEqual(status["modified"], 1)
+
+    def test_ignore_rules(self):
+        """测试忽略规则的否定、仅目录和锚定匹配"""
+        rules = IgnoreRules()
+        rules.add_lines(["*.log", "!keep.log", "/dist", "docs/**/*.tmp", "cache/"])
+        rules.add_lines(["*.py"], base="vendor")
+
+        self.assertTrue(rules.is_ignored("a/b/error.log"))
+        self.assertFalse(rules.is_ignored("keep.log"))
+        self.assertTrue(rules.is_ignored("dist/app.js"))
+        self.assertFalse(rules.is_ignored("src/dist/app.js"))
+        self.assertTrue(rules.is_ignored("docs/a/b/x.tmp"))
+        self.assertTrue(rules.is_ignored("x/cache/data"))
+        self.assertFalse(rules.is_ignored("cache"))
+        self.assertTrue(rules.is_ignored("vendor/lib/mod.py"))
+        self.assertFalse(rules.is_ignored("mod.py"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Notion 项目更新器 - Git 进程池测试
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+import unittest
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock
+
+# 添加父目录到导入路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from git_pool import GitWorkerPool, GitTimeout
+
+class TestGitWorkerPool(unittest.TestCase):
+    """Git 进程池测试类"""
+
+    def setUp(self):
+        """设置测试环境：main 和 feature 两个分支，feature 合并回 main"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.repo = self.temp_dir / "repo"
+        self.repo.mkdir()
+        self._git("init", "-q", "-b", "main")
+        self._commit(1)
+        self._git("checkout", "-q", "-b", "feature")
+        self._commit(2)
+        self._commit(3)
+        self._git("checkout", "-q", "main")
+        self._commit(4)
+        self._git("merge", "-q", "--no-ff", "-m", "merge", "feature", env=self._env(5))
+        self._commit(6)
+
+        self.pool = GitWorkerPool(idle_seconds=0)
+
+    def tearDown(self):
+        """清理测试环境"""
+        self.pool.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _env(self, minutes):
+        """固定提交时间的环境变量"""
+        date = f"@{1700000000 + minutes * 60} +0800"
+        return dict(os.environ, GIT_AUTHOR_NAME="dev", GIT_AUTHOR_EMAIL="dev@example.com",
+                    GIT_COMMITTER_NAME="dev", GIT_COMMITTER_EMAIL="dev@example.com",
+                    GIT_AUTHOR_DATE=date, GIT_COMMITTER_DATE=date)
+
+    def _git(self, *args, env=None):
+        """在测试仓库中运行 git"""
+        return subprocess.run(["git", *args], cwd=self.repo, check=True, capture_output=True,
+                              text=True, env=env).stdout.split()
+
+    def _commit(self, minutes):
+        """创建一个空提交"""
+        self._git("commit", "-q", "--allow-empty", "-m", f"c{minutes}", env=self._env(minutes))
+
+    def test_walk_matches_rev_list(self):
+        """测试遍历结果与 git rev-list 一致"""
+        for include, exclude in [("main", "feature"), ("feature", "main"), ("main", "main~2")]:
+            expected = self._git("rev-list", include, f"^{exclude}")
+            head, base = self._git("rev-parse", include, exclude)
+            walk = self.pool.walk(self.repo, [head], [base])
+            self.assertEqual([sha for sha, _ in walk.commits], expected)
+
+    def test_walk_since_and_boundary(self):
+        """测试按时间截断，并报告被排除的父提交"""
+        head, base = self._git("rev-parse", "main", "main~1")
+        walk = self.pool.walk(self.repo, [head], [base])
+        self.assertEqual(walk.boundary, {base})
+
+        walk = self.pool.walk(self.repo, [head], since=1700000000 + 3 * 60)
+        self.assertEqual([commit.commit_time for _, commit in walk.commits],
+                         [1700000000 + m * 60 for m in (6, 5, 4, 3)])
+        self.assertTrue(walk.commits[0][1].commit_iso.endswith("+08:00"))
+
+    def test_worker_reused_and_idle_closed(self):
+        """测试同一仓库的多次查询复用进程，空闲进程被关闭"""
+        head = self._git("rev-parse", "main")[0]
+        self.pool.read_commit(self.repo, head)
+        self.pool.count(self.repo, "main", "feature")
+        self.assertEqual(self.pool.spawned, 1)
+
+        self.assertEqual(self.pool.close_idle(0), 1)
+        self.pool.read_commit(self.repo, head)
+        self.assertEqual(self.pool.spawned, 2)
+
+    def test_timeout_discards_worker(self):
+        """测试超时后进程被终止且不放回池中"""
+        with self.assertRaises(GitTimeout):
+            with self.pool.worker(self.repo, timeout=0.05) as worker:
+                time.sleep(0.2)
+                worker.read("HEAD")
+        self.assertEqual(self.pool.close_idle(0), 0)
+
+    def test_release_after_reaper_exit_starts_reaper(self):
+        """测试后台线程因池为空退出时，紧接着放回的进程会启动新的后台线程"""
+        pool = GitWorkerPool(idle_seconds=0.01)
+        self.addCleanup(pool.close)
+        lock = pool._lock
+        fired = []
+
+        class InterleavingLock:
+            """在后台线程发现池为空并释放锁后，立即模拟另一个线程放回进程"""
+
+            def __enter__(self):
+                lock.acquire()
+
+            def __exit__(self, *exc):
+                empty = not pool._idle
+                lock.release()
+                if empty and not fired and sys._getframe(1).f_code.co_name == "_reap_loop":
+                    fired.append(True)
+                    pool._release("repo", MagicMock())
+
+        pool._lock = InterleavingLock()
+        pool._reaper = threading.current_thread()
+        pool._reap_loop()
+
+        self.assertEqual(fired, [True])
+        self.assertIsNotNone(pool._reaper)
+        self.assertIsNot(pool._reaper, threading.current_thread())
+
+if __name__ == "__main__":
+    unittest.main()
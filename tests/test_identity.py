@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Notion 项目更新器 - 项目标识测试
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# 添加父目录到导入路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import identity
+from identity import get_project_identity, git_root_commit
+from git_pool import GitWorkerPool
+from state import StateFile
+
+class TestIdentity(unittest.TestCase):
+    """项目标识测试类"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.cache_patch = patch.object(identity, "_cache", StateFile(self.temp_dir / "identities.json"))
+        self.cache_patch.start()
+        self.pool_patch = patch.object(identity, "get_git_pool", return_value=GitWorkerPool(idle_seconds=0))
+        self.pool_patch.start()
+
+    def tearDown(self):
+        """清理测试环境"""
+        identity.get_git_pool().close()
+        self.pool_patch.stop()
+        self.cache_patch.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def _git(self, repo, *args):
+        """在仓库中运行 git"""
+        env = dict(os.environ, GIT_AUTHOR_NAME="dev", GIT_AUTHOR_EMAIL="dev@example.com",
+                   GIT_COMMITTER_NAME="dev", GIT_COMMITTER_EMAIL="dev@example.com")
+        return subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True,
+                              text=True, env=env).stdout.strip()
+
+    def _repo(self, name):
+        """创建有两个提交的仓库"""
+        repo = self.temp_dir / name
+        repo.mkdir()
+        self._git(repo, "init", "-q")
+        for content in ("a", "b"):
+            (repo / "file.txt").write_text(content)
+            self._git(repo, "add", "-A")
+            self._git(repo, "commit", "-q", "-m", content)
+        return repo
+
+    def test_git_identity_is_root_commit(self):
+        """测试 Git 仓库以根提交为标识，克隆后不变"""
+        repo = self._repo("repo")
+        root = self._git(repo, "rev-list", "--max-parents=0", "HEAD")
+        self.assertEqual(git_root_commit(repo), root)
+        self.assertEqual(get_project_identity(repo), f"git:{root}")
+
+        clone = self.temp_dir / "clone"
+        self._git(self.temp_dir, "clone", "-q", str(repo), str(clone))
+        self.assertEqual(get_project_identity(clone), f"git:{root}")
+
+    def test_renamed_directory_keeps_identity(self):
+        """测试重命名或移动后的目录保持原标识"""
+        project = self.temp_dir / "notes"
+        project.mkdir()
+        first = get_project_identity(project)
+        self.assertTrue(first.startswith("dir:"))
+
+        moved = self.temp_dir / "archive" / "notes-2024"
+        moved.parent.mkdir()
+        project.rename(moved)
+        self.assertEqual(get_project_identity(moved), first)
+
+    def test_stale_cache_entry_is_replaced(self):
+        """测试 inode 被其他仓库复用时重新计算标识"""
+        repo = self._repo("repo")
+        st = os.stat(repo)
+        identity._cache.set(f"{st.st_dev}:{st.st_ino}", {"id": "git:" + "0" * 40})
+
+        root = self._git(repo, "rev-list", "--max-parents=0", "HEAD")
+        self.assertEqual(get_project_identity(repo), f"git:{root}")
+
+    def test_reused_inode_gets_new_identity(self):
+        """测试目录删除后 inode 被无关目录复用时不继承原标识"""
+        project = self.temp_dir / "old"
+        project.mkdir()
+        (project / "notes.md").write_text("x")
+        old = get_project_identity(project)
+        st = os.stat(project)
+        shutil.rmtree(project)
+
+        # 模拟新目录复用了同一个 inode
+        unrelated = self.temp_dir / "unrelated"
+        unrelated.mkdir()
+        (unrelated / "main.py").write_text("y")
+        entry = identity._cache.pop(f"{st.st_dev}:{st.st_ino}")
+        st = os.stat(unrelated)
+        identity._cache.set(f"{st.st_dev}:{st.st_ino}", entry)
+
+        new = get_project_identity(unrelated)
+        self.assertTrue(new.startswith("dir:"))
+        self.assertNotEqual(new, old)
+
+    def test_dir_identity_upgraded_after_git_init(self):
+        """测试目录初始化为 Git 仓库并提交后改用根提交标识"""
+        project = self.temp_dir / "project"
+        project.mkdir()
+        (project / "file.txt").write_text("a")
+        self.assertTrue(get_project_identity(project).startswith("dir:"))
+
+        self._git(project, "init", "-q")
+        self.assertTrue(get_project_identity(project).startswith("dir:"))
+        self._git(project, "add", "-A")
+        self._git(project, "commit", "-q", "-m", "a")
+        root = self._git(project, "rev-list", "--max-parents=0", "HEAD")
+        self.assertEqual(get_project_identity(project), f"git:{root}")
+
+if __name__ == "__main__":
+    unittest.main()
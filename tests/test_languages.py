@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Notion 项目更新器 - 语言构成统计测试
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from array import array
+from pathlib import Path
+from unittest.mock import patch
+
+# 添加父目录到导入路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import languages
+from languages import LANGUAGE_NAMES, bincount, language_id, language_breakdown, primary_language
+from fingerprint import scan_tree
+
+class TestLanguages(unittest.TestCase):
+    """语言构成统计测试类"""
+    
+    def test_language_id(self):
+        """测试扩展名到语言 ID 的映射"""
+        self.assertEqual(LANGUAGE_NAMES[language_id("main.py")], "Python")
+        self.assertEqual(LANGUAGE_NAMES[language_id("App.TSX")], "TypeScript")
+        self.assertEqual(language_id("README.md"), 0)
+    
+    def test_bincount_without_numpy(self):
+        """测试纯 Python 的按 ID 加权求和"""
+        with patch.object(languages, "np", None):
+            totals = bincount(array("H", [1, 2, 1]), array("q", [10, 5, 30]), 4)
+        self.assertEqual(totals, [0, 40, 5, 0])
+    
+    def test_breakdown_and_primary_language(self):
+        """测试语言占比和主要语言"""
+        py = language_id("a.py")
+        js = language_id("a.js")
+        breakdown = language_breakdown(array("H", [py, js, py]), array("q", [600, 250, 150]))
+        self.assertEqual(list(breakdown), ["Python", "JavaScript"])
+        self.assertAlmostEqual(breakdown["Python"], 0.75)
+        self.assertEqual(primary_language(breakdown), "Python")
+        self.assertIsNone(primary_language({}))
+    
+    def test_snapshot_breakdown(self):
+        """测试目录扫描时同时记录语言构成"""
+        project_dir = Path(tempfile.mkdtemp())
+        try:
+            (project_dir / "lib").mkdir()
+            (project_dir / "main.go").write_bytes(b"x" * 300)
+            (project_dir / "lib" / "util.py").write_bytes(b"x" * 100)
+            (project_dir / "notes.md").write_bytes(b"x" * 1000)
+            
+            breakdown = scan_tree(project_dir).language_breakdown()
+            self.assertEqual(breakdown, {"Go": 0.75, "Python": 0.25})
+        finally:
+            shutil.rmtree(project_dir)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Notion 项目更新器 - 启动开销测试
+"""
+
+import os
+import sys
+import subprocess
+import unittest
+from typing import Dict, List
+
+# 添加父目录到导入路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 启动时不应加载的模块（只在用到的函数中导入）
+LAZY_MODULES = ("rich", "requests", "schedule", "git", "notion_client", "sync_plan", "control_server", "scheduler")
+
+
+def import_times(*args: str) -> Dict[str, int]:
+    """用 python -X importtime 运行，返回顶层模块名到累计导入耗时（微秒）的映射
+
+    Args:
+        *args: python 的命令行参数
+
+    Returns:
+        模块名 -> 累计耗时
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=ROOT,
+                            capture_output=True, text=True, timeout=60)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def top_level(modules: Dict[str, int]) -> List[str]:
+    """返回加载过的顶层包名"""
+    return sorted({name.split(".")[0] for name in modules})
+
+
+class TestStartup(unittest.TestCase):
+    """启动开销测试类"""
+
+    def test_import_skips_lazy_modules(self):
+        """测试 import main 不加载 rich、requests、schedule 等模块"""
+        loaded = top_level(import_times("-c", "import main"))
+        self.assertIn("main", loaded)
+        self.assertEqual([name for name in LAZY_MODULES if name in loaded], [])
+
+    def test_help_skips_lazy_modules(self):
+        """测试 --help 不加载 rich、requests、schedule 等模块，也不创建日志目录"""
+        had_logs = os.path.exists(os.path.join(ROOT, "logs"))
+        loaded = top_level(import_times("main.py", "--help"))
+        self.assertEqual([name for name in LAZY_MODULES if name in loaded], [])
+        if not had_logs:
+            self.assertFalse(os.path.exists(os.path.join(ROOT, "logs")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Notion 项目更新器 - 清单文件解析测试
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# 添加父目录到导入路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import manifests
+from manifests import parse_manifest, save_manifest_cache
+from state import StateFile
+from analyzer import detect_tech_stack
+
+class TestManifests(unittest.TestCase):
+    """清单文件解析测试类"""
+    
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.project_dir = self.temp_dir / "project"
+        self.project_dir.mkdir()
+        
+        # 使用独立的缓存
+        self.patches = [
+            patch.object(manifests, "_cache", StateFile(self.temp_dir / "manifests.json")),
+        ]
+        for p in self.patches:
+            p.start()
+    
+    def tearDown(self):
+        """清理测试环境"""
+        for p in self.patches:
+            p.stop()
+        shutil.rmtree(self.temp_dir)
+    
+    def test_parse_package_json(self):
+        """测试解析 package.json 的依赖和描述"""
+        path = self.project_dir / "package.json"
+        path.write_text(json.dumps({
+            "name": "demo",
+            "description": "演示项目",
+            "dependencies": {"React": "^18.0.0"},
+            "devDependencies": {"typescript": "^5.0.0"},
+        }))
+        
+        result = parse_manifest(path)
+        self.assertEqual(result["dependencies"], ["react", "typescript"])
+        self.assertEqual(result["description"], "演示项目")
+    
+    def test_parse_requirements_and_go_mod(self):
+        """测试解析 requirements.txt 和 go.mod"""
+        requirements = self.project_dir / "requirements.txt"
+        requirements.write_text("Django>=4.0\n# comment\nrequests[socks]==2.0\n-r dev.txt\n")
+        self.assertEqual(parse_manifest(requirements)["dependencies"], ["django", "requests"])
+        
+        go_mod = self.project_dir / "go.mod"
+        go_mod.write_text("module example.com/demo\n\nrequire (\n\tgithub.com/gin-gonic/gin v1.9.0\n)\n")
+        self.assertEqual(parse_manifest(go_mod)["dependencies"], ["github.com/gin-gonic/gin"])
+    
+    def test_cache_skips_unchanged_file(self):
+        """测试大小和修改时间未变化的清单直接使用缓存"""
+        path = self.project_dir / "pyproject.toml"
+        path.write_text('[project]\nname = "demo"\ndependencies = ["flask>=2"]\n')
+        self.assertEqual(parse_manifest(path)["dependencies"], ["flask"])
+        save_manifest_cache()
+        
+        # 重新加载持久化缓存后不应再读取文件
+        manifests._cache.clear_memory()
+        with patch("builtins.open", wraps=open) as mock_open:
+            self.assertEqual(parse_manifest(path)["dependencies"], ["flask"])
+            opened = [call.args[0] for call in mock_open.call_args_list]
+            self.assertNotIn(path, opened)
+    
+    def test_folder_name_is_not_a_framework(self):
+        """测试目录名（如 review/）不会被误判为 Vue"""
+        (self.project_dir / "review").mkdir()
+        (self.project_dir / "review" / "notes.txt").touch()
+        (self.project_dir / "package.json").write_text(json.dumps({"dependencies": {"vue": "^3.0.0"}}))
+        
+        self.assertIn("Vue", detect_tech_stack(self.project_dir))
+        
+        (self.project_dir / "package.json").write_text(json.dumps({"dependencies": {"express": "^4.0.0"}}))
+        tech_stack = detect_tech_stack(self.project_dir)
+        self.assertNotIn("Vue", tech_stack)
+        self.assertIn("Express", tech_stack)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Notion 项目更新器 - 运行指标测试
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+# 添加父目录到导入路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics
+from metrics import Counter, Histogram, write_textfile
+from notion_client import NotionClient, RateLimiter, CircuitBreaker
+
+class TestMetrics(unittest.TestCase):
+    """运行指标测试类"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        """清理测试环境"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_counter_format(self):
+        """测试计数器的文本格式和标签转义"""
+        counter = Counter("test_total", "测试计数", ["name"])
+        counter.inc(name='a"b')
+        counter.inc(2, name='a"b')
+        self.assertEqual(counter.render(), '# HELP test_total 测试计数\n# TYPE test_total counter\n'
+                                           'test_total{name="a\\"b"} 3\n')
+        with self.assertRaises(ValueError):
+            counter.inc(other="x")
+
+    def test_histogram_buckets(self):
+        """测试直方图的累计分桶、总和和总数"""
+        histogram = Histogram("test_seconds", "测试耗时", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5):
+            histogram.observe(value)
+        lines = histogram.render().splitlines()[2:]
+        self.assertEqual(lines, [
+            'test_seconds_bucket{le="0.1"} 1',
+            'test_seconds_bucket{le="1"} 3',
+            'test_seconds_bucket{le="+Inf"} 4',
+            "test_seconds_sum 6.05",
+            "test_seconds_count 4",
+        ])
+
+    def test_write_textfile(self):
+        """测试原子写入指标文件"""
+        path = self.temp_dir / "collector" / "notion_updater.prom"
+        write_textfile(path)
+        self.assertIn("# TYPE notion_updater_run_duration_seconds histogram", path.read_text(encoding="utf-8"))
+        self.assertEqual(os.listdir(path.parent), ["notion_updater.prom"])
+
+    @patch('requests.Session.request')
+    def test_notion_request_metrics(self, mock_request):
+        """测试按接口和状态码记录请求耗时，以及 429 和重试次数"""
+        limited = MagicMock(status_code=429, headers={"Retry-After": "0"})
+        mock_request.side_effect = [limited, MagicMock(status_code=200)]
+        client = NotionClient("test_api_key", "test_database_id", rate_limiter=RateLimiter(rate=1000),
+                              breaker=CircuitBreaker(failure_threshold=5, cooldown=30))
+        endpoint = "PATCH /pages/:id"
+        before = (metrics.NOTION_REQUEST_DURATION.count(endpoint=endpoint, status="200"),
+                  metrics.NOTION_RATE_LIMITED.value(), metrics.NOTION_RETRIES.value())
+
+        self.assertTrue(client.update_page("page1", "项目", {"properties": {}}))
+
+        after = (metrics.NOTION_REQUEST_DURATION.count(endpoint=endpoint, status="200"),
+                 metrics.NOTION_RATE_LIMITED.value(), metrics.NOTION_RETRIES.value())
+        self.assertEqual([b - a for a, b in zip(before, after)], [1, 1, 1])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,13 +5,29 @@ Notion 项目更新器 - Notion 客户端测试
 
 import os
 import sys
+import time
+import shutil
+import tempfile
 import unittest
+from pathlib import Path
 from unittest.mock import patch, MagicMock
 
 # 添加父目录到导入路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from notion_client import NotionClient
+import notion_client
+from state import StateFile
+from notion_client import (
+    NotionClient,
+    RateLimiter,
+    CircuitBreaker,
+    CircuitOpenError,
+    get_rate_limiter,
+    sync_projects,
+    find_pages_to_archive,
+    match_pages,
+    BASE_PROPERTIES,
+)
 
 class TestNotionClient(unittest.TestCase):
     """Notion 客户端测试类"""
@@ -22,7 +38,7 @@ class TestNotionClient(unittest.TestCase):
         self.database_id = "test_database_id"
         self.client = NotionClient(self.api_key, self.database_id)
     
-    @patch('requests.post')
+    @patch('requests.Session.request')
     def test_load_existing_projects(self, mock_post):
         """测试加载已存在项目"""
         # 模拟 API 响应
@@ -74,7 +90,23 @@ class TestNotionClient(unittest.TestCase):
         # 验证 API 调用
         mock_post.assert_called_once()
     
-    @patch('requests.post')
+    @patch('requests.Session.request')
+    def test_load_existing_pages_paginates(self, mock_request):
+        """测试分页加载所有页面"""
+        def page(page_id, name):
+            return {"id": page_id, "properties": {"名称": {"title": [{"text": {"content": name}}]}}}
+        first = MagicMock(status_code=200)
+        first.json.return_value = {"results": [page("page1", "项目1")], "has_more": True, "next_cursor": "c1"}
+        second = MagicMock(status_code=200)
+        second.json.return_value = {"results": [page("page2", "项目2")], "has_more": False}
+        mock_request.side_effect = [first, second]
+        
+        pages = self.client.load_existing_pages()
+        
+        self.assertEqual({name: info["id"] for name, info in pages.items()}, {"项目1": "page1", "项目2": "page2"})
+        self.assertEqual(mock_request.call_args_list[1].kwargs["json"], {"start_cursor": "c1"})
+    
+    @patch('requests.Session.request')
     def test_create_project(self, mock_post):
         """测试创建项目"""
         # 模拟 API 响应
@@ -107,7 +139,7 @@ class TestNotionClient(unittest.TestCase):
         # 验证 API 调用
         mock_post.assert_called_once()
     
-    @patch('requests.patch')
+    @patch('requests.Session.request')
     def test_update_project(self, mock_patch):
         """测试更新项目"""
         # 模拟 API 响应
@@ -166,6 +198,317 @@ class TestNotionClient(unittest.TestCase):
         self.assertEqual(properties["优先级"]["select"]["name"], "高")
         self.assertEqual(properties["描述"]["rich_text"][0]["text"]["content"], "这是一个测试项目")
         self.assertEqual(properties["最后修改日期"]["date"]["start"], "2025-03-31")
+        self.assertNotIn("代码行数", properties)
+        
+        # 代码统计字段
+        project_info.update({"size_mb": 1.5, "file_count": 42, "code_lines": 1200})
+        properties = self.client._build_properties(project_info)
+        self.assertEqual(properties["项目大小"]["number"], 1.5)
+        self.assertEqual(properties["文件数量"]["number"], 42)
+        self.assertEqual(properties["代码行数"]["number"], 1200)
+
+    def test_optional_properties_need_schema(self):
+        """测试新增属性只在数据库结构中存在时写入"""
+        project_info = {"name": "p", "path": "/p", "tech_stack": [], "project_type": "其他", "status": "活跃",
+                        "priority": "高", "description": "", "last_modified": "2025-03-31",
+                        "size_mb": 1.5, "file_count": 42, "code_lines": 1200, "dirty": False,
+                        "modified_files": 0, "untracked_files": 0, "staged_files": 0}
+        properties = self.client._build_properties(project_info)
+        
+        # 未获取数据库结构时只写入基础属性
+        self.assertEqual(set(self.client.validate_properties(properties)), BASE_PROPERTIES)
+        
+        # 旧数据库没有代码统计属性
+        self.client._schema = {name: {"type": next(iter(properties[name]))} for name in BASE_PROPERTIES}
+        self.client._schema["代码行数"] = {"type": "number"}
+        self.assertEqual(set(self.client.validate_properties(properties)), BASE_PROPERTIES | {"代码行数"})
+
+    @patch('requests.Session.request')
+    def test_request_retries_after_429(self, mock_request):
+        """测试遇到 429 时按 Retry-After 重试"""
+        throttled = MagicMock(status_code=429, headers={"Retry-After": "0"})
+        ok = MagicMock(status_code=200)
+        ok.json.return_value = {"id": "new_page_id"}
+        mock_request.side_effect = [throttled, ok]
+        
+        page_id = self.client.create_project({
+            "name": "测试项目",
+            "path": "/path/to/project",
+            "tech_stack": [],
+            "project_type": "其他",
+            "status": "活跃",
+            "priority": "高",
+            "description": "",
+            "last_modified": "2025-03-31"
+        })
+        
+        self.assertEqual(page_id, "new_page_id")
+        self.assertEqual(mock_request.call_count, 2)
+    
+    def test_rate_limiter_shared_per_token(self):
+        """测试同一 API 密钥的客户端共享限流器"""
+        other = NotionClient(self.api_key, "another_database_id")
+        self.assertIs(other.rate_limiter, self.client.rate_limiter)
+        self.assertIs(other.session, self.client.session)
+        self.assertIsNot(get_rate_limiter("another_key"), self.client.rate_limiter)
+    
+    def test_rate_limiter_spacing(self):
+        """测试令牌桶限流器按速率发放令牌"""
+        limiter = RateLimiter(rate=50)
+        start = time.monotonic()
+        for _ in range(6):
+            limiter.acquire()
+        elapsed = time.monotonic() - start
+        # 第一个令牌立即可用，其余 5 个按 50 次/秒发放
+        self.assertGreaterEqual(elapsed, 0.09)
+    
+    def test_sync_projects_concurrent(self):
+        """测试批量同步的结果统计"""
+        client = MagicMock()
+        client.load_existing_projects.return_value = {"已有项目": "page1"}
+        client.update_project.return_value = True
+        client.create_project.side_effect = ["page2", None]
+        
+        stats = sync_projects([
+            {"name": "已有项目"},
+            {"name": "新项目"},
+            {"name": "失败项目"},
+        ], client=client)
+        
+        self.assertEqual(stats["total"], 3)
+        self.assertEqual(stats["updated"], 1)
+        self.assertEqual(stats["created"], 1)
+        self.assertEqual(stats["failed"], 1)
+
+    def test_sync_projects_archives_missing(self):
+        """测试归档本次扫描中找不到的项目，手动添加的页面不归档"""
+        client = MagicMock()
+        client.load_existing_projects.return_value = {f"项目{i}": f"page{i}" for i in range(11)}
+        # 项目10 是手动添加的行（没有项目标识或本地记录）
+        client.owned_page_ids.return_value = {f"page{i}" for i in range(10)}
+        client.update_project.return_value = True
+        client.archive_page.return_value = True
+        
+        stats = sync_projects([{"name": f"项目{i}"} for i in range(8)], client=client, archive_missing=True)
+        
+        self.assertEqual(stats["updated"], 8)
+        self.assertEqual(stats["archived"], 2)
+        archived = sorted(call.args for call in client.archive_page.call_args_list)
+        self.assertEqual(archived, [("page8", "项目8"), ("page9", "项目9")])
+        
+        # 默认不归档
+        client.archive_page.reset_mock()
+        sync_projects([{"name": "项目0"}], client=client)
+        client.archive_page.assert_not_called()
+    
+    def test_archive_safety_threshold(self):
+        """测试待归档页面过多时不归档"""
+        existing = {f"项目{i}": f"page{i}" for i in range(100)}
+        
+        self.assertEqual(len(find_pages_to_archive(existing, [f"项目{i}" for i in range(85)])), 15)
+        # 扫描目录未挂载：所有项目都找不到
+        self.assertEqual(find_pages_to_archive(existing, []), {})
+        # 小数据库不受比例限制
+        self.assertEqual(len(find_pages_to_archive({"a": "1", "b": "2"}, [])), 2)
+        # 只归档本工具写入的页面
+        self.assertEqual(find_pages_to_archive({"a": "1", "b": "2"}, [], owned={"2"}), {"b": "2"})
+
+    def test_renamed_project_updates_existing_page(self):
+        """测试重命名的项目按标识更新原页面，不新建也不归档"""
+        client = MagicMock()
+        client.load_existing_projects.return_value = {"旧名称": "page1", "其他项目": "page2"}
+        client.page_identities.return_value = {"git:abc": "page1"}
+        client.update_project.return_value = True
+        
+        stats = sync_projects([
+            {"name": "新名称", "identity": "git:abc"},
+            {"name": "其他项目", "identity": "dir:123"},
+        ], client=client)
+        
+        self.assertEqual((stats["updated"], stats["created"], stats["archived"]), (2, 0, 0))
+        client.update_project.assert_any_call("page1", {"name": "新名称", "identity": "git:abc"})
+        client.create_project.assert_not_called()
+        client.archive_page.assert_not_called()
+        client.remember_identity.assert_any_call("dir:123", "page2")
+    
+    @patch('requests.Session.request')
+    def test_find_project_pages(self, mock_request):
+        """测试只按名称和标识过滤查询指定项目，本地有记录的项目不查询"""
+        temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, temp_dir)
+        page_index = StateFile(temp_dir / "notion_pages.json")
+        page_index.set(f"{self.database_id}:git:known", "page9")
+        retrieved = MagicMock(status_code=200)
+        retrieved.json.return_value = {"properties": {"项目标识": {"type": "rich_text", "rich_text": {}}}}
+        queried = MagicMock(status_code=200)
+        queried.json.return_value = {"results": [
+            {"id": "page1", "properties": {"名称": {"title": [{"text": {"content": "旧名称"}}]},
+                                           "项目标识": {"rich_text": [{"plain_text": "git:abc"}]}}},
+        ]}
+        mock_request.side_effect = [retrieved, queried]
+        
+        with patch.object(notion_client, "_page_index", page_index):
+            pages = self.client.find_project_pages([
+                {"name": "已记录", "identity": "git:known"},
+                {"name": "新名称", "identity": "git:abc"},
+            ])
+        
+        self.assertEqual(pages, {"旧名称": "page1"})
+        self.assertEqual(self.client.page_identities(), {"git:abc": "page1", "git:known": "page9"})
+        query_filter = mock_request.call_args_list[1].kwargs["json"]["filter"]
+        self.assertEqual(query_filter, {"or": [
+            {"property": "名称", "title": {"equals": "新名称"}},
+            {"property": "项目标识", "rich_text": {"equals": "git:abc"}},
+        ]})
+    
+    def test_sync_projects_targeted(self):
+        """测试只同步指定项目时不读取整个数据库，也不归档"""
+        client = MagicMock()
+        client.find_project_pages.return_value = {"项目1": "page1"}
+        client.update_project.return_value = True
+        
+        stats = sync_projects([{"name": "项目1"}], client=client, targeted=True)
+        
+        self.assertEqual(stats["updated"], 1)
+        client.find_project_pages.assert_called_once_with([{"name": "项目1"}])
+        client.load_existing_projects.assert_not_called()
+        client.archive_page.assert_not_called()
+
+    @patch('requests.Session.request')
+    def test_archived_page_dropped_from_index(self, mock_request):
+        """测试归档页面或更新时发现页面已归档后删除本地记录"""
+        temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, temp_dir)
+        page_index = StateFile(temp_dir / "notion_pages.json")
+        page_index.set(f"{self.database_id}:git:a", "page1")
+        page_index.set(f"{self.database_id}:git:b", "page2")
+        page_index.set("other_db:git:c", "page2")
+        archived = MagicMock(status_code=200)
+        rejected = MagicMock(status_code=400, text='{"message": "Can\'t edit block that is archived."}')
+        mock_request.side_effect = [archived, rejected]
+
+        with patch.object(notion_client, "_page_index", page_index):
+            self.assertTrue(self.client.archive_page("page1", "a"))
+            self.assertFalse(self.client.update_page("page2", "b", {"properties": {}}))
+
+        self.assertEqual(page_index.items(), [("other_db:git:c", "page2")])
+        self.assertFalse(self.client.page_gone("page1"))
+        self.assertTrue(self.client.page_gone("page2"))
+
+    def test_sync_projects_stale_page(self):
+        """测试记录的页面已被删除时重新查找，找不到则新建"""
+        client = MagicMock()
+        client.find_project_pages.return_value = {"项目1": "gone1", "项目2": "gone2"}
+        client.update_project.side_effect = lambda page_id, info: page_id == "found"
+        client.page_gone.return_value = True
+        client.find_page.side_effect = lambda info: "found" if info["name"] == "项目1" else None
+        client.create_project.return_value = "new"
+
+        stats = sync_projects([{"name": "项目1", "identity": "git:1"}, {"name": "项目2", "identity": "git:2"}],
+                              client=client, targeted=True)
+
+        self.assertEqual((stats["updated"], stats["created"], stats["failed"]), (1, 1, 0))
+        client.remember_identity.assert_any_call("git:1", "found")
+        client.remember_identity.assert_any_call("git:2", "new")
+
+    def test_match_pages(self):
+        """测试按标识优先匹配，重复标识只按名称匹配"""
+        existing = {"a": "page_a", "b": "page_b"}
+        identities = {"git:1": "page_b", "git:2": "page_a"}
+        
+        matches = match_pages([
+            {"name": "a", "identity": "git:1"},
+            {"name": "b", "identity": "git:1"},
+            {"name": "c", "identity": "git:2"},
+            {"name": "d"},
+        ], existing, identities)
+        
+        # 重复标识 git:1 按名称匹配；c 按标识认领 page_a 后，a 的名称匹配让位
+        self.assertEqual(matches, [None, "page_b", "page_a", None])
+    
+    def test_identity_property_written_when_present(self):
+        """测试数据库有项目标识属性时写入标识"""
+        project_info = {"name": "p", "path": "/p", "tech_stack": [], "project_type": "其他", "status": "活跃",
+                        "priority": "高", "description": "", "last_modified": "2025-03-31", "identity": "git:abc"}
+        self.assertNotIn("项目标识", self.client._build_properties(project_info))
+        self.client.has_identity_property = True
+        properties = self.client._build_properties(project_info)
+        self.assertEqual(properties["项目标识"]["rich_text"][0]["text"]["content"], "git:abc")
+
+    @patch('requests.Session.request')
+    def test_prepare_schema_single_patch(self, mock_request):
+        """测试缺少的选项和项目标识属性用一次数据库 PATCH 补齐，不添加其他属性，并在本地校验写入内容"""
+        schema = {
+            "名称": {"type": "title", "title": {}},
+            "技术栈": {"type": "multi_select", "multi_select": {"options": [{"id": "o1", "name": "Python"}]}},
+            "状态": {"type": "select", "select": {"options": [{"id": "s1", "name": "活跃"}]}},
+            "描述": {"type": "number", "number": {}},
+        }
+        retrieved = MagicMock(status_code=200)
+        retrieved.json.return_value = {"properties": schema}
+        patched = MagicMock(status_code=200)
+        patched.json.return_value = {"properties": dict(schema, 项目标识={"type": "rich_text", "rich_text": {}})}
+        mock_request.side_effect = [retrieved, patched]
+        projects = [
+            {"name": f"项目{i}", "path": "/p", "tech_stack": ["Python", "Rust"], "project_type": "其他",
+             "status": "暂停", "priority": "高", "description": "x" * 3000, "last_modified": "2025-03-31",
+             "identity": f"dir:{i}"}
+            for i in range(5)
+        ]
+        
+        self.assertTrue(self.client.prepare_schema(projects))
+        
+        self.assertEqual(mock_request.call_count, 2)
+        method, _ = mock_request.call_args_list[1].args
+        changes = mock_request.call_args_list[1].kwargs["json"]["properties"]
+        self.assertEqual(method, "PATCH")
+        self.assertEqual(changes["技术栈"]["multi_select"]["options"], [{"id": "o1", "name": "Python"}, {"name": "Rust"}])
+        self.assertEqual(changes["状态"]["select"]["options"], [{"id": "s1", "name": "活跃"}, {"name": "暂停"}])
+        self.assertEqual(changes["项目标识"], {"rich_text": {}})
+        self.assertEqual(set(changes), {"技术栈", "状态", "项目标识"})
+        
+        # 类型不一致的属性在本地丢弃，不再逐页失败
+        properties = self.client.validate_properties(self.client._build_properties(projects[0]))
+        self.assertNotIn("描述", properties)
+        self.assertNotIn("路径", properties)
+        self.assertIn("项目标识", properties)
+
+    @patch('requests.Session.request')
+    def test_circuit_breaker_fails_fast(self, mock_request):
+        """测试连续失败后熔断，冷却后由单个探测请求恢复"""
+        breaker = CircuitBreaker(failure_threshold=3, cooldown=0.05)
+        client = NotionClient(self.api_key, self.database_id, rate_limiter=RateLimiter(rate=1000), breaker=breaker)
+        mock_request.return_value = MagicMock(status_code=503, text="unavailable")
+        
+        for _ in range(3):
+            self.assertFalse(client.update_page("page1", "项目", {"properties": {}}))
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        
+        # 打开期间不再发送请求
+        for _ in range(10):
+            self.assertFalse(client.update_page("page1", "项目", {"properties": {}}))
+        self.assertEqual(mock_request.call_count, 3)
+        
+        # 冷却后只放行一个探测请求
+        time.sleep(0.06)
+        breaker.before_request()
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_request()
+        
+        # 探测成功后恢复
+        breaker.record_success()
+        mock_request.return_value = MagicMock(status_code=200)
+        self.assertTrue(client.update_page("page1", "项目", {"properties": {}}))
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+    
+    def test_circuit_breaker_reopens_after_failed_probe(self):
+        """测试探测请求失败时重新打开"""
+        breaker = CircuitBreaker(failure_threshold=1, cooldown=0)
+        breaker.record_failure()
+        breaker.before_request()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Notion 项目更新器 - 项目信息记录测试
+"""
+
+import os
+import sys
+import unittest
+
+# 添加父目录到导入路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from project_info import ProjectInfo, STATUSES, Vocabulary
+
+class TestProjectInfo(unittest.TestCase):
+    """项目信息记录测试类"""
+
+    def test_defaults_and_dict_access(self):
+        """测试默认值和字典兼容接口"""
+        info = ProjectInfo("demo", "/tmp/demo", tech_stack=["Python", "Docker"], size_mb=1.5)
+
+        self.assertEqual(info["name"], "demo")
+        self.assertEqual(info["status"], "未知")
+        self.assertEqual(info["priority"], "低")
+        self.assertEqual(info["tech_stack"], ("Python", "Docker"))
+        self.assertIn("size_mb", info)
+        self.assertNotIn("file_count", info)
+        self.assertEqual(info.get("file_count", 0), 0)
+        with self.assertRaises(KeyError):
+            info["file_count"]
+        self.assertFalse(hasattr(info, "__dict__"))
+
+    def test_coded_fields(self):
+        """测试状态等字段以共享编码存储"""
+        info = ProjectInfo("demo", "/tmp/demo", status="活跃", project_type="Web应用")
+        other = ProjectInfo("other", "/tmp/other", status="活跃")
+
+        self.assertEqual(info.status_code, other.status_code)
+        self.assertEqual(info.status, "活跃")
+        self.assertEqual(info["project_type"], "Web应用")
+        info["status"] = "暂停"
+        self.assertEqual(info.status_code, STATUSES.code("暂停"))
+
+    def test_vocabulary_registers_new_values(self):
+        """测试取值表追加未登记的取值"""
+        vocab = Vocabulary(["a", "b"])
+        self.assertEqual(vocab.code("b"), 1)
+        self.assertEqual(vocab.code("c"), 2)
+        self.assertEqual(vocab.value(2), "c")
+        self.assertEqual(vocab.find("d"), -1)
+        self.assertEqual(len(vocab.values), 3)
+
+    def test_custom_fields_and_round_trip(self):
+        """测试自定义字段和字典互相转换"""
+        info = ProjectInfo("demo", "/tmp/demo", tech_stack=["Go"], limits_hit=["files"])
+        info["complexity"] = 42
+
+        self.assertEqual(info["complexity"], 42)
+        self.assertIn("complexity", info)
+        data = info.to_dict()
+        self.assertEqual(data["tech_stack"], ["Go"])
+        self.assertEqual(data["complexity"], 42)
+        self.assertNotIn("size_mb", data)
+        self.assertEqual(ProjectInfo.from_dict(data).to_dict(), data)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Notion 项目更新器 - 项目表测试
+"""
+
+import os
+import sys
+import datetime
+import unittest
+
+# 添加父目录到导入路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from project_info import ProjectInfo, STATUSES
+from project_table import ProjectTable, TECH_STACKS, tech_mask, mask_techs
+
+class TestProjectTable(unittest.TestCase):
+    """项目表测试类"""
+
+    def setUp(self):
+        """设置测试数据"""
+        today = datetime.date.today()
+        old = today - datetime.timedelta(days=30)
+        self.table = ProjectTable([
+            ProjectInfo("api", "/p/api", status="活跃", priority="高", tech_stack=["Python", "Docker"],
+                        last_modified=today.isoformat(), code_lines=1200, commits_30d=15),
+            ProjectInfo("web", "/p/web", status="活跃", tech_stack=["JavaScript"],
+                        last_modified=today.isoformat(), code_lines=800),
+            ProjectInfo("tool", "/p/tool", status="暂停", tech_stack=["Python"],
+                        last_modified=old.isoformat(), code_lines=300, truncated=True),
+        ])
+        self.week_ago = today - datetime.timedelta(days=7)
+
+    def test_where(self):
+        """测试多条件筛选"""
+        self.assertEqual(self.table.where(status="活跃", tech="Python", modified_since=self.week_ago), [0])
+        self.assertEqual(self.table.where(tech="Python"), [0, 2])
+        self.assertEqual(self.table.where(tech=["Python", "Docker"]), [0])
+        self.assertEqual(self.table.where(truncated=True), [2])
+        self.assertEqual(self.table.where(priority="高", rows=[1, 2]), [])
+
+    def test_sort_puts_missing_values_last(self):
+        """测试排序，缺失值排在最后"""
+        self.assertEqual(self.table.sort("code_lines"), [2, 1, 0])
+        self.assertEqual(self.table.sort("commits_30d", reverse=True), [0, 1, 2])
+        self.assertEqual([self.table[row].name for row in self.table.sort("status")], ["api", "web", "tool"])
+
+    def test_to_columns(self):
+        """测试按列导出"""
+        columns = self.table.to_columns(self.table.where(tech="Python"))
+        self.assertEqual(columns["name"], ["api", "tool"])
+        self.assertEqual(columns["status"], ["活跃", "暂停"])
+        self.assertEqual(sorted(columns["tech_stack"][0]), ["Docker", "Python"])
+        self.assertEqual(columns["code_lines"], [1200, 300])
+        self.assertEqual(columns["commits_30d"], [15, None])
+
+    def test_rows_rebuilt_from_columns(self):
+        """测试只按列保存，按行读取时重建完整记录"""
+        info = ProjectInfo("svc", "/p/svc", identity="git:abc", status="维护中", tech_stack=["Go"],
+                           description="服务", last_modified="2025-03-31", size_mb=1.5, file_count=42,
+                           languages={"Go": 1.0}, primary_language="Go", branch="main", dirty=False,
+                           limits_hit=["files"], truncated=True)
+        info["自定义字段"] = 1
+        self.table.append(info)
+
+        self.assertFalse(hasattr(self.table, "records"))
+        self.assertEqual(self.table[-1].to_dict(), info.to_dict())
+        self.assertIsInstance(self.table[-1]["file_count"], int)
+        self.assertNotIn("code_lines", self.table[-1])
+        self.assertEqual([row.name for row in self.table.take([3, 0])], ["svc", "api"])
+
+    def test_where_does_not_register_values(self):
+        """测试按未登记的取值查询时不匹配任何行，也不追加到共享取值表"""
+        sizes = (len(STATUSES.values), len(TECH_STACKS.values))
+        self.assertEqual(self.table.where(status="typo"), [])
+        self.assertEqual(self.table.where(tech=["Python", "Cobol-typo"]), [])
+        self.assertEqual((len(STATUSES.values), len(TECH_STACKS.values)), sizes)
+
+    def test_to_columns_exports_all_fields(self):
+        """测试按列导出表中保存的全部字段"""
+        info = ProjectInfo("svc", "/p/svc", identity="git:abc", description="服务", branch="main",
+                           dirty=True, languages={"Go": 1.0}, primary_language="Go", limits_hit=["files"])
+        info["自定义字段"] = 1
+        row = self.table.append(info)
+
+        columns = self.table.to_columns([row])
+        self.assertEqual(columns["identity"], ["git:abc"])
+        self.assertEqual(columns["description"], ["服务"])
+        self.assertEqual(columns["branch"], ["main"])
+        self.assertEqual(columns["dirty"], [True])
+        self.assertEqual(columns["languages"], [{"Go": 1.0}])
+        self.assertEqual(columns["primary_language"], ["Go"])
+        self.assertEqual(columns["limits_hit"], [["files"]])
+        self.assertEqual(columns["extra"], [{"自定义字段": 1}])
+
+    def test_tech_mask_round_trip(self):
+        """测试技术栈位掩码编解码"""
+        self.assertEqual(sorted(mask_techs(tech_mask(["Rust", "Go"]))), ["Go", "Rust"])
+        self.assertEqual(tech_mask([]), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Notion 项目更新器 - 运行时资源测试
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# 添加父目录到导入路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import runtime
+from runtime import Runtime, current_rss_mb
+from state import StateFile
+
+class TestRuntime(unittest.TestCase):
+    """运行时资源测试类"""
+
+    def setUp(self):
+        """替换会访问共享资源的函数"""
+        self.patches = [patch.object(runtime, name) for name in
+                        ("prune_all_state", "prune_tree_state", "save_all_state", "unload_all_state",
+                         "close_git_pool")]
+        self.patches.append(patch("notion_client.reset_session"))
+        self.mocks = {p.attribute: p.start() for p in self.patches}
+
+    def tearDown(self):
+        """恢复被替换的函数"""
+        for p in self.patches:
+            p.stop()
+
+    def test_pools_reused_between_runs(self):
+        """测试各次运行复用同一组线程池"""
+        rt = Runtime(max_rss_mb=0, recycle_runs=0)
+        pool = rt.analysis_pool
+        self.assertEqual(pool.submit(sum, [1, 2]).result(), 3)
+        rt.end_run()
+        rt.end_run()
+
+        self.assertIs(rt.analysis_pool, pool)
+        self.assertEqual(self.mocks["save_all_state"].call_count, 2)
+        self.mocks["unload_all_state"].assert_not_called()
+        rt.close()
+
+    def test_recycle_after_runs(self):
+        """测试达到运行次数后回收并重建资源"""
+        rt = Runtime(max_rss_mb=0, recycle_runs=2)
+        pool = rt.sync_pool
+        rt.end_run()
+        self.assertIs(rt.sync_pool, pool)
+        rt.end_run()
+
+        self.assertEqual(rt.recycled, 1)
+        self.assertIsNot(rt.sync_pool, pool)
+        self.mocks["unload_all_state"].assert_called_once()
+        self.mocks["reset_session"].assert_called_once()
+        rt.close()
+
+    def test_recycle_over_memory_cap(self):
+        """测试常驻内存超过上限时回收"""
+        self.assertIsNotNone(current_rss_mb())
+        rt = Runtime(max_rss_mb=1, recycle_runs=0)
+        rt.end_run()
+        self.assertEqual(rt.recycled, 1)
+
+    def test_rss_unknown_without_proc(self):
+        """测试没有 /proc 时不返回峰值内存，也不因内存上限回收"""
+        with patch("builtins.open", side_effect=FileNotFoundError):
+            self.assertIsNone(current_rss_mb())
+            rt = Runtime(max_rss_mb=1, recycle_runs=0)
+            rt.end_run()
+        self.assertEqual(rt.recycled, 0)
+
+    def test_recycle_skips_unloaded_notion_client(self):
+        """测试导出模式回收时不为重置 HTTP 会话而导入 notion_client"""
+        with patch.dict(sys.modules):
+            sys.modules.pop("notion_client", None)
+            Runtime(max_rss_mb=0, recycle_runs=0).recycle()
+            self.assertNotIn("notion_client", sys.modules)
+        self.mocks["reset_session"].assert_not_called()
+
+    def test_state_unload(self):
+        """测试释放状态文件内存后重新从磁盘加载"""
+        temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, temp_dir)
+        state = StateFile(temp_dir / "state.json")
+        state.set("key", "value")
+        state.unload()
+
+        self.assertIsNone(state._entries)
+        self.assertEqual(state.get("key"), "value")
+
+    def test_state_prune_unused_entries(self):
+        """测试删除长期未读写的状态项，使用日期随文件保存"""
+        temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, temp_dir)
+        state = StateFile(temp_dir / "state.json")
+        with patch("state.time.time", return_value=100 * 86400):
+            state.set("old", 1)
+            state.set("used", 2)
+        with patch("state.time.time", return_value=190 * 86400):
+            self.assertEqual(state.get("used"), 2)
+            state.save()
+            state.clear_memory()
+            self.assertEqual(state.prune(60), 1)
+
+        self.assertEqual(state.items(), [("used", 2)])
+
+if __name__ == "__main__":
+    unittest.main()
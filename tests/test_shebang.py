@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Notion 项目更新器 - 脚本识别测试
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# 添加父目录到导入路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shebang
+from shebang import parse_shebang, detect_script_tech, is_dockerfile
+from fingerprint import scan_tree
+from analyzer import detect_tech_stack
+from state import StateFile
+
+class TestShebang(unittest.TestCase):
+    """脚本识别测试类"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.project_dir = self.temp_dir / "project"
+        (self.project_dir / "bin").mkdir(parents=True)
+        self.cache_patch = patch.object(shebang, "_cache", StateFile(self.temp_dir / "shebangs.json"))
+        self.cache_patch.start()
+
+    def tearDown(self):
+        """清理测试环境"""
+        self.cache_patch.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def _script(self, rel, content, executable=True):
+        """创建脚本文件"""
+        path = self.project_dir / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        if executable:
+            os.chmod(path, 0o755)
+        return path
+
+    def test_parse_shebang(self):
+        """测试解析各种 shebang 形式"""
+        self.assertEqual(parse_shebang(b"#!/usr/bin/python3.11\nprint()"), "python")
+        self.assertEqual(parse_shebang(b"#!/usr/bin/env -S node --no-warnings\n"), "node")
+        self.assertEqual(parse_shebang(b"#!/usr/bin/env FOO=1 bash\n"), "bash")
+        self.assertEqual(parse_shebang(b"#! /bin/sh -e\n"), "sh")
+        self.assertIsNone(parse_shebang(b"\x7fELF\x02\x01"))
+        self.assertIsNone(parse_shebang(b"#!\n"))
+        self.assertTrue(is_dockerfile("Dockerfile.dev"))
+        self.assertTrue(is_dockerfile("api.dockerfile"))
+        self.assertFalse(is_dockerfile("docker-notes.md"))
+
+    def test_detects_extensionless_scripts(self):
+        """测试识别 bin/ 中的无扩展名脚本和 Dockerfile"""
+        self._script("bin/deploy", b"#!/bin/bash\necho hi\n")
+        self._script("bin/serve", b"#!/usr/bin/env node\nconsole.log(1)\n")
+        self._script("tools/cleanup", b"#!/usr/bin/env python3\n", executable=False)
+        self._script("LICENSE", b"#!not really a script\n", executable=False)
+        (self.project_dir / "Dockerfile").write_text("FROM python:3.11\n")
+
+        tech = detect_tech_stack(self.project_dir)
+        for expected in ("Shell", "JavaScript", "Node.js", "Python", "Docker"):
+            self.assertIn(expected, tech)
+
+    def test_cache_avoids_rereading(self):
+        """测试未变化的文件再次检查时不读取内容"""
+        self._script("bin/run", b"#!/usr/bin/env ruby\n")
+        snapshot = scan_tree(self.project_dir)
+        self.assertEqual(detect_script_tech(self.project_dir, snapshot), {"Ruby"})
+
+        with patch("builtins.open", side_effect=AssertionError("不应读取文件")):
+            self.assertEqual(detect_script_tech(self.project_dir, snapshot), {"Ruby"})
+
+    def test_sample_limit(self):
+        """测试每个项目最多检查的文件数"""
+        for i in range(5):
+            self._script(f"bin/tool{i}", b"#!/bin/sh\n")
+        snapshot = scan_tree(self.project_dir)
+        with patch.object(shebang, "SHEBANG_MAX_FILES", 2), \
+                patch.object(shebang, "sniff_interpreter", return_value=None) as mock_sniff:
+            detect_script_tech(self.project_dir, snapshot)
+            self.assertEqual(mock_sniff.call_count, 2)
+
+if __name__ == "__main__":
+    unittest.main()
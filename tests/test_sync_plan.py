@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Notion 项目更新器 - 同步计划测试
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+# 添加父目录到导入路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notion_client import NotionClient
+from sync_plan import (
+    build_plan,
+    plan_counts,
+    estimate_seconds,
+    save_plans,
+    load_plans,
+    apply_plan,
+    property_value,
+)
+
+def notion_page(page_id, properties):
+    """把写入用的属性转换为 Notion 返回的页面格式"""
+    page_properties = {}
+    for name, prop in properties.items():
+        prop = dict(prop)
+        for kind in ("title", "rich_text"):
+            if kind in prop:
+                prop[kind] = [dict(part, plain_text=part["text"]["content"]) for part in prop[kind]]
+        page_properties[name] = prop
+    return {"id": page_id, "properties": page_properties}
+
+class TestSyncPlan(unittest.TestCase):
+    """同步计划测试类"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.client = NotionClient("test_api_key", "test_database_id")
+        self.project = {
+            "name": "已有项目",
+            "path": "/p/existing",
+            "tech_stack": ["Python", "Docker"],
+            "project_type": "其他",
+            "status": "活跃",
+            "priority": "高",
+            "description": "描述",
+            "last_modified": "2025-03-31",
+            "code_lines": 100,
+        }
+
+    def tearDown(self):
+        """清理测试环境"""
+        shutil.rmtree(self.temp_dir)
+
+    def _pages(self, project):
+        """数据库中已有项目的页面"""
+        properties = self.client._build_properties(project)
+        # Notion 返回的多选顺序可能不同
+        properties["技术栈"]["multi_select"].reverse()
+        return {project["name"]: notion_page("page1", properties)}
+
+    def test_build_plan(self):
+        """测试新建、更新、跳过和归档操作"""
+        changed = dict(self.project, name="改动项目")
+        pages = {**self._pages(self.project), **self._pages(dict(changed, code_lines=50))}
+        pages["改动项目"]["id"] = "page2"
+        pages.update(self._pages(dict(self.project, name="已删除项目")))
+        pages["已删除项目"]["id"] = "page3"
+        self.client.load_existing_pages = MagicMock(return_value=pages)
+        self.client.owned_page_ids = MagicMock(return_value={"page1", "page2", "page3"})
+        self.client.load_schema = MagicMock(return_value=None)
+        self.client._schema = {name: {"type": next(iter(prop))}
+                               for name, prop in self.client._build_properties(self.project).items()}
+
+        plan = build_plan([self.project, changed, dict(self.project, name="新项目")], self.client,
+                          archive_missing=True)
+        operations = {operation["name"]: operation for operation in plan["operations"]}
+
+        self.assertEqual(operations["已有项目"]["op"], "skip")
+        self.assertEqual(operations["改动项目"]["op"], "update")
+        self.assertEqual(operations["改动项目"]["fields"], ["代码行数"])
+        self.assertEqual(operations["新项目"]["op"], "create")
+        self.assertEqual(operations["已删除项目"]["op"], "archive")
+        self.assertEqual(plan_counts(plan), {"create": 1, "update": 1, "skip": 1, "archive": 1})
+        self.assertIsNone(plan["schema"])
+        self.assertAlmostEqual(estimate_seconds(plan, rate=3.0), 1.0)
+
+    def test_property_value(self):
+        """测试比对时忽略格式差异"""
+        self.assertEqual(property_value({"select": None}), None)
+        self.assertEqual(property_value({"multi_select": [{"name": "b"}, {"name": "a"}]}), ("a", "b"))
+        self.assertEqual(property_value({"rich_text": [{"plain_text": "a"}, {"plain_text": "b"}]}), "ab")
+        self.assertEqual(property_value({"checkbox": False}), False)
+
+    def test_save_and_apply(self):
+        """测试保存计划后直接执行"""
+        schema = {"技术栈": {"multi_select": {"options": [{"id": "o1", "name": "Python"}, {"name": "Go"}]}}}
+        plan = {"database_id": "test_database_id", "schema": schema, "operations": [
+            {"op": "create", "name": "新项目", "properties": {}},
+            {"op": "update", "name": "改动项目", "page_id": "page2", "fields": ["代码行数"],
+             "properties": {"代码行数": {"number": 50}}},
+            {"op": "skip", "name": "已有项目", "page_id": "page1"},
+            {"op": "archive", "name": "已删除项目", "page_id": "page3"},
+        ]}
+        path = self.temp_dir / "plan.json"
+        save_plans([plan], path)
+        loaded = load_plans(path)
+        self.assertEqual(loaded, [plan])
+
+        client = MagicMock()
+        client.database_id = "test_database_id"
+        client.create_page.return_value = "page4"
+        client.update_page.return_value = True
+        client.archive_page.return_value = False
+        stats = apply_plan(loaded[0], client)
+
+        self.assertEqual((stats["created"], stats["updated"], stats["skipped"], stats["failed"]), (1, 1, 1, 1))
+        client.update_page.assert_called_once_with("page2", "改动项目", {"properties": {"代码行数": {"number": 50}}})
+        client.load_existing_pages.assert_not_called()
+        client.update_schema.assert_called_once_with(schema)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+"""
+运行阶段计时模块，记录一次同步中各阶段（发现、分析、同步）的耗时
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+
+class PhaseTimer:
+    """累计记录一次运行中各阶段的耗时
+
+    同一阶段可以多次进入（例如每个扫描目标各同步一次），耗时累加。可在多个线程中同时使用。
+    """
+
+    def __init__(self):
+        """初始化计时器，开始计算总耗时"""
+        self.started = time.monotonic()
+        self.phases: Dict[str, float] = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """记录代码块的耗时
+
+        Args:
+            name: 阶段名称
+        """
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            with self.lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def summary(self) -> Dict[str, float]:
+        """返回各阶段耗时和总耗时（秒）"""
+        with self.lock:
+            phases = {name: round(seconds, 3) for name, seconds in self.phases.items()}
+        phases["total"] = round(time.monotonic() - self.started, 3)
+        return phases